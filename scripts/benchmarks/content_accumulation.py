@@ -0,0 +1,65 @@
+"""
+Compares building Metadata content from a large browsertrix pages.jsonl one page at a time
+(repeated set_content, which rebuilds the whole string each call) against a single extend_content.
+
+Usage:
+```
+python scripts/benchmarks/content_accumulation.py [--pages 10000] [--page-size 500]
+```
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import jsonlines
+
+from auto_archiver.core import Metadata
+
+
+def write_pages(path: str, n_pages: int, page_size: int) -> None:
+    with jsonlines.open(path, "w") as writer:
+        for i in range(n_pages):
+            writer.write(
+                {
+                    "url": f"https://example.com/{i}",
+                    "title": f"page {i}",
+                    "text": (f"page {i} " * page_size)[:page_size],
+                }
+            )
+
+
+def per_page(path: str) -> Metadata:
+    item = Metadata()
+    with jsonlines.open(path) as reader:
+        for obj in reader:
+            item.set("content", (item.get("content", "") + obj["text"] + "\n").strip())
+    return item
+
+
+def batched(path: str) -> Metadata:
+    item = Metadata()
+    with jsonlines.open(path) as reader:
+        item.extend_content([obj["text"] for obj in reader])
+    return item
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=500, help="characters of text per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pages.jsonl")
+        write_pages(path, args.pages, args.page_size)
+
+        results = {}
+        for label, fn in [("set_content per page", per_page), ("extend_content", batched)]:
+            start = time.perf_counter()
+            results[label] = fn(path).get("content")
+            print(f"{label:<22} {time.perf_counter() - start:8.3f} s")
+
+    assert len(set(results.values())) == 1, "results differ"
+    print(f"content length: {len(results['extend_content']) / 2**20:.1f} MiB")
@@ -0,0 +1,79 @@
+"""
+Measures the logging overhead per archived item with eager vs lazy record serialization.
+
+Mimics a run with an INFO console sink and a DEBUG file sink (or one file per level), where an
+item emits many debug records (as the debug-heavy extractors do) and a few info ones.
+The 'eager' patcher is how custom_logger used to serialize every record up front.
+
+Usage:
+```
+python scripts/benchmarks/logging_overhead.py [--records 2000] [--items 20]
+```
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from loguru import logger as base_logger
+
+from auto_archiver.utils.custom_logger import (
+    format_for_human_readable_console,
+    patching,
+    serialize,
+    serialize_for_console,
+)
+
+
+def eager_patching(record):
+    record["extra"]["serialized"] = serialize(record)
+    record["extra"]["serialize_for_console"] = serialize_for_console(record)
+
+
+def run(patcher, sinks: str, n_items: int, n_records: int, enqueue: bool) -> float:
+    base_logger.remove()
+    log = base_logger.patch(patcher)
+    devnull = open(os.devnull, "w")
+    base_logger.add(devnull, level="INFO", format=format_for_human_readable_console())
+    log_dir = tempfile.TemporaryDirectory()
+    log_file = os.path.join(log_dir.name, "bench.log")
+    if sinks == "per-level":
+        for i, level in enumerate(["DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR"], start=1):
+            base_logger.add(
+                f"{log_file}.{i}_{level.lower()}",
+                filter=lambda rec, lvl=level: rec["level"].name == lvl,
+                format="{extra[serialized]}",
+                enqueue=enqueue,
+            )
+    else:
+        base_logger.add(log_file, level=sinks, format="{extra[serialized]}", enqueue=enqueue)
+
+    start = time.perf_counter()
+    for i in range(n_items):
+        with log.contextualize(url=f"https://example.com/{i}", trace="abcdef123456"):
+            log.info("Started processing")
+            for j in range(n_records):
+                log.debug(f"fetched page {j} with {{'id': {j}, 'views': {j * 3}}}")
+            log.success("DONE")
+    # time spent by the archiving thread, enqueued sinks finish writing in the background
+    elapsed = time.perf_counter() - start
+    log.complete()
+    base_logger.remove()
+    devnull.close()
+    log_dir.cleanup()
+    return elapsed / n_items
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=2000, help="debug records per item")
+    parser.add_argument("--items", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.records} debug records per item, ms per item")
+    for sinks, enqueue in [("INFO", False), ("DEBUG", False), ("per-level", False), ("DEBUG", True)]:
+        eager = run(eager_patching, sinks, args.items, args.records, enqueue)
+        lazy = run(patching, sinks, args.items, args.records, enqueue)
+        label = f"file sink: {sinks}{' (enqueue)' if enqueue else ''}"
+        print(f"{label:<28} eager {eager * 1000:8.1f}   lazy {lazy * 1000:8.1f}   ({eager / lazy:.1f}x)")
@@ -0,0 +1,68 @@
+"""
+Measures the memory used per Media object for a large item (eg: a full profile or channel archive).
+
+Compares the current slotted Media against an equivalent dict-backed dataclass (how Media was
+defined before it used __slots__), each with a thumbnail and a couple of properties.
+
+Usage:
+```
+python scripts/benchmarks/media_memory.py [--count 50000]
+```
+"""
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List
+
+from auto_archiver.core import Media
+
+
+@dataclass
+class DictMedia:
+    filename: str
+    _key: str = None
+    urls: List[str] = field(default_factory=list)
+    properties: dict = field(default_factory=dict)
+    _mimetype: str = None
+    _stored: bool = False
+
+    def set(self, key, value):
+        self.properties[key] = value
+        return self
+
+
+def build(cls, count: int) -> list:
+    items = []
+    for i in range(count):
+        # keys built at runtime, like the ones coming from API responses or from_dict
+        m = cls(filename=f"./tmp/media_{i}.jpg")
+        m.set("".join(["ha", "sh"]), f"SHA-256:{i:064x}")
+        m.set("".join(["th", "umbnail"]), cls(filename=f"./tmp/thumb_{i}.jpg"))
+        m.urls.append(f"https://cdn.example.com/{i}.jpg")
+        items.append(m)
+    return items
+
+
+def measure(cls, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    items = build(cls, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=50_000, help="number of Media in the item")
+    args = parser.parse_args()
+
+    before = measure(DictMedia, args.count)
+    after = measure(Media, args.count)
+    print(f"{args.count} media, each with a thumbnail Media property")
+    print(f"dict-backed: {before / args.count:8.1f} bytes/media ({before / 2**20:.1f} MiB)")
+    print(f"slotted:     {after / args.count:8.1f} bytes/media ({after / 2**20:.1f} MiB)")
+    print(f"saved:       {100 * (before - after) / before:.1f}%")
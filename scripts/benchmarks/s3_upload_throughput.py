@@ -0,0 +1,107 @@
+"""
+Measures S3Storage upload throughput for large files, comparing the previous behaviour (an open
+file object with boto3's default TransferConfig) against path-based uploads with a tuned TransferConfig.
+
+Runs against a local moto server by default (`pip install "moto[server]"`), or any S3-compatible
+endpoint such as MinIO with --endpoint-url. Note that a local stand-in has no network latency, which is
+where parallel parts help the most, so real providers usually show larger differences.
+
+Usage:
+```
+python scripts/benchmarks/s3_upload_throughput.py [--size-mb 512] [--chunksize-mb 16] [--max-concurrency 16]
+python scripts/benchmarks/s3_upload_throughput.py --endpoint-url http://localhost:9000 --key minioadmin --secret minioadmin
+```
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from boto3.s3.transfer import TransferConfig
+
+from auto_archiver.core import Media
+from auto_archiver.modules.s3_storage import S3Storage
+
+
+def make_storage(args, endpoint_url: str, chunksize_mb: int, max_concurrency: int, checksum: bool) -> S3Storage:
+    storage = S3Storage()
+    storage.bucket, storage.region = args.bucket, "us-east-1"
+    storage.key, storage.secret, storage.endpoint_url = args.key, args.secret, endpoint_url
+    storage.cdn_url, storage.private, storage.random_no_duplicate = "{key}", True, False
+    storage.multipart_threshold = storage.multipart_chunksize = chunksize_mb
+    storage.max_concurrency, storage.checksum_sha256 = max_concurrency, checksum
+    storage.setup()
+    return storage
+
+
+def upload_fileobj_default(storage: S3Storage, media: Media) -> None:
+    # how uploads worked before: Storage.upload opens the file and boto3 uses its default TransferConfig
+    storage.transfer_config = TransferConfig()
+    with open(media.filename, "rb") as f:
+        storage.uploadf(f, media)
+
+
+def bench(label: str, fn, storage: S3Storage, media: Media, size_mb: int, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(storage, media)
+        best = min(best, time.perf_counter() - start)
+    storage.s3.head_object(Bucket=storage.bucket, Key=media.key)
+    print(f"{label:<44} {best:7.2f} s  {size_mb / best:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--chunksize-mb", type=int, default=16)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--endpoint-url", default=None, help="defaults to starting a local moto server")
+    parser.add_argument("--bucket", default="benchmark")
+    parser.add_argument("--key", default="testing")
+    parser.add_argument("--secret", default="testing")
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = ThreadedMotoServer(port=0, verbose=False)
+        server.start()
+        host, port = server.get_host_and_port()
+        endpoint_url = f"http://{host}:{port}"
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            media = Media(filename=os.path.join(tmp, "video.mp4"), _key="benchmark/video.mp4")
+            with open(media.filename, "wb") as f:
+                for _ in range(args.size_mb):
+                    f.write(os.urandom(1024 * 1024))
+
+            storage = make_storage(args, endpoint_url, args.chunksize_mb, args.max_concurrency, checksum=False)
+            if server is not None:
+                storage.s3.create_bucket(Bucket=args.bucket)
+
+            print(f"{args.size_mb} MB file to {endpoint_url}")
+            bench(
+                "upload_fileobj, default TransferConfig",
+                upload_fileobj_default,
+                storage,
+                media,
+                args.size_mb,
+                args.repeat,
+            )
+            for checksum in [False, True]:
+                storage = make_storage(args, endpoint_url, args.chunksize_mb, args.max_concurrency, checksum)
+                label = (
+                    f"upload_file, {args.chunksize_mb} MB x {args.max_concurrency}{' + SHA-256' if checksum else ''}"
+                )
+                bench(label, S3Storage.upload, storage, media, args.size_mb, args.repeat)
+    finally:
+        if server is not None:
+            server.stop()
@@ -0,0 +1,62 @@
+"""
+Compares Metadata to_json/to_dict/from_dict against the reflection-based dataclasses_json implementation.
+
+Builds realistic large items (many media with thumbnails and hashes, a raw api_data payload, timestamps)
+and checks both paths produce identical JSON before timing them.
+
+Usage:
+```
+python scripts/benchmarks/serialization.py [--media 2000] [--repeat 5]
+```
+"""
+
+import argparse
+import datetime
+import json
+import timeit
+import warnings
+
+from dataclasses_json.core import _asdict, _decode_dataclass, _ExtendedEncoder
+
+from auto_archiver.core import Media, Metadata
+
+
+def make_item(n_media: int) -> Metadata:
+    item = Metadata().set_url("https://t.me/channel").set_title("channel").success("telethon")
+    item.set_timestamp(datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+    item.set("api_data", {"id": 1, "views": 1234, "entities": [{"offset": i, "length": 4} for i in range(200)]})
+    for i in range(n_media):
+        m = Media(filename=f"./tmp/{i}.jpg", _key=f"channel/{i}.jpg", urls=[f"https://cdn.example.com/{i}.jpg"])
+        m.set("hash", f"SHA-256:{i:064x}").set("id", f"post_{i}")
+        m.set("thumbnails", [Media(filename=f"./tmp/{i}_thumb_{j}.jpg") for j in range(3)])
+        item.add_media(m)
+    return item
+
+
+def bench(label: str, fn, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"  {label:<28} {best * 1000:9.1f} ms")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--media", type=int, default=2000, help="number of media in the item")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore")  # dataclasses_json warns about None in non-optional fields
+
+    item = make_item(args.media)
+    as_dict = json.loads(item.to_json())
+    assert item.to_json() == json.dumps(_asdict(item), cls=_ExtendedEncoder), "outputs differ"
+
+    print(f"item with {args.media} media ({len(item.get_all_media())} including thumbnails)")
+    for label, old, new in [
+        ("to_json", lambda: json.dumps(_asdict(item), cls=_ExtendedEncoder), item.to_json),
+        ("to_dict", lambda: _asdict(item), item.to_dict),
+        ("from_dict", lambda: _decode_dataclass(Metadata, as_dict, False), lambda: Metadata.from_dict(as_dict)),
+    ]:
+        print(label)
+        before = bench("dataclasses_json", old, args.repeat)
+        after = bench("json_dataclass", new, args.repeat)
+        print(f"  {'speedup':<28} {before / after:9.1f}x")
@@ -0,0 +1,92 @@
+"""
+Moves the files of an existing local_storage archive into the 'sharded' layout, eg: 'folder/<hash>.jpg' becomes
+'folder/ab/cd/<hash>.jpg', which is what `path_generator: sharded` saves from then on.
+
+Files are sharded inside the directory they are already in, so the result only matches the sharded layout for
+archives saved with `path_generator: flat`. With 'url' or 'random', the url/random folders are kept and
+sharded inside, eg: 'folder/<random>/<hash>.jpg' becomes 'folder/<random>/ab/cd/<hash>.jpg'. Files already in
+place are left untouched so the script can be run again. Files are renamed, not copied, so this is fast and needs no extra space.
+
+Every file is hashed, as `filename_generator: random` names look just like hashes. If the whole archive was saved
+with `filename_generator: static`, --static-names skips that and shards files by the hash their name starts with.
+
+Paths already recorded elsewhere (eg: in a Google Sheet or a CSV database) will point to the old location,
+use --mapping to get a CSV with the old and new paths.
+
+Example invocation:
+python scripts/shard_local_archive.py ./local_archive --depth 2 --width 2 --mapping moved.csv --dry-run
+"""
+
+import csv
+import hashlib
+import os
+import re
+
+import click
+
+from auto_archiver.core.storage import shard_path
+from auto_archiver.utils.misc import calculate_file_hash
+
+HASH_ALGORITHMS = {"SHA-256": hashlib.sha256, "SHA3-512": hashlib.sha3_512}
+# filename_generator: static names files after the first 24 characters of their hash
+STATIC_NAME = re.compile(r"^[0-9a-f]{24}$")
+
+
+def file_hash(path: str, algorithm: str, length: int, static_names: bool = False) -> str:
+    name, _ = os.path.splitext(os.path.basename(path))
+    if static_names and STATIC_NAME.match(name) and length <= len(name):
+        return name
+    return calculate_file_hash(path, HASH_ALGORITHMS[algorithm])
+
+
+@click.command(help=__doc__.split("\n\n")[0])
+@click.argument("archive", type=click.Path(exists=True, file_okay=False))
+@click.option("--depth", default=2, show_default=True, help="number of nested directories, same as shard_depth")
+@click.option("--width", default=2, show_default=True, help="characters per directory name, same as shard_width")
+@click.option(
+    "--algorithm",
+    type=click.Choice(list(HASH_ALGORITHMS)),
+    default="SHA-256",
+    show_default=True,
+    help="hash algorithm of the hash_enricher, with --static-names only used for files not named after their hash",
+)
+@click.option(
+    "--static-names",
+    is_flag=True,
+    help="trust that files named with 24 hex characters are named after their hash (filename_generator: static) rather than hashing them",
+)
+@click.option("--mapping", type=click.Path(dir_okay=False), help="CSV file where to write the old and new paths")
+@click.option("--dry-run", is_flag=True, help="only print what would be moved")
+def main(archive, depth, width, algorithm, static_names, mapping, dry_run):
+    # list everything first, so moved files aren't visited again
+    files = [os.path.join(root, f) for root, _, filenames in os.walk(archive) for f in filenames]
+    moves, skipped = [], 0
+    for path in files:
+        folder, name = os.path.split(path)
+        shard = shard_path(file_hash(path, algorithm, depth * width, static_names), depth, width)
+        if folder.endswith(os.sep + shard):
+            continue
+        new_path = os.path.join(folder, shard, name)
+        if os.path.exists(new_path):
+            click.echo(f"skipping {path}, {new_path} already exists", err=True)
+            skipped += 1
+            continue
+        if not dry_run:
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            os.rename(path, new_path)
+        moves.append((path, new_path))
+        if dry_run:
+            click.echo(f"{path} -> {new_path}")
+
+    if mapping:
+        with open(mapping, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["old_path", "new_path"])
+            writer.writerows(moves)
+    click.echo(
+        f"{'would move' if dry_run else 'moved'} {len(moves)} of {len(files)} files, {skipped} skipped as their new path exists"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ in the media archiving framework.
 
 from __future__ import annotations
 from abc import abstractmethod
-from typing import Union
+from typing import List, Union
 
 from auto_archiver.core import Metadata, BaseModule
 
@@ -34,6 +34,14 @@ class Database(BaseModule):
         """check and fetch if the given item has been archived already, each database should handle its own caching, and configuration mechanisms"""
         return False
 
+    def prefetch(self, urls: List[str]) -> None:
+        """called with the urls of the next items to archive when the feed is read ahead (--prefetch), to look them all up at once ahead of `fetch`"""
+        pass
+
+    def cleanup(self) -> None:
+        """called when archiving ends, eg: to write out buffered results and close connections"""
+        pass
+
     @abstractmethod
     def done(self, item: Metadata, cached: bool = False) -> None:
         """archival result ready - should be saved to DB"""
@@ -23,3 +23,10 @@ class Feeder(BaseModule):
         These should be instances of Metadata, typically created with Metadata().set_url(url).
         """
         return None
+
+    def can_read_ahead(self) -> bool:
+        """
+        Whether items can be taken from the iterator before the previous ones are archived (see --prefetch).
+        Feeders that record progress or claim items as they yield them (eg: checkpoints, leases) must return False.
+        """
+        return True
@@ -5,21 +5,34 @@ nested media retrieval, and type validation.
 
 from __future__ import annotations
 import os
+import sys
 import traceback
 from typing import Any, List, Iterator
-from dataclasses import dataclass, field
-from dataclasses_json import dataclass_json, config
+from dataclasses import dataclass, field, fields, MISSING
+from dataclasses_json import config
 import mimetypes
 
 from auto_archiver.utils.custom_logger import logger
+from auto_archiver.utils.misc import truncate
 
+from .serialization import json_dataclass
+from .storage_dispatcher import store_media
 
-@dataclass_json  # annotation order matters
-@dataclass
+
+def _intern(key: Any) -> Any:
+    # property keys repeat across every Media of an item, share a single copy of each
+    return sys.intern(key) if type(key) is str else key
+
+
+@json_dataclass(decoders={"urls": list, "properties": dict})  # annotation order matters
+@dataclass(slots=True)
 class Media:
     """
     Represents a media file with associated properties and storage details.
 
+    Media uses __slots__ and interned property keys, since a single item (eg: a full profile
+    or channel) can hold tens of thousands of them.
+
     Attributes:
     - filename: The file path of the media as saved locally (temporarily, before uploading to the storage).
     - urls: A list of URLs where the media is stored or accessible.
@@ -34,6 +47,22 @@ class Media:
     _mimetype: str = None  # eg: image/jpeg
     _stored: bool = field(default=False, repr=False, metadata=config(exclude=lambda _: True))  # always exclude
 
+    def __post_init__(self):
+        if self.properties:
+            # eg: from_dict, where keys are fresh strings rather than shared literals
+            self.properties = {_intern(k): v for k, v in self.properties.items()}
+
+    def __setstate__(self, state):
+        # slotted instances pickle as (None, slots), older pickles hold a plain __dict__
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for f in fields(self):
+            if f.name in state:
+                val = state[f.name]
+            else:
+                val = f.default_factory() if f.default_factory is not MISSING else f.default
+            object.__setattr__(self, f.name, val)
+
     def store(self: Media, metadata: Any, url: str = "url-not-available", storages: List[Any] = None) -> None:
         # 'Any' typing for metadata to avoid circular imports. Stores the media
         # into the provided/available storages [Storage] repeats the process for
@@ -43,9 +72,14 @@ class Media:
             logger.warning(f"No storages found in local context or provided directly for {self.filename}.")
             return
 
-        for s in storages:
-            for any_media in self.all_inner_media(include_self=True):
-                s.store(any_media, url, metadata=metadata)
+        store_media([self], url, metadata, storages)
+
+    def __str__(self) -> str:
+        # bounded summary for logging, repr() has the full contents
+        return (
+            f"Media(filename={self.filename!r}, key={self._key!r}, urls=<{len(self.urls)} items>, "
+            f"properties={truncate(', '.join(map(str, self.properties)), 80)!r})"
+        )
 
     def all_inner_media(self, include_self=False) -> Iterator[Media]:
         """Retrieves all media, including nested media within properties or transformations on original media.
@@ -73,7 +107,7 @@ class Media:
         return self._key
 
     def set(self, key: str, value: Any) -> Media:
-        self.properties[key] = value
+        self.properties[_intern(key)] = value
         return self
 
     def get(self, key: str, default: Any = None) -> Any:
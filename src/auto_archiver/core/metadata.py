@@ -12,19 +12,21 @@ Key Functionalities:
 from __future__ import annotations
 import hashlib
 import os
-from typing import Any, List, Union, Dict
+from typing import Any, Iterable, List, Union, Dict
 from dataclasses import dataclass, field
-from dataclasses_json import dataclass_json
 import datetime
 from urllib.parse import urlparse
 from dateutil.parser import parse as parse_dt
 from auto_archiver.utils.custom_logger import logger
+from auto_archiver.utils.misc import truncate
 
 from .media import Media
+from .serialization import json_dataclass
+from .storage_dispatcher import store_media
 
 
-@dataclass_json  # annotation order matters
-@dataclass
+@json_dataclass(decoders={"metadata": dict, "media": lambda media: [Media.from_dict(m) for m in media]})
+@dataclass  # annotation order matters
 class Metadata:
     status: str = "no archiver"
     metadata: Dict[str, Any] = field(default_factory=dict)
@@ -66,8 +68,11 @@ class Metadata:
     def store(self, storages=[]):
         # calls .store for all contained media. storages [Storage]
         self.remove_duplicate_media_by_hash()
-        for media in self.media:
-            media.store(url=self.get_url(), metadata=self, storages=storages)
+        if not len(storages):
+            if len(self.media):
+                logger.warning(f"No storages found in local context or provided directly for {self.get_url()}.")
+            return
+        store_media(self.media, self.get_url(), self, storages)
 
     def set(self, key: str, val: Any) -> Metadata:
         self.metadata[key] = val
@@ -118,8 +123,24 @@ class Metadata:
 
     def set_content(self, content: str) -> Metadata:
         # a dump with all the relevant content
-        append_content = (self.get("content", "") + content + "\n").strip()
-        return self.set("content", append_content)
+        return self.extend_content([content])
+
+    def extend_content(self, contents: Iterable[str]) -> Metadata:
+        """
+        Same result as calling set_content for each of contents, but joins them in a single pass
+        rather than rebuilding the whole content string on every call. Use it for many chunks (eg: crawled pages).
+        """
+        chunks = None
+        for content in contents:
+            if chunks is None:
+                # the first append strips the existing content along with it
+                chunks = [(self.get("content", "") + content).strip()]
+            else:
+                # the content so far is stripped, each chunk can only lose its trailing whitespace
+                chunks.append(content.rstrip())
+        if chunks is None:
+            return self
+        return self.set("content", "".join(chunks).lstrip())
 
     def set_title(self, title: str) -> Metadata:
         return self.set("title", title)
@@ -216,7 +237,12 @@ class Metadata:
         return [inner for m in self.media for inner in m.all_inner_media(True)]
 
     def __str__(self) -> str:
-        return self.__repr__()
+        # bounded summary for logging, repr() has the full contents
+        return (
+            f"Metadata(status={self.status!r}, url={truncate(self.get('url'))!r}, "
+            f"title={truncate(self.get_title(), 80)!r}, metadata=<{len(self.metadata)} keys>, "
+            f"media=<{len(self.media)} items>)"
+        )
 
     @staticmethod
     def choose_most_complete(results: List[Metadata]) -> Metadata:
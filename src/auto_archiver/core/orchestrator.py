@@ -13,6 +13,7 @@ import sys
 from tempfile import TemporaryDirectory
 import traceback
 from copy import copy
+from itertools import islice
 
 from rich_argparse import RichHelpFormatter
 from auto_archiver.utils.custom_logger import format_for_human_readable_console, logger
@@ -61,6 +62,8 @@ class ArchivingOrchestrator:
         self.module_factory = ModuleFactory()
         self.setup_finished = False
         self.logger_id = None
+        self.flush_spool_only = False
+        self.prefetch_size = 0
 
     def setup_basic_parser(self):
         parser = argparse.ArgumentParser(
@@ -100,6 +103,19 @@ class ArchivingOrchestrator:
             help="Store the created config in the config file",
             action=argparse.BooleanOptionalAction,
         )
+        parser.add_argument(
+            "--flush-spool",
+            dest="flush_spool",
+            action="store_true",
+            help="upload what is pending in the storages' spool (see 'spool_dir'), without archiving anything, and exit",
+        )
+        parser.add_argument(
+            "--prefetch",
+            dest="prefetch",
+            type=int,
+            default=0,
+            help="read this many URLs ahead from the feeders, so databases can look them up in one go (eg: api_db). Ignored for feeders that record their progress as URLs are read (eg: csv_feeder's checkpoint_file, gsheet_feeder_db's leasing).",
+        )
         parser.add_argument(
             "--module_paths",
             dest="module_paths",
@@ -273,6 +289,13 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
             help="if set, writes each logging level to a separate file (ignores --logging.level), you must also set --logging.file. Each level will have a dedicate logs file matching your <file>.debug, <file>.info, etc.",
             default=False,
         )
+        parser.add_argument(
+            "--logging.enqueue",
+            action=argparse.BooleanOptionalAction,
+            dest="logging.enqueue",
+            help="if set, file logs are written by a background thread so archiving never waits on slow (e.g. network) disk writes",
+            default=False,
+        )
 
     def add_individual_module_args(
         self, modules: list[LazyBaseModule] = None, parser: argparse.ArgumentParser = None
@@ -355,6 +378,7 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
 
             rotation = logging_config["rotation"]
             log_file = logging_config["file"]
+            enqueue = logging_config.get("enqueue", False)
 
             if logging_config.get("each_level_in_separate_file"):
                 assert logging_config["file"], (
@@ -366,9 +390,10 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
                         filter=lambda rec, lvl=level: rec["level"].name == lvl,
                         rotation=rotation,
                         format="{extra[serialized]}",
+                        enqueue=enqueue,
                     )
             elif log_file:
-                logger.add(log_file, rotation=rotation, level=use_level, format="{extra[serialized]}")
+                logger.add(log_file, rotation=rotation, level=use_level, format="{extra[serialized]}", enqueue=enqueue)
 
     def install_modules(self, modules_by_type):
         """
@@ -454,6 +479,8 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
 
         # parse the known arguments for now (basically, we want the config file)
         basic_config, unused_args = self.basic_parser.parse_known_args(args)
+        self.flush_spool_only = basic_config.flush_spool
+        self.prefetch_size = basic_config.prefetch
 
         # setup any custom module paths, so they'll show in the help and for arg parsing
         self.module_factory.setup_paths(basic_config.module_paths)
@@ -514,6 +541,10 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
                 f"{module_type.upper()}S: " + ", ".join(m.display_name for m in getattr(self, f"{module_type}s"))
             )
 
+        # creating the spools starts their workers, which pick up uploads left by a previous run
+        for storage in self.storages:
+            _ = storage.spool
+
         self.setup_finished = True
 
     def _command_line_run(self, args: list) -> Generator[Metadata]:
@@ -530,6 +561,9 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
         """
         try:
             self.setup(args)
+            if self.flush_spool_only:
+                self.flush_storages()
+                return iter(())
             return self.feed()
         except Exception as e:
             logger.error(f"{e}: {traceback.format_exc()}")
@@ -539,11 +573,21 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
         logger.info("Cleaning up")
         for e in self.extractors:
             e.cleanup()
+        for d in self.databases:
+            d.cleanup()
+        self.flush_storages()
+        # wait for any enqueued (background) log sinks to write out
+        logger.complete()
+
+    def flush_storages(self) -> None:
+        # write-behind uploads must finish before exiting, what fails stays spooled for the next run
+        for s in self.storages:
+            s.flush()
 
     def feed(self) -> Generator[Metadata]:
         url_count = 0
         for feeder in self.feeders:
-            for item in feeder:
+            for item in self._read_ahead(feeder):
                 with logger.contextualize(url=item.get_url(), trace=random_str(12)):
                     logger.info("Started processing")
                     yield self.feed_item(item)
@@ -552,6 +596,46 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
         logger.info(f"Processed {url_count} URL(s)")
         self.cleanup()
 
+    def _read_ahead(self, feeder: Feeder) -> Generator[Metadata]:
+        """the items of @feeder, read in batches of prefetch_size which are passed to the databases' prefetch first"""
+        if self.prefetch_size <= 1:
+            yield from feeder
+            return
+        if not feeder.can_read_ahead():
+            logger.info(f"Feeder {feeder.name} can't be read ahead, ignoring --prefetch")
+            yield from feeder
+            return
+        items = iter(feeder)
+        while batch := list(islice(items, self.prefetch_size)):
+            urls = []
+            for item in batch:
+                try:
+                    check_url_or_raise(item.get_url().strip())
+                    # sanitized now, as archive() would, so databases look up the urls that fetch() will ask for
+                    urls.append(self.sanitize(item))
+                except Exception:
+                    # archive() reports it
+                    continue
+            for d in self.databases:
+                try:
+                    d.prefetch(urls)
+                except Exception as e:
+                    logger.error(f"Database {d.name}: {e}: {traceback.format_exc()}")
+            yield from batch
+
+    def sanitize(self, result: Metadata) -> str:
+        """cleans the item's url and lets each extractor sanitize it, keeps the url it had as 'original_url'"""
+        original_url = result.get_url().strip()
+        url = clean(original_url)
+        for a in self.extractors:
+            url = a.sanitize_url(url)
+
+        result.set_url(url)
+        if original_url != url:
+            logger.debug(f"Sanitized URL to {url}")
+            result.set("original_url", original_url)
+        return url
+
     def feed_item(self, item: Metadata) -> Metadata:
         """
         Takes one item (URL) to archive and calls self.archive, additionally:
@@ -605,14 +689,7 @@ Here's how that would look: \n\nsteps:\n  extractors:\n  - [your_extractor_name_
             raise e
 
         # 1 - sanitize - each archiver is responsible for cleaning/expanding its own URLs
-        url = clean(original_url)
-        for a in self.extractors:
-            url = a.sanitize_url(url)
-
-        result.set_url(url)
-        if original_url != url:
-            logger.debug(f"Sanitized URL to {url}")
-            result.set("original_url", original_url)
+        url = self.sanitize(result)
 
         # 2 - notify start to DBs, propagate already archived if feature enabled in DBs
         cached_result = None
@@ -0,0 +1,115 @@
+"""
+Hand-tuned JSON (de)serialization for the Metadata and Media dataclasses.
+
+dataclasses_json reflects over every field, type hint and override on each call, which adds up
+when serializing large items (eg: results sent to the API, the JSON enricher) or when decoding
+several cached results just to pick one. Classes decorated with `json_dataclass` keep everything
+dataclasses_json provides (schema, mixin registration) but get direct `to_dict`/`to_json`/`from_dict`/
+`from_json` implementations that walk the known field layout instead.
+
+The output is identical to dataclasses_json's: same keys and key order, datetimes encoded as
+timestamps by the same JSON encoder, and any value type not handled here falls back to the
+dataclasses_json encoder.
+"""
+
+from __future__ import annotations
+import datetime
+import json
+from dataclasses import fields, MISSING
+from typing import Any, Callable
+
+from dataclasses_json import dataclass_json
+from dataclasses_json.core import _asdict, _encode_json_type, _ExtendedEncoder
+
+# immutable leaf values, dataclasses_json deep-copies these but sharing them is equivalent
+_SHARED_TYPES = frozenset((str, int, float, bool, type(None), datetime.datetime))
+
+# classes decorated with json_dataclass, encoded via their own to_dict
+_FAST_CLASSES = set()
+
+
+def encode_value(obj: Any) -> Any:
+    """Recursively converts a value to its dataclasses_json to_dict representation."""
+    t = type(obj)
+    if t in _SHARED_TYPES:
+        return obj
+    if t is dict:
+        return {encode_value(k): encode_value(v) for k, v in obj.items()}
+    if t is list or t is tuple:
+        return [encode_value(v) for v in obj]
+    if t in _FAST_CLASSES:
+        return obj.to_dict()
+    return _asdict(obj)
+
+
+def json_dataclass(
+    encoders: dict[str, Callable[[Any], Any]] = None,
+    decoders: dict[str, Callable[[Any], Any]] = None,
+):
+    """
+    Class decorator replacing `dataclass_json`, must be placed above `@dataclass`.
+
+    Field-level `dataclasses_json.config(exclude=...)` settings are respected.
+
+    :param encoders: per-field functions to encode a value, defaults to `encode_value`
+    :param decoders: per-field functions to decode a value, defaults to returning it as-is
+    """
+    encoders = encoders or {}
+    decoders = decoders or {}
+
+    def wrap(cls):
+        cls = dataclass_json(cls)
+        _FAST_CLASSES.add(cls)
+
+        to_encode = [
+            (f.name, encoders.get(f.name, encode_value), f.metadata.get("dataclasses_json", {}).get("exclude"))
+            for f in fields(cls)
+        ]
+        to_decode = [(f.name, f.default, f.default_factory, decoders.get(f.name)) for f in fields(cls) if f.init]
+
+        def to_dict(self, encode_json=False) -> dict:
+            result = {}
+            for name, encode, exclude in to_encode:
+                value = getattr(self, name)
+                if exclude and exclude(value):
+                    continue
+                result[name] = encode(value)
+            if encode_json:
+                result = _encode_json_type(result)
+            return result
+
+        def to_json(self, **kwargs) -> str:
+            return json.dumps(self.to_dict(), cls=_ExtendedEncoder, **kwargs)
+
+        def from_dict(cls, kvs: dict, *, infer_missing=False):
+            if isinstance(kvs, cls):
+                return kvs
+            if kvs is None and infer_missing:
+                kvs = {}
+            init_kwargs = {}
+            for name, default, default_factory, decode in to_decode:
+                if name in kvs:
+                    value = kvs[name]
+                    if value is not None and decode:
+                        value = decode(value)
+                elif default is not MISSING:
+                    value = default
+                elif default_factory is not MISSING:
+                    value = default_factory()
+                elif infer_missing:
+                    value = None
+                else:
+                    raise KeyError(name)
+                init_kwargs[name] = value
+            return cls(**init_kwargs)
+
+        def from_json(cls, s, *, infer_missing=False, **kwargs):
+            return cls.from_dict(json.loads(s, **kwargs), infer_missing=infer_missing)
+
+        cls.to_dict = to_dict
+        cls.to_json = to_json
+        cls.from_dict = classmethod(from_dict)
+        cls.from_json = classmethod(from_json)
+        return cls
+
+    return wrap
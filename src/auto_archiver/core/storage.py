@@ -10,6 +10,8 @@ variables can be set to one of the following values:
 - 'flat': A flat structure with no subfolders
 - 'url': A structure based on the URL of the media object
 - 'random': A random structure
+- 'sharded': Nested subfolders named after the start of the content hash, eg: 'ab/cd/', configurable with
+  'shard_depth' (number of subfolders) and 'shard_width' (characters per subfolder)
 
 The 'filename_generator' variable can be set to one of the following values:
 - 'random': A random string
@@ -17,12 +19,18 @@ The 'filename_generator' variable can be set to one of the following values:
 
 If you don't want to use this naming convention, you can override the `set_key` method in your subclass.
 
+Storages that can batch requests can override `store_many`, which receives all of an item's media at once.
+
+Storages whose urls are known before uploading can return True from `can_spool`, to let users upload in the
+background (write-behind) by setting a 'spool_dir' config, see `storage_spool`.
+
 """
 
 from __future__ import annotations
 from abc import abstractmethod
-from typing import IO
+from typing import IO, List, Optional
 import os
+import threading
 
 from auto_archiver.utils.custom_logger import logger
 from slugify import slugify
@@ -30,6 +38,9 @@ from slugify import slugify
 from auto_archiver.utils.misc import random_str
 
 from auto_archiver.core import Media, BaseModule, Metadata
+from auto_archiver.core.consts import SetupError
+from auto_archiver.core.storage_dispatcher import storage_concurrency
+from auto_archiver.core.storage_spool import StorageSpool
 from auto_archiver.modules.hash_enricher.hash_enricher import HashEnricher
 
 
@@ -40,15 +51,95 @@ class Storage(BaseModule):
     Subclasses must implement the `get_cdn_url` and `uploadf` methods to define their behavior.
     """
 
+    # how many uploads to this storage can run at once (see `storage_dispatcher`), storages that
+    # are safe to use from several threads can raise it, eg: through a config option
+    max_concurrent_uploads: int = 1
+    # how keys are generated, set by the module's config (see above)
+    path_generator: Optional[str] = None
+    filename_generator: Optional[str] = None
+    # used by the 'sharded' path_generator, overridden by the module's config if it has them
+    shard_depth: int = 2
+    shard_width: int = 2
+    # folder for write-behind uploads, overridden by the module's config if it has one
+    spool_dir: Optional[str] = None
+    _spool: Optional[StorageSpool] = None
+    _spool_lock = threading.Lock()
+    _hash_enricher: Optional[HashEnricher] = None
+    _hash_enricher_lock = threading.Lock()
+
+    def setup(self) -> None:
+        """Subclasses that override it must call super().setup()."""
+        if self.path_generator == "sharded" or self.filename_generator == "static":
+            # loaded now rather than by the first uploads, which may run in several threads at once
+            _ = self.hash_enricher
+        if self.path_generator == "sharded":
+            # a bad shard_depth/shard_width would otherwise only fail when storing the first file
+            digest_length = len(self.hash_enricher.calculate_hash(os.devnull))
+            try:
+                shard_path("0" * digest_length, self.shard_depth, self.shard_width)
+            except ValueError as e:
+                raise SetupError(f"{self.name}: {e}, check shard_depth and shard_width") from e
+
     def store(self, media: Media, url: str, metadata: Metadata = None) -> None:
         if media.is_stored(in_storage=self):
             logger.debug(f"{media.key} already stored, skipping")
             return
 
         self.set_key(media, url, metadata)
-        self.upload(media, metadata=metadata)
+        if self.spool is not None:
+            # uploaded in the background, the url doesn't depend on the upload
+            self.spool.enqueue(media)
+        else:
+            self.upload(media, metadata=metadata)
         media.add_url(self.get_cdn_url(media))
 
+    def store_many(self, media_list: List[Media], url: str, metadata: Metadata = None) -> None:
+        """
+        Stores all of an item's media (including inner media) at once, by default one by one with `store`.
+
+        Storages can override it to batch requests, eg: look up what already exists once per item.
+        """
+        for media in media_list:
+            self.store(media, url, metadata=metadata)
+
+    def can_spool(self) -> bool:
+        """
+        Whether uploads can happen after `store` returns: the key and url must not change while uploading
+        and the upload must only need the file, its key and mimetype/hash (not the item's metadata).
+        """
+        return False
+
+    @property
+    def hash_enricher(self) -> HashEnricher:
+        """The 'hash_enricher' module, whose settings are used for content hashes. Loaded once."""
+        if self._hash_enricher is None:
+            # module loading isn't thread-safe, and set_key can run in several upload threads
+            with self._hash_enricher_lock:
+                if self._hash_enricher is None:
+                    self._hash_enricher = self.module_factory.get_module("hash_enricher", self.config)
+        return self._hash_enricher
+
+    @property
+    def spool(self) -> Optional[StorageSpool]:
+        """The write-behind upload queue, when 'spool_dir' is set and the storage supports it."""
+        if self._spool is None and self.spool_dir and self.can_spool():
+            with self._spool_lock:
+                if self._spool is None:
+                    self._spool = StorageSpool(
+                        self, os.path.join(self.spool_dir, self.name), workers=storage_concurrency(self)
+                    )
+        return self._spool
+
+    def flush(self) -> int:
+        """Uploads what is pending in the spool, returns how many uploads failed and remain queued."""
+        if self.spool is None:
+            return 0
+        if remaining := self.spool.flush():
+            logger.bind(spool_depth=remaining).warning(
+                f"[{self.name}] {remaining} upload(s) failed and remain in {self.spool.folder}, they will be retried on the next run"
+            )
+        return remaining
+
     @abstractmethod
     def get_cdn_url(self, media: Media) -> str:
         """
@@ -86,6 +177,10 @@ class Storage(BaseModule):
 
         folder = metadata.get_context("folder", "")
         filename, ext = os.path.splitext(media.filename)
+        # content hash, calculated at most once
+        hd = None
+        if self.path_generator == "sharded" or self.filename_generator == "static":
+            hd = self.get_content_hash(media)
 
         # Handle path_generator logic
         path_generator = self.path_generator
@@ -95,6 +190,8 @@ class Storage(BaseModule):
             path = slugify(url)[:70]
         elif path_generator == "random":
             path = random_str(24)
+        elif path_generator == "sharded":
+            path = shard_path(hd, self.shard_depth, self.shard_width)
         else:
             raise ValueError(f"Invalid path_generator: {path_generator}")
 
@@ -103,12 +200,27 @@ class Storage(BaseModule):
         if filename_generator == "random":
             filename = random_str(24)
         elif filename_generator == "static":
-            # load the hash_enricher module
-            he: HashEnricher = self.module_factory.get_module("hash_enricher", self.config)
-            hd = he.calculate_hash(media.filename)
             filename = hd[:24]
         else:
             raise ValueError(f"Invalid filename_generator: {filename_generator}")
 
         key = os.path.join(folder, path, f"{filename}{ext}")
         media._key = key
+
+    def get_content_hash(self, media: Media) -> str:
+        """
+        Returns the hex digest of the media's content, with the settings of the 'hash_enricher' module.
+        Reuses the hash calculated by the hash_enricher when it used the same algorithm.
+        """
+        he = self.hash_enricher
+        algorithm, _, hd = (media.get("hash") or "").partition(":")
+        if algorithm == he.algorithm and hd:
+            return hd
+        return he.calculate_hash(media.filename)
+
+
+def shard_path(hd: str, depth: int, width: int) -> str:
+    """Splits the start of the hex digest @hd into @depth folders of @width characters, eg: 'ab/cd'."""
+    if depth < 1 or width < 1 or depth * width > len(hd or ""):
+        raise ValueError(f"Cannot shard a {len(hd or '')} character hash into {depth} folders of {width} characters")
+    return os.path.join(*(hd[i * width : (i + 1) * width] for i in range(depth)))
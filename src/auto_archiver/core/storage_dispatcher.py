@@ -0,0 +1,88 @@
+"""
+Fans out media uploads across the configured storages concurrently.
+
+Each media (including inner media such as thumbnails) is stored into every storage in the
+configured order, exactly like a sequential loop would: the first storage sets the key that
+the others reuse (and may rewrite it, eg: S3 `random_no_duplicate`), and the urls are appended
+in storage order. Different media are independent of each other though, so their chains run
+in parallel, with each storage limiting how many of its uploads happen at once through its
+`max_concurrent_uploads` setting.
+
+Storages that override `Storage.store_many` (eg: to batch requests) get all the media at once instead,
+after the storages before them have stored every media.
+"""
+
+from __future__ import annotations
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, List
+
+if TYPE_CHECKING:
+    from .media import Media
+    from .metadata import Metadata
+    from .storage import Storage
+
+
+def storage_concurrency(storage: Storage) -> int:
+    # storages that don't declare it are assumed not to be thread-safe
+    cap = getattr(storage, "max_concurrent_uploads", 1)
+    return cap if isinstance(cap, int) and cap > 1 else 1
+
+
+def batches_uploads(storage: Storage) -> bool:
+    from .storage import Storage
+
+    # looked up on the class, so mocks of storages aren't mistaken for overrides
+    return getattr(type(storage), "store_many", Storage.store_many) is not Storage.store_many
+
+
+def store_media(media: Iterable[Media], url: str, metadata: Metadata, storages: List[Storage]) -> None:
+    """
+    Stores each of @media and their inner media into all @storages.
+
+    Raises the first error (in storage, then media order) once all uploads have finished.
+    """
+    # the same Media object can be referenced more than once, only store it once
+    to_store = list({id(m): m for top in media for m in top.all_inner_media(include_self=True)}.values())
+
+    # runs of per-media storages are chained concurrently, storing in bulk splits them up
+    errors, chain = [], []
+    for s in [*storages, None]:
+        if s is not None and not batches_uploads(s):
+            chain.append(s)
+            continue
+        try:
+            if chain:
+                store_chained(to_store, url, metadata, chain)
+            if s is not None:
+                s.store_many(to_store, url, metadata=metadata)
+        except Exception as e:
+            errors.append(e)
+        chain = []
+    if errors:
+        raise errors[0]
+
+
+def store_chained(to_store: List[Media], url: str, metadata: Metadata, storages: List[Storage]) -> None:
+    caps = [storage_concurrency(s) for s in storages]
+    max_workers = min(len(to_store), sum(caps))
+
+    if max_workers <= 1:
+        for m in to_store:
+            for s in storages:
+                s.store(m, url, metadata=metadata)
+        return
+
+    limits = [threading.BoundedSemaphore(cap) for cap in caps]
+
+    def store_in_order(m: Media) -> None:
+        for s, limit in zip(storages, limits):
+            with limit:
+                s.store(m, url, metadata=metadata)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage") as pool:
+        # each task gets a copy of the current context so logs keep the item's url/trace
+        futures = [pool.submit(contextvars.copy_context().run, store_in_order, m) for m in to_store]
+    for future in futures:
+        future.result()
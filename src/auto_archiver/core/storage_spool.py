@@ -0,0 +1,148 @@
+"""
+Write-behind uploads for storages: `Storage.store` saves the file to a local spool and returns the
+media's (deterministic) url right away, while background threads upload the spooled files.
+
+Pending uploads are kept in a SQLite database next to the spooled files, so uploads that fail are
+retried with an increasing delay and uploads left over by an interrupted run are picked up again by
+the next one. Use `flush` to upload everything that is pending, eg: before exiting.
+"""
+
+from __future__ import annotations
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Collection, Optional, Tuple
+
+from auto_archiver.utils.custom_logger import logger
+from auto_archiver.utils.misc import random_str
+
+from .media import Media
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+# id, key, filename, mimetype, hash, attempts
+Job = Tuple[int, str, str, Optional[str], Optional[str], int]
+
+
+class StorageSpool:
+    # delay before retrying a failed upload, doubled after each failure up to max_retry_delay (seconds)
+    retry_delay: float = 5
+    max_retry_delay: float = 600
+
+    def __init__(self, storage: Storage, folder: str, workers: int = 1):
+        os.makedirs(folder, exist_ok=True)
+        self.storage = storage
+        self.folder = folder
+        # guards the database and in_progress, and wakes workers up when there's something to do
+        self.cond = threading.Condition()
+        self.in_progress: set[int] = set()
+        self.db = sqlite3.connect(os.path.join(folder, "spool.db"), check_same_thread=False)
+        with self.cond, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, key TEXT NOT NULL, filename TEXT NOT NULL, mimetype TEXT, hash TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL DEFAULT 0, last_error TEXT)"
+            )
+        if pending := len(self):
+            logger.bind(spool_depth=pending).info(f"[{storage.name}] resuming {pending} spooled upload(s)")
+        self.workers = [
+            threading.Thread(target=self._work, name=f"spool-{storage.name}-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def enqueue(self, media: Media) -> None:
+        """Copies the file of @media (which must have its key set) to the spool and queues its upload."""
+        _, ext = os.path.splitext(media.filename)
+        spooled = os.path.join(self.folder, f"{random_str(24)}{ext}")
+        try:
+            # the original is in the item's temporary folder, which is removed before the upload happens
+            os.link(media.filename, spooled)
+        except OSError:
+            shutil.copy2(media.filename, spooled)
+        with self.cond:
+            with self.db:
+                self.db.execute(
+                    "INSERT INTO jobs (key, filename, mimetype, hash) VALUES (?, ?, ?, ?)",
+                    (media.key, spooled, media._mimetype, media.get("hash")),
+                )
+            self.cond.notify()
+        logger.bind(spool_depth=len(self)).debug(f"[{self.storage.name}] spooled {media.key}")
+
+    def flush(self) -> int:
+        """
+        Tries every pending upload once, including those still waiting to be retried, and waits for
+        uploads already running. Returns how many uploads are still pending (ie: failed again).
+        """
+        attempted = set()
+        while (job := self._claim(ignore_delay=True, exclude=attempted)) is not None:
+            attempted.add(job[0])
+            self._upload(job)
+        with self.cond:
+            self.cond.wait_for(lambda: not self.in_progress)
+        return len(self)
+
+    def __len__(self) -> int:
+        with self.cond:
+            return self.db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def _work(self) -> None:
+        while True:
+            with self.cond:
+                # claims and waits under the same lock, so an enqueue can't slip in between
+                if (job := self._claim()) is None:
+                    self.cond.wait(timeout=self._next_attempt_in())
+                    continue
+            self._upload(job)
+
+    def _claim(self, ignore_delay: bool = False, exclude: Collection[int] = ()) -> Optional[Job]:
+        with self.cond:
+            skip = [*self.in_progress, *exclude]
+            job = self.db.execute(
+                "SELECT id, key, filename, mimetype, hash, attempts FROM jobs "
+                f"WHERE (? OR next_attempt <= ?) AND id NOT IN ({','.join('?' * len(skip))}) "
+                "ORDER BY next_attempt, id LIMIT 1",
+                (ignore_delay, time.time(), *skip),
+            ).fetchone()
+            if job is not None:
+                self.in_progress.add(job[0])
+            return job
+
+    def _next_attempt_in(self) -> Optional[float]:
+        # called with the lock held, None waits until something is enqueued (or an upload finishes)
+        row = self.db.execute(
+            f"SELECT MIN(next_attempt) FROM jobs WHERE id NOT IN ({','.join('?' * len(self.in_progress))})",
+            tuple(self.in_progress),
+        ).fetchone()
+        return None if row[0] is None else max(row[0] - time.time(), 0.1)
+
+    def _upload(self, job: Job) -> None:
+        job_id, key, filename, mimetype, hd, attempts = job
+        media = Media(filename=filename, _key=key, _mimetype=mimetype, properties={"hash": hd} if hd else {})
+        try:
+            self.storage.upload(media)
+        except Exception as e:
+            delay = min(self.retry_delay * 2**attempts, self.max_retry_delay)
+            with self.cond, self.db:
+                self.db.execute(
+                    "UPDATE jobs SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                    (attempts + 1, time.time() + delay, str(e), job_id),
+                )
+            logger.bind(spool_depth=len(self)).warning(
+                f"[{self.storage.name}] spooled upload of {key} failed ({attempts + 1} attempts), retrying in {delay:.0f}s: {e}"
+            )
+        else:
+            with self.cond, self.db:
+                self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            try:
+                os.remove(filename)
+            except OSError as e:
+                logger.warning(f"[{self.storage.name}] unable to remove spooled file {filename}: {e}")
+            logger.bind(spool_depth=len(self)).debug(f"[{self.storage.name}] uploaded spooled {key}")
+        finally:
+            with self.cond:
+                self.in_progress.discard(job_id)
+                self.cond.notify_all()
@@ -27,6 +27,30 @@
             "type": "bool",
             "help": "if True then the API database will be queried prior to any archiving operations and stop if the link has already been archived",
         },
+        "search_limit": {
+            "default": 15,
+            "type": "int",
+            "help": "how many previous archives of a URL to ask the API for, the most complete one is used",
+        },
+        "cache_size": {
+            "default": 10000,
+            "type": "int",
+            "help": "how many URLs to keep the API search result of in memory, the least recently used are dropped first. Only the most complete archive of each URL is kept, so memory use is about cache_size times the size of one archive's JSON (usually a few KB, more for items with many media). 0 disables the cache.",
+        },
+        "cache_ttl": {
+            "default": 3600,
+            "type": "int",
+            "help": "seconds to keep the search results of a URL that was archived before",
+        },
+        "negative_cache_ttl": {
+            "default": 300,
+            "type": "int",
+            "help": "seconds to remember that a URL was not archived before",
+        },
+        "bulk_search_endpoint": {
+            "default": "url/batch-search",
+            "help": "API path to look up many URLs at once when the auto-archiver reads URLs ahead (see --prefetch). It receives {'urls': [...], 'limit': n} and returns the search results of each URL by URL. If the server doesn't have it, URLs are looked up one by one. Set to empty to disable.",
+        },
         "store_results": {
             "default": True,
             "type": "bool",
@@ -46,6 +70,7 @@
 - **Configurable**: Supports settings like API endpoint, authentication token, tags, and permissions.
 - **Tagging and Metadata**: Adds tags and manages metadata for archives.
 - **Optional Storage**: Archives results conditionally based on configuration.
+- **Caching**: Reuses one connection to the API, keeps recent search results in memory and can look up many URLs at once.
 
 ### Setup
 Requires access to an Auto Archiver API instance and a valid API token.
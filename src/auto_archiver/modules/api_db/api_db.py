@@ -1,16 +1,58 @@
-from typing import Union
+from collections import OrderedDict
+from typing import List, Union
 
 import os
+import time
 import requests
 from auto_archiver.utils.custom_logger import logger
 
 from auto_archiver.core import Database
 from auto_archiver.core import Metadata
 
+# status codes of a server without the bulk lookup endpoint
+NO_BULK_ENDPOINT = (404, 405, 501)
+
+
+class ResultCache:
+    """Keeps up to @max_size entries, evicting the least recently used ones, each for its own time to live."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str, default=None):
+        if (entry := self.entries.get(key)) is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value, ttl: float) -> None:
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self.entries.pop(key, None)
+
 
 class AAApiDb(Database):
     """Connects to auto-archiver-api instance"""
 
+    def setup(self) -> None:
+        # one keep-alive connection pool for all calls to the API
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {self.api_token}"})
+        # the most complete search result of each url, False if it was never archived
+        self.cache = ResultCache(self.cache_size)
+        self.bulk_supported = bool(self.bulk_search_endpoint)
+
     def fetch(self, item: Metadata) -> Union[Metadata, bool]:
         """query the database for the existence of this item.
         Helps avoid re-archiving the same URL multiple times.
@@ -18,19 +60,56 @@ class AAApiDb(Database):
         if not self.use_api_cache:
             return
 
-        params = {"url": item.get_url(), "limit": 15}
-        headers = {"Authorization": f"Bearer {self.api_token}", "accept": "application/json"}
-        response = requests.get(os.path.join(self.api_endpoint, "url/search"), params=params, headers=headers)
-
-        if response.status_code == 200:
-            if len(response.json()):
-                logger.success(f"API returned {len(response.json())} previously archived instance(s)")
-                fetched_metadata = [Metadata.from_dict(r["result"]) for r in response.json()]
-                return Metadata.choose_most_complete(fetched_metadata)
+        url = item.get_url()
+        if (result := self.cache.get(url)) is None:
+            params = {"url": url, "limit": self.search_limit}
+            response = self.session.get(
+                os.path.join(self.api_endpoint, "url/search"), params=params, headers={"accept": "application/json"}
+            )
+            if response.status_code != 200:
+                logger.error(f"AA API FAIL ({response.status_code}): {response.json()}")
+                return False
+            results = response.json()
+            if len(results):
+                logger.success(f"API returned {len(results)} previously archived instance(s)")
+            result = self._cache_results(url, results)
         else:
-            logger.error(f"AA API FAIL ({response.status_code}): {response.json()}")
+            logger.debug(f"AA API result for {url} found in the local cache")
+
+        if result:
+            return Metadata.from_dict(result)
         return False
 
+    def prefetch(self, urls: List[str]) -> None:
+        """looks up all @urls not cached yet with a single call to the bulk search endpoint, if the server has it"""
+        if not self.use_api_cache or not self.bulk_supported:
+            return
+        missing = [url for url in dict.fromkeys(urls) if self.cache.get(url) is None]
+        if not missing:
+            return
+        try:
+            response = self.session.post(
+                os.path.join(self.api_endpoint, self.bulk_search_endpoint),
+                json={"urls": missing, "limit": self.search_limit},
+                headers={"accept": "application/json"},
+            )
+        except requests.RequestException as e:
+            logger.warning(f"AA API bulk search failed, URLs will be looked up one by one: {e}")
+            return
+        if response.status_code in NO_BULK_ENDPOINT:
+            logger.info(
+                f"AA API has no bulk search endpoint ({response.status_code}), URLs will be looked up one by one"
+            )
+            self.bulk_supported = False
+            return
+        if response.status_code != 200:
+            logger.error(f"AA API FAIL ({response.status_code}): {response.text}")
+            return
+        found = response.json()
+        for url in missing:
+            self._cache_results(url, found.get(url, []))
+        logger.debug(f"AA API bulk search: {sum(bool(found.get(url)) for url in missing)}/{len(missing)} URLs found")
+
     def done(self, item: Metadata, cached: bool = False) -> None:
         """archival result ready - should be saved to DB"""
         if not self.store_results:
@@ -48,12 +127,24 @@ class AAApiDb(Database):
             "tags": list(self.tags),
             "result": item.to_json(),
         }
-        headers = {"Authorization": f"Bearer {self.api_token}"}
-        response = requests.post(
-            os.path.join(self.api_endpoint, "interop/submit-archive"), json=payload, headers=headers
-        )
+        response = self.session.post(os.path.join(self.api_endpoint, "interop/submit-archive"), json=payload)
 
         if response.status_code == 201:
             logger.success(f"AA API: {response.json()}")
+            # the url has a new result, which the cached search results don't have
+            self.cache.pop(item.get_url())
         else:
             logger.error(f"AA API FAIL ({response.status_code}): {response.json()}")
+
+    def cleanup(self) -> None:
+        self.session.close()
+
+    def _cache_results(self, url: str, results: list) -> Union[dict, bool]:
+        """Caches and returns only the most complete of the search @results, or False if there are none."""
+        result = False
+        if results:
+            fetched_metadata = [Metadata.from_dict(r["result"]) for r in results]
+            best = Metadata.choose_most_complete(fetched_metadata)
+            result = next(r["result"] for r, m in zip(results, fetched_metadata) if m is best)
+        self.cache.put(url, result, self.cache_ttl if result else self.negative_cache_ttl)
+        return result
@@ -1,6 +1,7 @@
 import hashlib
 import os
-from typing import IO, Iterator, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterator, List, Optional, Set, Union
 
 import requests
 from auto_archiver.utils.custom_logger import logger
@@ -10,14 +11,23 @@ from auto_archiver.utils import calculate_file_hash
 
 
 class AtlosFeederDbStorage(Feeder, Database, Storage):
+    # uploads check the item's existing artifacts first, one at a time so two identical files aren't both sent
+    # (store_many does so for all of an item's media, with a single lookup)
+    max_concurrent_uploads = 1
+
     def setup(self) -> requests.Session:
         """create and return a persistent session."""
+        super().setup()
         self.session = requests.Session()
+        # SHA256 hashes of the artifacts of the items being archived, listed once per item
+        self.artifact_hashes: dict[str, Set[str]] = {}
 
-    def _get(self, endpoint: str, params: Optional[dict] = None) -> dict:
-        """Wrapper for GET requests to the Atlos API."""
+    def _get(self, endpoint: str, params: Optional[dict] = None, session: Optional[requests.Session] = None) -> dict:
+        """Wrapper for GET requests to the Atlos API, through @session if given."""
         url = f"{self.atlos_url}{endpoint}"
-        response = self.session.get(url, headers={"Authorization": f"Bearer {self.api_token}"}, params=params)
+        response = (session or self.session).get(
+            url, headers={"Authorization": f"Bearer {self.api_token}"}, params=params
+        )
         response.raise_for_status()
         return response.json()
 
@@ -44,21 +54,33 @@ class AtlosFeederDbStorage(Feeder, Database, Storage):
 
     def __iter__(self) -> Iterator[Metadata]:
         """Iterate over unprocessed, visible source materials from Atlos."""
-        cursor = None
-        while True:
-            data = self._get("/api/v2/source_material", params={"cursor": cursor})
-            cursor = data.get("next")
-            results = data.get("results", [])
-            for item in results:
-                if (
-                    item.get("source_url") not in [None, ""]
-                    and not item.get("metadata", {}).get("auto_archiver", {}).get("processed", False)
-                    and item.get("visibility") == "visible"
-                    and item.get("status") not in ["processing", "pending"]
-                ):
-                    yield Metadata().set_url(item["source_url"]).set("atlos_id", item["id"])
-            if not results or cursor is None:
-                break
+        # pages are fetched in another thread, with their own session as sessions aren't thread-safe
+        pages_session = requests.Session()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                page = pool.submit(self._get, "/api/v2/source_material", {"cursor": None}, pages_session)
+                while True:
+                    data = page.result()
+                    cursor = data.get("next")
+                    results = data.get("results", [])
+                    if results and cursor is not None:
+                        # the next page is fetched while this page's items are archived
+                        page = pool.submit(self._get, "/api/v2/source_material", {"cursor": cursor}, pages_session)
+                    yield from self._unprocessed(results)
+                    if not results or cursor is None:
+                        break
+        finally:
+            pages_session.close()
+
+    def _unprocessed(self, results: List[dict]) -> Iterator[Metadata]:
+        for item in results:
+            if (
+                item.get("source_url") not in [None, ""]
+                and not item.get("metadata", {}).get("auto_archiver", {}).get("processed", False)
+                and item.get("visibility") == "visible"
+                and item.get("status") not in ["processing", "pending"]
+            ):
+                yield Metadata().set_url(item["source_url"]).set("atlos_id", item["id"])
 
     # ! Atlos Module - Database Methods
 
@@ -68,12 +90,16 @@ class AtlosFeederDbStorage(Feeder, Database, Storage):
         if not atlos_id:
             logger.info("No Atlos ID available, skipping")
             return
+        self.artifact_hashes.pop(atlos_id, None)
         self._post(
             f"/api/v2/source_material/metadata/{atlos_id}/auto_archiver",
             json={"metadata": {"processed": True, "status": "error", "error": reason}},
         )
         logger.info(f"Stored failure ID {atlos_id} on Atlos: {reason}")
 
+    def aborted(self, item: Metadata) -> None:
+        self.artifact_hashes.pop(item.metadata.get("atlos_id"), None)
+
     def fetch(self, item: Metadata) -> Union[Metadata, bool]:
         """check and fetch if the given item has been archived already, each
         database should handle its own caching, and configuration mechanisms"""
@@ -90,6 +116,8 @@ class AtlosFeederDbStorage(Feeder, Database, Storage):
         if not atlos_id:
             logger.info("Item has no Atlos ID, skipping")
             return
+        # the item's media are all stored by now
+        self.artifact_hashes.pop(atlos_id, None)
         self._post(
             f"/api/v2/source_material/metadata/{atlos_id}/auto_archiver",
             json={
@@ -119,12 +147,47 @@ class AtlosFeederDbStorage(Feeder, Database, Storage):
             logger.error(f"No Atlos ID found in metadata; can't store {media.filename} in Atlos.")
             return False
 
-        media_hash = calculate_file_hash(media.filename, hash_algo=hashlib.sha256, chunksize=4096)
+        return self._upload_to(atlos_id, media, self._artifact_hashes(atlos_id))
 
-        # Check whether the media has already been uploaded
-        source_material = self._get(f"/api/v2/source_material/{atlos_id}")["result"]
-        existing_media = [artifact.get("file_hash_sha256") for artifact in source_material.get("artifacts", [])]
-        if media_hash in existing_media:
+    def store_many(self, media_list: List[Media], url: str, metadata: Optional[Metadata] = None) -> None:
+        """Stores all of an item's media, listing the artifacts already on Atlos once rather than per file."""
+        atlos_id = metadata.get("atlos_id") if metadata is not None else None
+        if not atlos_id:
+            # upload() logs why each file can't be stored
+            return super().store_many(media_list, url, metadata=metadata)
+
+        existing = self._artifact_hashes(atlos_id)
+        for media in media_list:
+            if media.is_stored(in_storage=self):
+                logger.debug(f"{media.key} already stored, skipping")
+                continue
+            self.set_key(media, url, metadata)
+            self._upload_to(atlos_id, media, existing)
+            media.add_url(self.get_cdn_url(media))
+
+    def _artifact_hashes(self, atlos_id: str) -> Set[str]:
+        """
+        Returns the SHA256 hashes of the artifacts already uploaded to the source material, listed on the first call
+        for an item and kept up to date by _upload_to, so the item's later uploads (eg: the formatter's) reuse them.
+        """
+        if atlos_id not in self.artifact_hashes:
+            source_material = self._get(f"/api/v2/source_material/{atlos_id}")["result"]
+            self.artifact_hashes[atlos_id] = {
+                artifact.get("file_hash_sha256") for artifact in source_material.get("artifacts", [])
+            }
+        return self.artifact_hashes[atlos_id]
+
+    def _sha256(self, media: Media) -> str:
+        """the SHA256 of the media's file, reusing the one from the hash_enricher if it calculated it"""
+        algorithm, _, digest = (media.get("hash") or "").partition(":")
+        if algorithm == "SHA-256" and digest:
+            return digest
+        return calculate_file_hash(media.filename, hash_algo=hashlib.sha256)
+
+    def _upload_to(self, atlos_id: str, media: Media, existing: Set[str]) -> bool:
+        """Uploads the media unless its hash is in @existing, which is updated with it."""
+        media_hash = self._sha256(media)
+        if media_hash in existing:
             logger.info(f"{media.filename} with SHA256 {media_hash} already uploaded to Atlos")
             return True
 
@@ -135,6 +198,7 @@ class AtlosFeederDbStorage(Feeder, Database, Storage):
                 params={"title": media.properties},
                 files={"file": (os.path.basename(media.filename), file_obj)},
             )
+        existing.add(media_hash)
         logger.info(f"Uploaded {media.filename} to Atlos with ID {atlos_id} and title {media.key}")
         return True
 
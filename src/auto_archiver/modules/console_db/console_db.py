@@ -10,14 +10,14 @@ class ConsoleDb(Database):
     """
 
     def started(self, item: Metadata) -> None:
-        logger.info(f"STARTED {item}")
+        logger.info("STARTED {}", item)
 
     def failed(self, item: Metadata, reason: str) -> None:
-        logger.error(f"FAILED {item}: {reason}")
+        logger.error("FAILED {}: {}", item, reason)
 
     def aborted(self, item: Metadata) -> None:
-        logger.warning(f"ABORTED {item}")
+        logger.warning("ABORTED {}", item)
 
     def done(self, item: Metadata, cached: bool = False) -> None:
         """archival result ready - should be saved to DB"""
-        logger.success(f"DONE {item}")
+        logger.success("DONE {}", item)
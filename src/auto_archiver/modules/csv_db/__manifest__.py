@@ -6,6 +6,24 @@
     "entry_point": "csv_db::CSVDb",
     "configs": {
         "csv_file": {"default": "db.csv", "help": "CSV file name to save metadata to"},
+        "fields": {
+            "default": [],
+            "help": "the columns to write, one per metadata key (eg: url, title, timestamp, hash) or 'status', 'media_count', 'media_urls'. Lists and dicts are written as JSON. Leave empty to write the 'status', 'metadata' and 'media' columns with the full metadata and media of each item.",
+        },
+        "sync_interval": {
+            "default": 5,
+            "type": "int",
+            "help": "rows are kept in memory and written to disk at most every this many seconds, and when archiving ends. 0 writes each row straight away.",
+        },
+        "parquet_dir": {
+            "default": None,
+            "help": "folder where to also save the results as Parquet files (one per run, read the folder as a single dataset), for analysing large volumes. Needs 'fields' and `pip install pyarrow`. Disabled if not set.",
+        },
+        "parquet_batch_size": {
+            "default": 1000,
+            "type": "int",
+            "help": "number of rows written to the Parquet file at once (a row group).",
+        },
     },
     "description": """
 Handles exporting archival results to a CSV file.
@@ -14,6 +32,8 @@ Handles exporting archival results to a CSV file.
 - Saves archival metadata as rows in a CSV file.
 - Automatically creates the CSV file with a header if it does not exist.
 - Appends new metadata entries to the existing file.
+- Keeps the file open and writes to disk periodically (`sync_interval`) and when archiving ends.
+- Can write selected metadata keys as their own columns (`fields`), and also save them as Parquet files (`parquet_dir`).
 
 ### Setup
 Required config:
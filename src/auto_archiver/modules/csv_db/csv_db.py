@@ -1,23 +1,123 @@
+import csv
+import json
 import os
-from auto_archiver.utils.custom_logger import logger
-from csv import DictWriter
+import time
 from dataclasses import asdict
+from datetime import datetime
+from typing import IO, Optional
+
+from auto_archiver.utils.custom_logger import logger
+from auto_archiver.utils.misc import random_str
 
 from auto_archiver.core import Database
 from auto_archiver.core import Metadata
+from auto_archiver.core.consts import SetupError
+
+# the columns written when no 'fields' are configured
+LEGACY_FIELDS = ["status", "metadata", "media"]
 
 
 class CSVDb(Database):
     """
-    Outputs results to a CSV file
+    Outputs results to a CSV file, and optionally to Parquet files
     """
 
+    def setup(self) -> None:
+        self.fieldnames = list(self.fields) if self.fields else LEGACY_FIELDS
+        self.csv_out: Optional[IO[str]] = None
+        self.writer: Optional[csv.DictWriter] = None
+        self.last_sync = time.monotonic()
+        self.parquet_rows: list = []
+        self.parquet_writer = None
+        if self.parquet_dir:
+            if not self.fields:
+                raise SetupError("csv_db: 'parquet_dir' needs the columns to write to be set in 'fields'")
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise SetupError("csv_db: 'parquet_dir' needs pyarrow, install it with `pip install pyarrow`") from e
+
     def done(self, item: Metadata, cached: bool = False) -> None:
         """archival result ready - should be saved to DB"""
-        logger.success(f"DONE {item}")
+        logger.success("DONE {}", item)
+        row = self.to_row(item)
+        self._csv_writer().writerow(row)
+        if self.parquet_dir:
+            self.parquet_rows.append(row)
+            if len(self.parquet_rows) >= self.parquet_batch_size:
+                self._write_parquet()
+        if time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def to_row(self, item: Metadata) -> dict:
+        if not self.fields:
+            # media are dataclasses, their dict form is what gets written
+            return {"status": item.status, "metadata": item.metadata, "media": [asdict(m) for m in item.media]}
+        return {field: self.flatten(item, field) for field in self.fieldnames}
+
+    def flatten(self, item: Metadata, field: str):
+        """the value of a single column: a metadata key, or 'status', 'media_count' or 'media_urls'"""
+        if field == "status":
+            return item.status
+        if field == "media_count":
+            return len(item.media)
+        if field == "media_urls":
+            return "\n".join(url for media in item.get_all_media() for url in media.urls)
+        value = item.get(field)
+        if value is None:
+            return ""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, (dict, list, tuple, set)):
+            return json.dumps(value, ensure_ascii=False, default=str)
+        return value
+
+    def sync(self) -> None:
+        """writes the buffered rows to disk"""
+        if self.csv_out is not None:
+            self.csv_out.flush()
+            os.fsync(self.csv_out.fileno())
+        self.last_sync = time.monotonic()
+
+    def cleanup(self) -> None:
+        self._write_parquet()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+        if self.csv_out is not None:
+            self.sync()
+            self.csv_out.close()
+            self.csv_out, self.writer = None, None
+
+    def _csv_writer(self) -> csv.DictWriter:
+        if self.writer is not None:
+            return self.writer
         is_empty = not os.path.isfile(self.csv_file) or os.path.getsize(self.csv_file) == 0
-        with open(self.csv_file, "a", encoding="utf-8") as outf:
-            writer = DictWriter(outf, fieldnames=asdict(Metadata()))
-            if is_empty:
-                writer.writeheader()
-            writer.writerow(asdict(item))
+        if not is_empty:
+            with open(self.csv_file, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), [])
+            if header != self.fieldnames:
+                logger.warning(
+                    f"The columns of {self.csv_file} ({header}) are not the configured ones ({self.fieldnames}), rows will not match the header"
+                )
+        self.csv_out = open(self.csv_file, "a", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.csv_out, fieldnames=self.fieldnames)
+        if is_empty:
+            self.writer.writeheader()
+        return self.writer
+
+    def _write_parquet(self) -> None:
+        if not self.parquet_rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(field, pa.string()) for field in self.fieldnames])
+        if self.parquet_writer is None:
+            # parquet files can't be appended to, each run writes its own file to the dataset folder
+            os.makedirs(self.parquet_dir, exist_ok=True)
+            filename = os.path.join(self.parquet_dir, f"part-{time.strftime('%Y%m%dT%H%M%S')}-{random_str(8)}.parquet")
+            self.parquet_writer = pq.ParquetWriter(filename, schema)
+        rows = [{k: None if v is None else str(v) for k, v in row.items()} for row in self.parquet_rows]
+        self.parquet_writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+        self.parquet_rows = []
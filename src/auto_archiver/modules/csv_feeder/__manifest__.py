@@ -17,6 +17,29 @@
             "default": None,
             "help": "Column number or name to read the URLs from, 0-indexed",
         },
+        "checkpoint_file": {
+            "default": None,
+            "help": "JSON file where to remember how far each input file has been read, so a restarted run seeks straight to the first row not yet archived. Rows appended to a file later are read by the next run, delete the file to read everything again. When running several shards use one file per shard. Disabled if not set.",
+        },
+        "shard": {
+            "default": None,
+            "help": "only read the URLs of this shard, as 'i/n' with 0 <= i < n, eg: run 4 auto-archivers with 0/4, 1/4, 2/4 and 3/4 to split the input between them. URLs are assigned to shards by their hash, so repeated URLs go to the same shard.",
+        },
+        "deduplicate": {
+            "default": False,
+            "type": "bool",
+            "help": "skip URLs that already appeared earlier in the input files",
+        },
+        "dedup_capacity": {
+            "default": 1_000_000,
+            "type": "int",
+            "help": "number of unique URLs the de-duplication is sized for, it uses about 1.8MB per million URLs. More URLs still work but the in-memory filter gets less effective and more lookups go to disk.",
+        },
+        "dedup_error_rate": {
+            "default": 0.001,
+            "type": "float",
+            "help": "false positive rate of the in-memory filter used for de-duplication, false positives are checked against a list of seen URLs kept on disk so no URL is wrongly skipped",
+        },
     },
     "description": """
     Reads URLs from CSV files and feeds them into the archiving process.
@@ -25,6 +48,8 @@
     - Supports reading URLs from multiple input files, specified as a comma-separated list.
     - Allows specifying the column number or name to extract URLs from.
     - Skips header rows if the first value is not a valid URL.
+    - Streams the files row by row, and can resume from where a previous run stopped (`checkpoint_file`).
+    - Can split the input between several auto-archivers (`shard`) and skip repeated URLs (`deduplicate`), in constant memory.
 
     ### Setup
     - Input files should be formatted with one URL per line, with or without a header row.
@@ -1,38 +1,146 @@
 from auto_archiver.utils.custom_logger import logger
 import csv
+import json
+import os
+import re
+import zlib
+from typing import BinaryIO, Iterator, Optional
 
 from auto_archiver.core import Feeder
 from auto_archiver.core import Metadata
+from auto_archiver.core.consts import SetupError
 from auto_archiver.utils import url_or_none
 
+from .url_dedup import UrlDeduplicator
+
+SHARD = re.compile(r"^(\d+)/(\d+)$")
+
+
+class OffsetLines:
+    """Iterates over the decoded lines of a binary file, keeping the byte offset of the end of the last line read."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.offset = f.tell()
+
+    def seek(self, offset: int) -> None:
+        self.f.seek(offset)
+        self.offset = offset
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        if self.offset == 0 and line.startswith(b"\xef\xbb\xbf"):
+            line = line[3:]
+            self.offset = 3
+        self.offset += len(line)
+        return line.decode("utf-8")
+
 
 class CSVFeeder(Feeder):
     column = None
 
+    def setup(self) -> None:
+        self.shard_index, self.shard_count = 0, 1
+        if self.shard:
+            match = SHARD.match(str(self.shard))
+            if not match or int(match.group(1)) >= int(match.group(2)):
+                raise SetupError(f"csv_feeder: invalid shard '{self.shard}', use 'i/n' with 0 <= i < n, eg: 0/4")
+            self.shard_index, self.shard_count = int(match.group(1)), int(match.group(2))
+        # byte offset of the first row still to read in each file
+        self.offsets: dict[str, int] = {}
+        if self.checkpoint_file and os.path.isfile(self.checkpoint_file):
+            with open(self.checkpoint_file, "r") as f:
+                self.offsets = json.load(f)
+
+    def can_read_ahead(self) -> bool:
+        # the checkpoint is saved when the next row is asked for
+        return not self.checkpoint_file
+
     def __iter__(self) -> Metadata:
-        for file in self.files:
-            with open(file, "r") as f:
-                reader = csv.reader(f)
-                first_row = next(reader)
-                url_column = self.column or 0
-                if isinstance(url_column, str):
-                    try:
-                        url_column = first_row.index(url_column)
-                    except ValueError:
-                        logger.error(
-                            f"Column {url_column} not found in header row: {first_row}. Did you set the 'column' config correctly?"
-                        )
-                        return
-                elif not (url_or_none(first_row[url_column])):
-                    # it's a header row, but we've been given a column number already
-                    logger.debug(f"Skipping header row: {first_row}")
-                else:
-                    # first row isn't a header row, rewind the file
-                    f.seek(0)
-
-                for row in reader:
-                    if not url_or_none(row[url_column]):
-                        logger.warning(f"Not a valid URL in row: {row}, skipping")
-                        continue
-                    url = row[url_column]
-                    yield Metadata().set_url(url)
+        dedup = UrlDeduplicator(self.dedup_capacity, self.dedup_error_rate) if self.deduplicate else None
+        try:
+            for file in self.files:
+                yield from self._read_file(file, dedup)
+        finally:
+            if dedup is not None:
+                dedup.close()
+
+    def _read_file(self, file: str, dedup: Optional[UrlDeduplicator]) -> Iterator[Metadata]:
+        key = os.path.abspath(file)
+        # read as bytes, so the position of each row is known and a later run can seek straight to it
+        with open(file, "rb") as f:
+            lines = OffsetLines(f)
+            # csv.reader only pulls the lines it needs for each row, so lines.offset is always at a row boundary
+            reader = csv.reader(lines)
+            first_row = next(reader, None)
+            if first_row is None:
+                return
+            url_column = self.column or 0
+            if isinstance(url_column, str):
+                try:
+                    url_column = first_row.index(url_column)
+                except ValueError:
+                    logger.error(
+                        f"Column {url_column} not found in header row: {first_row}. Did you set the 'column' config correctly?"
+                    )
+                    return
+            elif not (url_or_none(first_row[url_column])):
+                # it's a header row, but we've been given a column number already
+                logger.debug(f"Skipping header row: {first_row}")
+            else:
+                # first row isn't a header row, rewind the file
+                lines.seek(0)
+
+            checkpoint = self.offsets.get(key, 0)
+            if checkpoint > os.path.getsize(file):
+                logger.warning(f"{file} is shorter than when it was last read, reading it from the start")
+            elif checkpoint > lines.offset:
+                if dedup is not None:
+                    # the skipped rows still count for de-duplication, go through their urls without yielding them
+                    for url in self._urls(reader, url_column, warn=False):
+                        if lines.offset > checkpoint:
+                            break
+                        dedup.seen(url)
+                lines.seek(checkpoint)
+                logger.info(f"Resuming {file} from byte {checkpoint}")
+
+            for url in self._urls(reader, url_column):
+                if dedup is not None and dedup.seen(url):
+                    logger.debug(f"Skipping duplicate URL {url}")
+                    continue
+                yield Metadata().set_url(url)
+                # the consumer only asks for the next item once this one is archived
+                self._save_offset(key, lines.offset)
+            self._save_offset(key, lines.offset)
+
+    def _urls(self, reader: Iterator[list], url_column: int, warn: bool = True) -> Iterator[str]:
+        """the valid urls of this shard in the rows of @reader"""
+        for row in reader:
+            if not row:
+                continue
+            if not url_or_none(row[url_column]):
+                if warn:
+                    logger.warning(f"Not a valid URL in row: {row}, skipping")
+                continue
+            url = row[url_column]
+            # partition by url rather than by row, so repeated urls always land in the same shard
+            if self.shard_count > 1 and zlib.crc32(url.encode("utf-8")) % self.shard_count != self.shard_index:
+                continue
+            yield url
+
+    def _save_offset(self, key: str, offset: int) -> None:
+        if not self.checkpoint_file or self.offsets.get(key) == offset:
+            return
+        self.offsets[key] = offset
+        if folder := os.path.dirname(self.checkpoint_file):
+            os.makedirs(folder, exist_ok=True)
+        # write then rename, so an interrupted run never leaves a truncated file behind
+        tmp_filename = f"{self.checkpoint_file}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self.offsets, f)
+        os.replace(tmp_filename, self.checkpoint_file)
@@ -0,0 +1,70 @@
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+from typing import Optional
+
+
+class BloomFilter:
+    """
+    A set of strings in a fixed amount of memory, sized for @capacity items with a false positive rate of
+    @error_rate: `in` never misses an added item but may (rarely) report one that wasn't added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        # double hashing, the k positions are derived from two 64 bit hashes
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class UrlDeduplicator:
+    """
+    Remembers the URLs seen so far, in constant memory. A Bloom filter answers for URLs not seen before,
+    which is most of them; the few it reports as seen are checked against an exact list of all URLs kept
+    in a SQLite file on disk, so a false positive never drops a URL. With @exact=False the exact check is
+    skipped and about @error_rate of the unique URLs are wrongly dropped, in exchange for no disk writes.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001, exact: bool = True):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.db: Optional[sqlite3.Connection] = None
+        self.db_file: Optional[str] = None
+        if exact:
+            fd, self.db_file = tempfile.mkstemp(prefix="csv_feeder_urls_", suffix=".db")
+            os.close(fd)
+            self.db = sqlite3.connect(self.db_file)
+            # it's a scratch file, removed on close, no need to survive crashes
+            self.db.execute("PRAGMA journal_mode = OFF")
+            self.db.execute("PRAGMA synchronous = OFF")
+            self.db.execute("CREATE TABLE urls (url TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def seen(self, url: str) -> bool:
+        """Records @url, returns whether it had been recorded before."""
+        if url not in self.bloom:
+            self.bloom.add(url)
+            if self.db is not None:
+                self.db.execute("INSERT OR IGNORE INTO urls VALUES (?)", (url,))
+            return False
+        if self.db is None:
+            return True
+        return self.db.execute("INSERT OR IGNORE INTO urls VALUES (?)", (url,)).rowcount == 0
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            os.remove(self.db_file)
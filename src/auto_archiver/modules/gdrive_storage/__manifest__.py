@@ -14,18 +14,47 @@
     "configs": {
         "path_generator": {
             "default": "url",
-            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory.",
-            "choices": ["flat", "url", "random"],
+            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory; 'sharded' creates nested directories from the start of the file's hash (eg: 'ab/cd/'), to avoid too many files in a single directory.",
+            "choices": ["flat", "url", "random", "sharded"],
         },
         "filename_generator": {
             "default": "static",
             "help": "how to name stored files: 'random' creates a random string; 'static' uses a hash, with the settings of the 'hash_enricher' module (defaults to SHA256 if not enabled).",
             "choices": ["random", "static"],
         },
+        "shard_depth": {
+            "default": 2,
+            "type": "int",
+            "help": "number of nested directories created by the 'sharded' path_generator.",
+        },
+        "shard_width": {
+            "default": 2,
+            "type": "int",
+            "help": "number of hash characters in each directory name of the 'sharded' path_generator, eg: 2 creates up to 256 directories per level.",
+        },
         "root_folder_id": {
             "required": True,
             "help": "root google drive folder ID to use as storage, found in URL: 'https://drive.google.com/drive/folders/FOLDER_ID'",
         },
+        "folder_cache_file": {
+            "default": None,
+            "help": "JSON filename where to keep the ids of the Google Drive folders used, so they don't need to be looked up again in later runs. If not set they are only kept for the current run.",
+        },
+        "max_concurrent_uploads": {
+            "default": 4,
+            "type": "int",
+            "help": "how many files can be uploaded to Google Drive at once, each with its own connection. Set to 1 to upload one file at a time.",
+        },
+        "upload_chunk_size": {
+            "default": 100,
+            "type": "int",
+            "help": "size in MB of each chunk of the resumable uploads, an interrupted upload resumes from the last chunk received.",
+        },
+        "upload_retries": {
+            "default": 5,
+            "type": "int",
+            "help": "how many times an interrupted upload is resumed before giving up on the file.",
+        },
         "oauth_token": {
             "default": None,
             "help": "JSON filename with Google Drive OAuth token: check auto-archiver repository scripts folder for create_update_gdrive_oauth_token.py. NOTE: storage used will count towards owner of GDrive folder, therefore it is best to use oauth_token_filename over service_account.",
@@ -46,6 +75,8 @@
     - Supports OAuth token-based authentication or service account credentials for API access.
     - Automatically creates folders in Google Drive if they don't exist.
     - Retrieves CDN URLs for stored files, enabling easy sharing and access.
+    - Caches folder ids (optionally across runs with `folder_cache_file`) so each upload needs a single API call.
+    - Uploads several files at once (`max_concurrent_uploads`) with resumable uploads that survive interruptions.
 
     ### Notes
     - Requires setup with either a Google OAuth token or a service account JSON file.
@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+from typing import Optional
+
+
+class FolderCache:
+    """
+    Maps folder paths (relative to a root folder) to their Google Drive folder ids.
+
+    Optionally persisted to a JSON file so later runs don't need to look the folders up again.
+    Entries are only removed through `invalidate`, eg: when a cached folder turns out to have been deleted.
+    """
+
+    def __init__(self, root_folder_id: str, filename: Optional[str] = None):
+        self.root_folder_id = root_folder_id
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.all_roots = {}
+        if filename and os.path.isfile(filename):
+            with open(filename, "r") as f:
+                self.all_roots = json.load(f)
+        self.folders: dict = self.all_roots.setdefault(root_folder_id, {})
+
+    def get(self, path: str) -> Optional[str]:
+        with self.lock:
+            return self.folders.get(path)
+
+    def set(self, path: str, folder_id: str) -> None:
+        with self.lock:
+            self.folders[path] = folder_id
+            self._save()
+
+    def invalidate(self, path: str) -> None:
+        """Forgets @path and all of its sub-folders."""
+        with self.lock:
+            for cached in [p for p in self.folders if p == path or p.startswith(path + "/")]:
+                del self.folders[cached]
+            self._save()
+
+    def _save(self) -> None:
+        if not self.filename:
+            return
+        if folder := os.path.dirname(self.filename):
+            os.makedirs(folder, exist_ok=True)
+        # write then rename, so an interrupted run never leaves a truncated cache behind
+        tmp_filename = f"{self.filename}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self.all_roots, f)
+        os.replace(tmp_filename, self.filename)
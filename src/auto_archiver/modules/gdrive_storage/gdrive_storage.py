@@ -1,38 +1,98 @@
+import functools
 import json
 import os
+import threading
 import time
-from typing import IO
+from typing import IO, List
 
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from auto_archiver.utils.custom_logger import logger
 
 from auto_archiver.core import Media
 from auto_archiver.core import Storage
 
+from .folder_cache import FolderCache
+
+MB = 1024 * 1024
+
+
+def with_pooled_service(method):
+    """
+    Lends the calling thread one of the idle services (building one if none is idle) while @method runs,
+    the dispatcher runs each upload in a new thread so services are kept in a pool rather than per thread.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.shared_service is not None or getattr(self.local, "service", None) is not None:
+            # the thread has one already, eg: get_cdn_url called from upload
+            return method(self, *args, **kwargs)
+        with self.lock:
+            service = self.idle_services.pop() if self.idle_services else None
+        self.local.service = service or self._build_service()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            with self.lock:
+                self.idle_services.append(self.local.service)
+            self.local.service = None
+
+    return wrapper
+
 
 class GDriveStorage(Storage):
     def setup(self) -> None:
+        super().setup()
         self.scopes = ["https://www.googleapis.com/auth/drive"]
+        self.folder_cache = FolderCache(self.root_folder_id, self.folder_cache_file)
+        # ids of the files uploaded in this run, by key, until get_cdn_url uses them
+        self.uploaded_ids = {}
+        self.lock = threading.Lock()
+        # held while looking up/creating missing folders, so concurrent uploads don't create the same one twice
+        self.folder_lock = threading.Lock()
+        # googleapiclient services are not thread-safe, each uploading thread borrows its own from this pool,
+        # which holds at most as many as there have been concurrent uploads
+        self.idle_services = []
+        self.local = threading.local()
+        self.shared_service = None
         # Initialize Google Drive service
         self._setup_google_drive_service()
 
+    @property
+    def service(self):
+        if self.shared_service is not None:
+            return self.shared_service
+        if getattr(self.local, "service", None) is None:
+            # used outside upload/get_cdn_url, the thread keeps its own
+            self.local.service = self._build_service()
+        return self.local.service
+
+    def _build_service(self):
+        return build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+
+    @service.setter
+    def service(self, service) -> None:
+        # a service set directly (eg: in tests) is shared by all threads
+        self.shared_service = service
+
     def _setup_google_drive_service(self):
-        """Initialize Google Drive service based on provided credentials."""
+        """Initialize Google Drive credentials, used to create a service for each thread."""
         if self.oauth_token:
             logger.debug(f"Using Google Drive OAuth token: {self.oauth_token}")
-            self.service = self._initialize_with_oauth_token()
+            self.credentials = self._initialize_with_oauth_token()
         elif self.service_account:
             logger.debug(f"Using Google Drive service account: {self.service_account}")
-            self.service = self._initialize_with_service_account()
+            self.credentials = self._initialize_with_service_account()
         else:
             raise ValueError("Missing credentials: either `oauth_token` or `service_account` must be provided.")
 
     def _initialize_with_oauth_token(self):
-        """Initialize Google Drive service with OAuth token."""
+        """Initialize Google Drive credentials with OAuth token."""
         with open(self.oauth_token, "r") as stream:
             creds_json = json.load(stream)
             creds_json["refresh_token"] = creds_json.get("refresh_token", "")
@@ -46,65 +106,114 @@ class GDriveStorage(Storage):
         elif not creds.valid:
             raise ValueError("Invalid OAuth token. Please regenerate the token.")
 
-        return build("drive", "v3", credentials=creds)
+        return creds
 
     def _initialize_with_service_account(self):
-        """Initialize Google Drive service with service account."""
-        creds = service_account.Credentials.from_service_account_file(self.service_account, scopes=self.scopes)
-        return build("drive", "v3", credentials=creds)
+        """Initialize Google Drive credentials with service account."""
+        return service_account.Credentials.from_service_account_file(self.service_account, scopes=self.scopes)
 
+    @with_pooled_service
     def get_cdn_url(self, media: Media) -> str:
         """
         only support files saved in a folder for GD
         S3 supports folder and all stored in the root
         """
-        # full_name = os.path.join(self.folder, media.key)
-        parent_id, folder_id = self.root_folder_id, None
-        path_parts = media.key.split(os.path.sep)
-        filename = path_parts[-1]
-        logger.info(f"Looking for folders for {path_parts[0:-1]} before getting url for {filename=}")
-        for folder in path_parts[0:-1]:
-            folder_id = self._get_id_from_parent_and_name(parent_id, folder, use_mime_type=True, raise_on_missing=True)
-            parent_id = folder_id
-        # get id of file inside folder (or sub folder)
-        file_id = self._get_id_from_parent_and_name(folder_id, filename, raise_on_missing=True)
+        with self.lock:
+            file_id = self.uploaded_ids.pop(media.key, None)
+        if not file_id:
+            # not uploaded in this run, look it up
+            path_parts = media.key.split(os.path.sep)
+            filename = path_parts[-1]
+            logger.info(f"Looking for folders for {path_parts[0:-1]} before getting url for {filename=}")
+            folder_id = self._get_folder_id(path_parts[0:-1], create=False)
+            # get id of file inside folder (or sub folder)
+            file_id = self._get_id_from_parent_and_name(folder_id, filename, raise_on_missing=True)
         if not file_id:
-            #
             logger.info(f"File {filename} not found in folder {folder_id}")
             return None
         return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
 
-    def upload(self, media: Media, **kwargs) -> bool:
-        logger.debug(f"[{self.__class__.__name__}] storing file {media.filename} with key {media.key}")
+    @with_pooled_service
+    def upload(self, media: Media, **kwargs) -> str:
         """
-        1. for each sub-folder in the path check if exists or create
+        1. for each sub-folder in the path check if exists or create (using the folder cache)
         2. upload file to root_id/other_paths.../filename
+        Returns the id of the uploaded file, also used by get_cdn_url.
         """
-        parent_id, upload_to = self.root_folder_id, None
+        logger.debug(f"[{self.__class__.__name__}] storing file {media.filename} with key {media.key}")
         path_parts = media.key.split(os.path.sep)
-        filename = path_parts[-1]
-        logger.info(f"Checking folders {path_parts[0:-1]} exist (or creating) before uploading {filename=}")
-        for folder in path_parts[0:-1]:
-            upload_to = self._get_id_from_parent_and_name(parent_id, folder, use_mime_type=True, raise_on_missing=False)
-            if upload_to is None:
-                upload_to = self._mkdir(folder, parent_id)
-            parent_id = upload_to
-
-        # upload file to gd
-        logger.debug(f"Uploading {filename=} to folder id {upload_to}")
-        file_metadata = {"name": [filename], "parents": [upload_to]}
+        folders, filename = path_parts[0:-1], path_parts[-1]
+        upload_to = None
         try:
-            media = MediaFileUpload(media.filename, resumable=True)
-            gd_file = (
-                self.service.files()
-                .create(supportsAllDrives=True, body=file_metadata, media_body=media, fields="id")
-                .execute()
-            )
-            logger.debug(f"Uploadf: uploaded file {gd_file['id']} successfully in folder={upload_to}")
+            for attempt in range(2):
+                logger.info(f"Checking folders {folders} exist (or creating) before uploading {filename=}")
+                upload_to = self._get_folder_id(folders, create=True)
+                try:
+                    file_id = self._create_file(media.filename, filename, upload_to)
+                    break
+                except HttpError as e:
+                    # the cached folder was deleted in the meantime, forget it and look it up again
+                    if attempt or e.resp.status != 404 or not folders:
+                        raise
+                    logger.warning(f"GD folder {upload_to} no longer exists, refreshing the folder cache for {folders}")
+                    self.folder_cache.invalidate(folders[0])
+            logger.debug(f"Uploadf: uploaded file {file_id} successfully in folder={upload_to}")
         except FileNotFoundError as e:
             logger.error(f"GD uploadf: file not found {media.filename=} - {e}")
+            return None
         except Exception as e:
             logger.error(f"GD uploadf: error uploading {media.filename=} to {upload_to} - {e}")
+            return None
+        with self.lock:
+            self.uploaded_ids[media.key] = file_id
+        return file_id
+
+    def _create_file(self, local_filename: str, name: str, parent_id: str) -> str:
+        file_metadata = {"name": [name], "parents": [parent_id]}
+        media_body = MediaFileUpload(local_filename, chunksize=self.upload_chunk_size * MB, resumable=True)
+        request = self.service.files().create(
+            supportsAllDrives=True, body=file_metadata, media_body=media_body, fields="id"
+        )
+        response, failures = None, 0
+        while response is None:
+            try:
+                status, response = request.next_chunk(num_retries=2)
+                if status:
+                    logger.debug(f"Uploaded {int(status.progress() * 100)}% of {local_filename}")
+            except (HttpError, OSError) as e:
+                # errors such as a missing parent folder won't go away by retrying
+                if isinstance(e, HttpError) and e.resp.status < 500 and e.resp.status != 429:
+                    raise
+                failures += 1
+                if failures > self.upload_retries:
+                    raise
+                # the request keeps the upload session, the next call asks Drive what it received and resumes from there
+                logger.warning(
+                    f"GD upload of {local_filename} interrupted ({e}), resuming ({failures}/{self.upload_retries})"
+                )
+                time.sleep(2**failures)
+        return response["id"]
+
+    def _get_folder_id(self, folders: List[str], create: bool) -> str:
+        """
+        Returns the id of the folder at the @folders path inside the root folder, using the folder cache.
+        Missing folders are created if @create, otherwise a ValueError is raised.
+        """
+        parent_id = self.root_folder_id
+        for depth, folder in enumerate(folders, start=1):
+            path = "/".join(folders[:depth])
+            if not (folder_id := self.folder_cache.get(path)):
+                with self.folder_lock:
+                    # another upload may have created it while waiting
+                    if not (folder_id := self.folder_cache.get(path)):
+                        folder_id = self._get_id_from_parent_and_name(
+                            parent_id, folder, use_mime_type=True, raise_on_missing=not create
+                        )
+                        if folder_id is None:
+                            folder_id = self._mkdir(folder, parent_id)
+                        self.folder_cache.set(path, folder_id)
+            parent_id = folder_id
+        return parent_id
 
     # must be implemented even if unused
     def uploadf(self, file: IO[bytes], key: str, **kwargs: dict) -> bool:
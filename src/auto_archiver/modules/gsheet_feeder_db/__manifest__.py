@@ -46,6 +46,73 @@
             "default": set(),
             "help": "A list of worksheet names for worksheets that should be explicitly blocked from being processed",
         },
+        "lazy_loading": {
+            "default": False,
+            "type": "bool",
+            "help": "only load the url and status columns of each worksheet to find the rows to archive, and the other columns of a row when it is archived. Saves downloading large sheets, at the cost of one read per archived row.",
+        },
+        "resume_state_file": {
+            "default": None,
+            "help": "JSON file where to remember the first row still to archive in each worksheet, so later runs start from it rather than from the top. Rows before it whose status is cleared are not archived again, delete the file to check all rows again. Disabled if not set.",
+        },
+        "status_window_size": {
+            "default": 100,
+            "type": "int",
+            "help": "before archiving a row, the status of it and the rows after it is re-read in a single request (in case they were taken in the meantime), this is how many rows are re-read at once.",
+        },
+        "status_window_max_age": {
+            "default": 30,
+            "type": "int",
+            "help": "seconds after which the re-read statuses are considered stale and read again.",
+        },
+        "leasing": {
+            "default": False,
+            "type": "bool",
+            "help": "set when several auto-archivers archive the same sheet at once: each row is claimed by writing a lease (worker id and expiry) to its status and reading it back, so rows are only archived by one of them. Rows whose lease expired, eg: the worker was stopped, are archived again.",
+        },
+        "worker_id": {
+            "default": None,
+            "help": "name of this worker in the leases, defaults to '<hostname>-<process id>'.",
+        },
+        "lease_duration": {
+            "default": 3600,
+            "type": "int",
+            "help": "seconds a lease lasts, after which other workers may archive the row. While a row is being archived its lease is renewed every half lease_duration, so a lease only expires when its worker stops or can't reach the sheet.",
+        },
+        "lease_settle_seconds": {
+            "default": 2,
+            "type": "int",
+            "help": "seconds to wait between writing a lease and reading it back, longer than it takes another worker to check a row's status and write its own lease.",
+        },
+        "write_flush_interval": {
+            "default": 0,
+            "type": "int",
+            "help": "seconds to buffer the writes to each worksheet for, so that status updates of several rows (and of the same row, eg: 'Archive in progress' then the results) are sent together in a single request. Buffered writes are always sent when a worksheet is finished, on abort and on exit. 0 sends every write straight away.",
+        },
+        "write_flush_size": {
+            "default": 100,
+            "type": "int",
+            "help": "number of buffered cells that trigger a write before write_flush_interval has passed.",
+        },
+        "write_quota_per_minute": {
+            "default": 60,
+            "type": "int",
+            "help": "write requests allowed per minute, writes wait rather than going over it. Google's default quota is 60 per minute per user (service account).",
+        },
+        "worksheet_priority": {
+            "default": [],
+            "help": "A list of worksheet names to archive first, in that order, the other worksheets follow in the order of the sheet",
+        },
+        "interleave_worksheets": {
+            "default": False,
+            "type": "bool",
+            "help": "archive a row of each worksheet in turn (following worksheet_priority), rather than all the rows of a worksheet before moving on to the next one. Keeps one busy worksheet from delaying all the others.",
+        },
+        "worksheet_load_concurrency": {
+            "default": 1,
+            "type": "int",
+            "help": "how many worksheets to download at once. Above 1, up to this many of the next worksheets are downloaded in the background while rows are archived, each with its own connection to Google Sheets.",
+        },
         "use_sheet_names_in_stored_paths": {
             "default": True,
             "help": "if True the stored files path will include 'workbook_name/worksheet_name/...'",
@@ -68,6 +135,10 @@
     - Saves metadata such as title, text, timestamp, hashes, screenshots, and media URLs to designated columns.
     - Formats media-specific metadata, such as thumbnails and PDQ hashes for the sheet.
     - Skips redundant updates for empty or invalid data fields.
+    - Can load only the columns needed to find new rows (`lazy_loading`) and start from the last archived row (`resume_state_file`), for very large sheets.
+    - Can archive the rows of all worksheets in turn (`interleave_worksheets`) and download worksheets concurrently.
+    - Several auto-archivers can archive the same sheet at once with `leasing`, each row is archived by only one of them.
+    - Keeps writes within the Google Sheets quota and can buffer them (`write_flush_interval`) to send fewer, larger updates.
 
     ### Setup
     1. Requires a Google Service Account JSON file for authentication.
@@ -9,9 +9,19 @@ The filtered rows are processed into `Metadata` objects.
 - Ensures only rows with valid URLs and unprocessed statuses are included.
 """
 
+import contextvars
+import copy
+import json
 import os
+import re
+import socket
+import threading
+import time
 import traceback
-from typing import Tuple, Union, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple, Union, Iterator
 from urllib.parse import quote
 
 import gspread
@@ -22,8 +32,12 @@ from retrying import retry
 from auto_archiver.core import Feeder, Database, Media
 from auto_archiver.core import Metadata
 from auto_archiver.modules.gsheet_feeder_db import GWorksheet
+from auto_archiver.modules.gsheet_feeder_db.write_buffer import TokenBucket, WriteBuffer
 from auto_archiver.utils.misc import get_current_timestamp
 
+# written to the status of a row a worker is archiving, when leasing is on
+LEASE_STATUS = re.compile(r"^Archive in progress \[(?P<worker>.+) until (?P<until>[^\]]+)\]$")
+
 
 class GsheetsFeederDB(Feeder, Database):
     def setup(self) -> None:
@@ -31,6 +45,20 @@ class GsheetsFeederDB(Feeder, Database):
         # TODO mv to validators
         if not self.sheet and not self.sheet_id:
             raise ValueError("You need to define either a 'sheet' name or a 'sheet_id' in your manifest.")
+        if self.leasing and not self.worker_id:
+            self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        # the write quota is per user, so it is shared by all worksheets
+        self.write_quota = TokenBucket(self.write_quota_per_minute)
+        self.write_buffers: dict[GWorksheet, WriteBuffer] = {}
+        # first row still to archive of each worksheet, rows before it are skipped by later passes
+        self.resume_rows: dict[str, int] = {}
+        if self.resume_state_file and os.path.isfile(self.resume_state_file):
+            with open(self.resume_state_file, "r") as f:
+                self.resume_rows = json.load(f)
+        # gspread clients aren't thread safe, each worksheet loading and lease renewing thread gets its own
+        self.thread_clients = threading.local()
+        # the stop signal and thread renewing the lease of each (worksheet, row) being archived
+        self.lease_renewals: dict[Tuple[GWorksheet, int], Tuple[threading.Event, threading.Thread]] = {}
 
     @retry(
         wait_exponential_multiplier=1,
@@ -50,41 +78,262 @@ class GsheetsFeederDB(Feeder, Database):
         for worksheet in sheet.worksheets():
             yield worksheet
 
+    def can_read_ahead(self) -> bool:
+        # rows are leased and the resume row moves on as rows are yielded
+        return not (self.leasing or self.resume_state_file)
+
     def __iter__(self) -> Iterator[Metadata]:
+        try:
+            yield from self._iter_worksheets()
+        finally:
+            # also when archiving stops early, so no status updates are lost
+            self.flush_writes()
+
+    def _iter_worksheets(self) -> Iterator[Metadata]:
         spreadsheet = self.open_sheet()
+        worksheets = []
         for worksheet in self.enumerate_sheets(spreadsheet):
-            with logger.contextualize(worksheet=f"{spreadsheet.title}:{worksheet.title}"):
-                if not self.should_process_sheet(worksheet.title):
+            if not self.should_process_sheet(worksheet.title):
+                with logger.contextualize(worksheet=f"{spreadsheet.title}:{worksheet.title}"):
                     logger.debug("Skipped worksheet due to allow/block rules")
-                    continue
-                logger.info(f"Opening worksheet header={self.header}")
-                gw = GWorksheet(worksheet, header_row=self.header, columns=self.columns)
-                if len(missing_cols := self.missing_required_columns(gw)):
-                    logger.debug(f"Skipped worksheet due to missing required column(s) for {missing_cols}")
-                    continue
-
+                continue
+            worksheets.append(worksheet)
+        # worksheets in worksheet_priority first, in that order, then the others in the sheet's order
+        priority = list(self.worksheet_priority or [])
+        worksheets.sort(key=lambda w: priority.index(w.title) if w.title in priority else len(priority))
+
+        opened = self._open_worksheets(spreadsheet, worksheets)
+        if self.interleave_worksheets:
+            yield from self._interleave_worksheets(spreadsheet, [(w, o) for w, o in opened if o is not None])
+            return
+        for worksheet, open_rows in opened:
+            if open_rows is None:
+                continue
+            with logger.contextualize(worksheet=f"{spreadsheet.title}:{worksheet.title}"):
                 # process and yield metadata here:
-                yield from self._process_rows(gw)
+                yield from self._process_rows(*open_rows)
+                self.flush_writes(open_rows[0])
             logger.info(f"Finished worksheet {worksheet.title}")
 
-    def _process_rows(self, gw: GWorksheet):
-        for row in range(1 + self.header, gw.count_rows() + 1):
+    def _open_worksheets(self, spreadsheet: gspread.Spreadsheet, worksheets: list) -> Iterator[tuple]:
+        """
+        Yields each of the @worksheets with what _open_worksheet returns for it, in order. Above a
+        worksheet_load_concurrency of 1 the next worksheets are downloaded in the background of the rows being
+        archived, at most worksheet_load_concurrency of them ahead of the one being archived.
+        """
+        if self.worksheet_load_concurrency <= 1:
+            for worksheet in worksheets:
+                yield worksheet, self._open_worksheet(spreadsheet, worksheet)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.worksheet_load_concurrency, thread_name_prefix="gsheet")
+        upcoming, loading = iter(worksheets), deque()
+        try:
+            while True:
+                while (
+                    len(loading) < self.worksheet_load_concurrency and (worksheet := next(upcoming, None)) is not None
+                ):
+                    # each load runs in its own copy of the current context, so logs keep the current trace
+                    context = contextvars.copy_context()
+                    loading.append(
+                        (worksheet, pool.submit(context.run, self._open_worksheet_in_thread, spreadsheet, worksheet))
+                    )
+                if not loading:
+                    return
+                worksheet, future = loading.popleft()
+                yield worksheet, future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _open_worksheet_in_thread(
+        self, spreadsheet: gspread.Spreadsheet, worksheet: gspread.Worksheet
+    ) -> Optional[Tuple[GWorksheet, int, str]]:
+        """_open_worksheet, downloading with this thread's own gspread client"""
+        open_rows = self._open_worksheet(spreadsheet, self._with_thread_client(worksheet))
+        if open_rows is not None:
+            # rows are archived and written back from the main thread, with the main client
+            open_rows[0].wks = worksheet
+        return open_rows
+
+    def _with_thread_client(self, worksheet: gspread.Worksheet) -> gspread.Worksheet:
+        """a copy of @worksheet that sends its requests with the current thread's own gspread client"""
+        if (client := getattr(self.thread_clients, "client", None)) is None:
+            client = self.thread_clients.client = gspread.service_account(filename=self.service_account)
+        own_worksheet = copy.copy(worksheet)
+        own_worksheet.client = client.http_client
+        return own_worksheet
+
+    def _interleave_worksheets(self, spreadsheet: gspread.Spreadsheet, opened: list) -> Iterator[Metadata]:
+        """Yields a row of each worksheet in turn, so every worksheet gets archived from the start."""
+        active = deque((worksheet, open_rows[0], self._process_rows(*open_rows)) for worksheet, open_rows in opened)
+        while active:
+            worksheet, gw, rows = active.popleft()
+            with logger.contextualize(worksheet=f"{spreadsheet.title}:{worksheet.title}"):
+                try:
+                    item = next(rows)
+                except StopIteration:
+                    self.flush_writes(gw)
+                    logger.info(f"Finished worksheet {worksheet.title}")
+                    continue
+                yield item
+            active.append((worksheet, gw, rows))
+
+    def _open_worksheet(
+        self, spreadsheet: gspread.Spreadsheet, worksheet: gspread.Worksheet
+    ) -> Optional[Tuple[GWorksheet, int, str]]:
+        """Loads the worksheet, returns the arguments for _process_rows or None if it can't be archived."""
+        with logger.contextualize(worksheet=f"{spreadsheet.title}:{worksheet.title}"):
+            resume_key = f"{spreadsheet.id}:{worksheet.id}"
+            first_row = max(1 + self.header, self.resume_rows.get(resume_key, 0))
+            logger.info(f"Opening worksheet header={self.header} first_row={first_row}")
+            gw = GWorksheet(
+                worksheet,
+                header_row=self.header,
+                columns=self.columns,
+                lazy=self.lazy_loading,
+                first_row=first_row,
+            )
+            if len(missing_cols := self.missing_required_columns(gw)):
+                logger.debug(f"Skipped worksheet due to missing required column(s) for {missing_cols}")
+                return None
+            return gw, first_row, resume_key
+
+    def _process_rows(self, gw: GWorksheet, first_row: Optional[int] = None, resume_key: Optional[str] = None):
+        last_row = gw.count_rows()
+        # the status of upcoming rows is re-read in windows, as another process or user may have taken them
+        window_end, window_read_at = 0, 0
+        resume_row = None
+        first_row = first_row or 1 + self.header
+        # filters the rows with a url and no status from whole columns, rather than cell by cell
+        rows = list(zip(range(first_row, last_row + 1), gw.get_col("url", first_row), gw.get_col("status", first_row)))
+        candidates = [row for row, url, status in rows if url.strip() and (not status or self._is_pending(status))]
+        # leased rows aren't finished: if their worker dies they must be found again once the lease expires,
+        # so later passes can't start after them
+        unfinished = None
+        if self.leasing:
+            unfinished = next((row for row, _, status in rows if LEASE_STATUS.match(status or "")), None)
+        for row in candidates:
+            if buffer := self.write_buffers.get(gw):
+                buffer.flush_if_due()
             url = gw.get_cell(row, "url").strip()
-            if not len(url):
-                continue
-            original_status = gw.get_cell(row, "status")
-            status = gw.get_cell(row, "status", fresh=original_status in ["", None])
+            if row > window_end or time.monotonic() - window_read_at > self.status_window_max_age:
+                window_end = min(row + self.status_window_size - 1, last_row)
+                gw.refresh_col("status", row, window_end)
+                window_read_at = time.monotonic()
+            status = gw.get_cell(row, "status")
             # TODO: custom status parser(?) aka should_retry_from_status
-            if status not in ["", None]:
+            if not self._is_pending(status):
+                if self.leasing and unfinished is None and LEASE_STATUS.match(status or ""):
+                    unfinished = row
+                continue
+            if self.leasing and not self._claim_row(gw, row, status):
+                unfinished = unfinished or row
                 continue
 
             # All checks done - archival process starts here
+            if resume_row is None:
+                resume_row = row
+                self._set_resume_row(resume_key, min(row, unfinished or row))
             m = Metadata().set_url(url)
             self._set_context(m, gw, row)
 
             with logger.contextualize(row=row):
                 yield m
 
+        if resume_row is None:
+            # nothing left to archive, only rows added later (or still leased) need checking
+            self._set_resume_row(resume_key, unfinished or last_row + 1)
+
+    def _is_pending(self, status: Optional[str]) -> bool:
+        return status in ["", None] or self._is_expired_lease(status)
+
+    def _is_expired_lease(self, status: str) -> bool:
+        if not self.leasing or not (lease := LEASE_STATUS.match(status)):
+            return False
+        try:
+            return datetime.fromisoformat(lease.group("until")) < datetime.now(timezone.utc)
+        except ValueError:
+            return False
+
+    def _claim_row(self, gw: GWorksheet, row: int, status: str) -> bool:
+        """
+        Leases the row for this worker: writes the lease to the row's status and reads it back after
+        lease_settle_seconds, only one of the workers that tried to claim the row at once reads its own lease.
+        """
+        # @status comes from a snapshot that can be older than another worker's lease, which must not be overwritten
+        status = gw.get_cell(row, "status", fresh=True)
+        if not self._is_pending(status):
+            logger.debug(f"Row {row} was claimed by another worker: {status}")
+            return False
+        if status:
+            logger.info(f"Reclaiming row {row}, its lease expired: {status}")
+        lease = self._new_lease()
+        # not buffered, other workers need to see it straight away
+        self.write_quota.acquire()
+        gw.set_cell(row, "status", lease)
+        time.sleep(self.lease_settle_seconds)
+        if (current := gw.get_cell(row, "status", fresh=True)) != lease:
+            logger.debug(f"Row {row} was claimed by another worker: {current}")
+            return False
+        return True
+
+    def _new_lease(self) -> str:
+        until = datetime.now(timezone.utc) + timedelta(seconds=self.lease_duration)
+        return f"Archive in progress [{self.worker_id} until {until.isoformat(timespec='seconds')}]"
+
+    def _keep_lease(self, gw: GWorksheet, row: int) -> None:
+        """Renews this worker's lease of @row in the background, until _release_lease is called."""
+        stop = threading.Event()
+        # in a copy of the current context, so logs keep the current trace
+        context = contextvars.copy_context()
+        renewer = threading.Thread(
+            target=context.run, args=(self._renew_lease, gw, row, stop), name=f"gsheet-lease-{row}", daemon=True
+        )
+        self.lease_renewals[(gw, row)] = (stop, renewer)
+        renewer.start()
+
+    def _renew_lease(self, gw: GWorksheet, row: int, stop: threading.Event) -> None:
+        """Extends the lease of @row every half lease_duration, as long as it's still this worker's, until @stop."""
+        own_gw = None
+        while not stop.wait(self.lease_duration / 2):
+            try:
+                if own_gw is None:
+                    own_gw = copy.copy(gw)
+                    own_gw.wks = self._with_thread_client(gw.wks)
+                status = own_gw.get_cell(row, "status", fresh=True)
+                if not (lease := LEASE_STATUS.match(status or "")) or lease.group("worker") != self.worker_id:
+                    logger.warning(f"Lost the lease of row {row}, it now says: {status}")
+                    return
+                self.write_quota.acquire()
+                own_gw.set_cell(row, "status", self._new_lease())
+                logger.debug(f"Renewed the lease of row {row}")
+            except Exception as e:
+                # tried again in half a lease_duration, before the current lease expires
+                logger.error(f"Unable to renew the lease of row {row}: {e}")
+
+    def _release_lease(self, item: Metadata) -> None:
+        """Stops renewing the lease of @item's row, before its status is overwritten."""
+        if not self.lease_renewals or not (gsheet := item.get_context("gsheet")):
+            return
+        if renewal := self.lease_renewals.pop((gsheet.get("worksheet"), gsheet.get("row")), None):
+            stop, renewer = renewal
+            stop.set()
+            renewer.join()
+
+    def _set_resume_row(self, resume_key: Optional[str], row: int) -> None:
+        if resume_key is None or self.resume_rows.get(resume_key) == row:
+            return
+        self.resume_rows[resume_key] = row
+        if not self.resume_state_file:
+            return
+        if folder := os.path.dirname(self.resume_state_file):
+            os.makedirs(folder, exist_ok=True)
+        # write then rename, so an interrupted run never leaves a truncated file behind
+        tmp_filename = f"{self.resume_state_file}.tmp"
+        with open(tmp_filename, "w") as f:
+            json.dump(self.resume_rows, f)
+        os.replace(tmp_filename, self.resume_state_file)
+
     def _set_context(self, m: Metadata, gw: GWorksheet, row: int) -> Metadata:
         # TODO: Check folder value not being recognised
         m.set_context("gsheet", {"row": row, "worksheet": gw})
@@ -114,16 +363,23 @@ class GsheetsFeederDB(Feeder, Database):
 
     def started(self, item: Metadata) -> None:
         logger.info("STARTED")
+        if self.leasing:
+            # the row's status already holds this worker's lease, it is kept until the item is finished
+            self._keep_lease(*self._retrieve_gsheet(item))
+            return
         gw, row = self._retrieve_gsheet(item)
-        gw.set_cell(row, "status", "Archive in progress")
+        self._write_buffer(gw).set_cell(row, "status", "Archive in progress")
 
     def failed(self, item: Metadata, reason: str) -> None:
         logger.error("FAILED")
+        self._release_lease(item)
         self._safe_status_update(item, f"Archive failed {reason}")
 
     def aborted(self, item: Metadata) -> None:
         logger.warning("ABORTED")
+        self._release_lease(item)
         self._safe_status_update(item, "")
+        self.flush_writes()
 
     def fetch(self, item: Metadata) -> Union[Metadata, bool]:
         """check if the given item has been archived already"""
@@ -131,6 +387,7 @@ class GsheetsFeederDB(Feeder, Database):
 
     def done(self, item: Metadata, cached: bool = False) -> None:
         """archival result ready - should be saved to DB"""
+        self._release_lease(item)
         gw, row = self._retrieve_gsheet(item)
 
         cell_updates = []
@@ -188,22 +445,43 @@ class GsheetsFeederDB(Feeder, Database):
                 ),
             )
 
-        @retry(
-            wait_exponential_multiplier=1,
-            stop_max_attempt_number=5,
-        )
-        def batch_set_cell_with_retry(gw, cell_updates: list):
-            gw.batch_set_cell(cell_updates)
+        self._write_buffer(gw).set_many(cell_updates)
 
-        batch_set_cell_with_retry(gw, cell_updates)
+    def cleanup(self) -> None:
+        for stop, renewer in self.lease_renewals.values():
+            stop.set()
+            renewer.join()
+        self.lease_renewals.clear()
 
     def _safe_status_update(self, item: Metadata, new_status: str) -> None:
         try:
             gw, row = self._retrieve_gsheet(item)
-            gw.set_cell(row, "status", new_status)
+            self._write_buffer(gw).set_cell(row, "status", new_status)
         except Exception as e:
             logger.debug(f"Unable to update sheet: {e}: {traceback.format_exc()}")
 
+    def _write_buffer(self, gw: GWorksheet) -> WriteBuffer:
+        if gw not in self.write_buffers:
+            self.write_buffers[gw] = WriteBuffer(
+                gw, self.write_quota, flush_interval=self.write_flush_interval, max_pending=self.write_flush_size
+            )
+        return self.write_buffers[gw]
+
+    def flush_writes(self, gw: GWorksheet = None) -> None:
+        """
+        Sends the buffered writes of @gw, or of all worksheets, and forgets their buffers. Buffers that fail to
+        flush are kept, with their writes, for the next flush.
+        """
+        for buffered_gw in [gw] if gw is not None else list(self.write_buffers):
+            if (buffer := self.write_buffers.get(buffered_gw)) is None:
+                continue
+            try:
+                buffer.flush()
+            except Exception as e:
+                logger.error(f"Unable to write {len(buffer.pending)} buffered cell(s) to the sheet: {e}")
+                continue
+            del self.write_buffers[buffered_gw]
+
     def _retrieve_gsheet(self, item: Metadata) -> Tuple[GWorksheet, int]:
         if gsheet := item.get_context("gsheet"):
             gw: GWorksheet = gsheet.get("worksheet")
@@ -1,3 +1,5 @@
+from typing import Optional, Set
+
 from gspread import utils
 from retrying import retry
 
@@ -8,8 +10,14 @@ class GWorksheet:
     It can read the headers from a custom row number, but the row references
     should always include the offset of the header.
     eg: if header=4, row 5 will be the first with data.
+
+    With lazy=True only the header and the url/status columns are loaded, from first_row on, each
+    full row is then loaded when first needed (eg: get_row, or get_cell of another column).
     """
 
+    # the columns loaded by lazy worksheets, enough to find the rows to archive
+    INDEX_COLUMNS = ("url", "status")
+
     COLUMN_NAMES = {
         "url": "link",
         "status": "archive status",
@@ -31,37 +39,102 @@ class GWorksheet:
         wait_exponential_multiplier=1,
         stop_max_attempt_number=6,
     )
-    def __init__(self, worksheet, columns=COLUMN_NAMES, header_row=1):
+    def __init__(self, worksheet, columns=COLUMN_NAMES, header_row=1, lazy=False, first_row: Optional[int] = None):
         self.wks = worksheet
         self.columns = columns
+        self.header_row = header_row
+        self.first_row = max(first_row or 0, header_row + 1)
+        # rows (1-based) whose values are all loaded, None when the whole sheet is
+        self.loaded_rows: Optional[Set[int]] = None
+        if lazy:
+            self._load_index_columns(header_row)
+            return
         self.values = self.wks.get_values()
         if len(self.values) > 0:
             self.headers = [v.lower() for v in self.values[header_row - 1]]
         else:
             self.headers = []
 
+    def _load_index_columns(self, header_row: int):
+        header = self.wks.row_values(header_row)
+        self.headers = [v.lower() for v in header]
+        self.values = [[] for _ in range(header_row - 1)] + [header]
+        self.loaded_rows = {header_row}
+        index_cols = [self._col_index(col) for col in self.INDEX_COLUMNS if self.col_exists(col)]
+        if not index_cols:
+            return
+
+        # open ended ranges, eg: 'A5:A', only return the rows up to the column's last value
+        ranges = []
+        for col_index in index_cols:
+            start = utils.rowcol_to_a1(self.first_row, col_index + 1)
+            ranges.append(f"{start}:{start.rstrip('0123456789')}")
+        columns = self.wks.batch_get(ranges)
+        last_row = self.first_row - 1 + max(len(col_values) for col_values in columns)
+        width = max(index_cols) + 1
+        self.values.extend([[""] * width for _ in range(len(self.values), last_row)])
+        for col_index, col_values in zip(index_cols, columns):
+            for offset, cells in enumerate(col_values):
+                if len(cells):
+                    self.values[self.first_row - 1 + offset][col_index] = cells[0]
+
+    @property
+    def headers(self) -> list:
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers: list):
+        # resolving a column happens for every cell read or written, so the indexes are worked out once
+        self._headers = headers
+        first_index = {}
+        for i, header in enumerate(headers):
+            first_index.setdefault(header, i)
+        self._col_indexes = {
+            col: first_index[name.lower()] for col, name in self.columns.items() if name.lower() in first_index
+        }
+
     def _check_col_exists(self, col: str):
         if col not in self.columns:
             raise Exception(f"Column {col} is not in the configured column names: {self.columns.keys()}")
 
     def _col_index(self, col: str):
+        if (index := self._col_indexes.get(col)) is not None:
+            return index
         self._check_col_exists(col)
-        return self.headers.index(self.columns[col].lower())
+        raise ValueError(f"Column {self.columns[col]!r} is not in the worksheet's headers")
 
     def col_exists(self, col: str):
         self._check_col_exists(col)
-        return self.columns[col].lower() in self.headers
+        return col in self._col_indexes
 
     def count_rows(self):
         return len(self.values)
 
     def get_row(self, row: int):
         # row is 1-based
+        if self.loaded_rows is not None and row not in self.loaded_rows:
+            self._load_row(row)
         return self.values[row - 1]
 
+    def _load_row(self, row: int):
+        full_row = self.wks.row_values(row)
+        values = self.values[row - 1]
+        # keeps the values of cells the sheet returned empty (trailing) but that were written locally
+        values[: len(full_row)] = full_row
+        self.loaded_rows.add(row)
+
     def get_values(self):
         return self.values
 
+    def get_col(self, col: str, first_row: int = 1):
+        """
+        returns the values of col from first_row (1-based) to the last row, empty cells as ""
+        """
+        if self.loaded_rows is not None and col not in self.INDEX_COLUMNS:
+            return [self.get_cell(row, col) for row in range(first_row, self.count_rows() + 1)]
+        col_index = self._col_index(col)
+        return [values[col_index] if col_index < len(values) else "" for values in self.values[first_row - 1 :]]
+
     def get_cell(self, row, col: str, fresh=False):
         """
         returns the cell value from (row, col),
@@ -74,7 +147,11 @@ class GWorksheet:
         if fresh:
             return self.wks.cell(row, col_index + 1).value
         if isinstance(row, int):
-            row = self.get_row(row)
+            if self.loaded_rows is not None and col in self.INDEX_COLUMNS and row <= len(self.values):
+                # loaded up front, no need to load the full row
+                row = self.values[row - 1]
+            else:
+                row = self.get_row(row)
 
         if col_index >= len(row):
             return ""
@@ -92,19 +169,44 @@ class GWorksheet:
         except Exception:
             return default
 
+    def refresh_col(self, col: str, first_row: int, last_row: int):
+        """
+        re-reads the cells of col from first_row to last_row (1-based, inclusive) in a single request,
+        and updates the local values with them
+        """
+        col_index = self._col_index(col)
+        a1_range = f"{utils.rowcol_to_a1(first_row, col_index + 1)}:{utils.rowcol_to_a1(last_row, col_index + 1)}"
+        fresh = self.wks.batch_get([a1_range])[0]
+        for offset, row in enumerate(range(first_row, last_row + 1)):
+            # trailing empty rows and cells are left out of the response
+            val = fresh[offset][0] if offset < len(fresh) and len(fresh[offset]) else ""
+            self._set_local_value(row, col_index, val)
+
+    def _set_local_value(self, row: int, col_index: int, val):
+        # keeps the local values in sync with writes and re-reads, rows beyond the loaded ones are left out
+        if not 0 < row <= len(self.values):
+            return
+        values = self.values[row - 1]
+        if col_index >= len(values):
+            values.extend([""] * (col_index + 1 - len(values)))
+        values[col_index] = val
+        if row == self.header_row:
+            self.headers = [str(v).lower() for v in values]
+
     def set_cell(self, row: int, col: str, val):
         # row is 1-based
         col_index = self._col_index(col) + 1
         self.wks.update_cell(row, col_index, val)
+        self._set_local_value(row, col_index - 1, val)
 
     def batch_set_cell(self, cell_updates):
         """
         receives a list of [(row:int, col:str, val)] and batch updates it, the parameters are the same as in the self.set_cell() method
         """
-        cell_updates = [
-            {"range": self.to_a1(row, col), "values": [[str(val)[0:49999]]]} for row, col, val in cell_updates
-        ]
-        self.wks.batch_update(cell_updates, value_input_option="USER_ENTERED")
+        batch = [{"range": self.to_a1(row, col), "values": [[str(val)[0:49999]]]} for row, col, val in cell_updates]
+        self.wks.batch_update(batch, value_input_option="USER_ENTERED")
+        for row, col, val in cell_updates:
+            self._set_local_value(row, self._col_index(col), str(val)[0:49999])
 
     def to_a1(self, row: int, col: str):
         # row is 1-based
@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from retrying import retry
+
+from auto_archiver.utils.custom_logger import logger
+
+
+class TokenBucket:
+    """
+    Models a quota of requests per minute, such as the Google Sheets limit of 60 write requests per
+    minute per user: allows bursts of up to @capacity requests, refilled at @per_minute requests per minute.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, waiting until one is available. Returns how long it waited."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # going below 0 reserves the next token, so concurrent callers queue up rather than all wake at once
+            self.tokens -= 1
+            wait = max(-self.tokens / self.rate, 0)
+        if wait:
+            logger.debug(f"Waiting {wait:.1f}s for the Google Sheets write quota")
+            time.sleep(wait)
+        return wait
+
+
+class WriteBuffer:
+    """
+    Coalesces the cell writes to a worksheet (GWorksheet): pending writes to the same cell are merged, the
+    last one wins, and all are sent in a single batch update once @flush_interval seconds have passed since
+    the oldest pending write or @max_pending cells are pending. A @flush_interval of 0 sends every write at once.
+
+    Each request takes a token from @quota first.
+    """
+
+    def __init__(self, gw, quota: TokenBucket, flush_interval: float = 0, max_pending: int = 100):
+        self.gw = gw
+        self.quota = quota
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: dict = {}
+        self.oldest_pending = None
+        self.lock = threading.RLock()
+
+    def set_cell(self, row: int, col: str, val) -> None:
+        self.set_many([(row, col, val)])
+
+    def set_many(self, cell_updates: Iterable[Tuple[int, str, object]]) -> None:
+        with self.lock:
+            if not self.pending:
+                self.oldest_pending = time.monotonic()
+            for row, col, val in cell_updates:
+                self.pending[(row, col)] = val
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Flushes if it's time to, a failed flush is logged rather than raised and tried again later."""
+        with self.lock:
+            if self.pending and (
+                len(self.pending) >= self.max_pending or time.monotonic() - self.oldest_pending >= self.flush_interval
+            ):
+                try:
+                    self.flush()
+                except Exception as e:
+                    # tried again once flush_interval passes again, or by the next flush
+                    self.oldest_pending = time.monotonic()
+                    logger.error(f"Unable to write {len(self.pending)} buffered cell(s) to the sheet, will retry: {e}")
+
+    def flush(self) -> int:
+        """Sends the pending writes, returns how many cells were written."""
+        with self.lock:
+            if not self.pending:
+                return 0
+            cell_updates = [(row, col, val) for (row, col), val in self.pending.items()]
+            # on failure the writes stay pending, to be sent with the next flush
+            self._send(cell_updates)
+            self.pending = {}
+            return len(cell_updates)
+
+    @retry(
+        wait_exponential_multiplier=1,
+        stop_max_attempt_number=5,
+    )
+    def _send(self, cell_updates: list) -> None:
+        self.quota.acquire()
+        if len(cell_updates) == 1:
+            self.gw.set_cell(*cell_updates[0])
+        else:
+            self.gw.batch_set_cell(cell_updates)
@@ -8,15 +8,35 @@
     "configs": {
         "path_generator": {
             "default": "flat",
-            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory.",
-            "choices": ["flat", "url", "random"],
+            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory; 'sharded' creates nested directories from the start of the file's hash (eg: 'ab/cd/'), to avoid too many files in a single directory.",
+            "choices": ["flat", "url", "random", "sharded"],
         },
         "filename_generator": {
             "default": "static",
             "help": "how to name stored files: 'random' creates a random string; 'static' uses a hash, with the settings of the 'hash_enricher' module (defaults to SHA256 if not enabled)",
             "choices": ["random", "static"],
         },
+        "shard_depth": {
+            "default": 2,
+            "type": "int",
+            "help": "number of nested directories created by the 'sharded' path_generator.",
+        },
+        "shard_width": {
+            "default": 2,
+            "type": "int",
+            "help": "number of hash characters in each directory name of the 'sharded' path_generator, eg: 2 creates up to 256 directories per level.",
+        },
         "save_to": {"default": "./local_archive", "help": "folder where to save archived content"},
+        "max_concurrent_uploads": {
+            "default": 4,
+            "type": "int",
+            "help": "how many files can be uploaded to this storage at once, other storages upload in parallel to it. Set to 1 to upload one file at a time.",
+        },
+        "link_strategy": {
+            "default": "copy",
+            "help": "how to save files: 'copy' copies them; 'hardlink' and 'reflink' (copy-on-write clone, eg: on btrfs or XFS) save them without copying any data; 'move' moves them when this is the last storage, otherwise it hardlinks them. Falls back to copying when not possible, eg: when the archive and the temporary files are on different devices.",
+            "choices": ["copy", "hardlink", "reflink", "move"],
+        },
         "save_absolute": {
             "default": False,
             "type": "bool",
@@ -29,6 +49,7 @@
     ### Features
     - Saves archived media files to a specified folder on the local filesystem.
     - Maintains file metadata during storage using `shutil.copy2`.
+    - Can hardlink, reflink or move files instead of copying them (`link_strategy`), saving I/O and disk space for large files.
     - Supports both absolute and relative paths for stored files, configurable via `save_absolute`.
     - Automatically creates directories as needed for storing files.
 
@@ -1,19 +1,57 @@
+import errno
 import shutil
 from typing import IO
 import os
 from auto_archiver.utils.custom_logger import logger
 
-from auto_archiver.core import Media
+from auto_archiver.core import Media, Metadata
 from auto_archiver.core import Storage
 from auto_archiver.core.consts import SetupError
+from auto_archiver.utils.misc import random_str
+
+
+# ioctl to clone a file's extents (copy-on-write), from linux/fs.h
+FICLONE = 0x40049409
+
+
+def hardlink(src: str, dest: str) -> None:
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        # already linked, renaming over it would be a no-op that leaves the temporary link behind
+        return
+    # link to a temporary name first, so an existing file at dest gets replaced as copy2 would
+    tmp_dest = f"{dest}.{random_str(8)}.tmp"
+    os.link(src, tmp_dest)
+    try:
+        os.replace(tmp_dest, dest)
+    except OSError:
+        os.remove(tmp_dest)
+        raise
+
+
+def reflink(src: str, dest: str) -> None:
+    try:
+        import fcntl
+    except ImportError as e:
+        raise OSError(errno.ENOTSUP, "reflinks are not supported on this platform") from e
+    with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+        fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dest)
+
+
+LINK_STRATEGIES = {"hardlink": hardlink, "reflink": reflink, "move": os.replace}
 
 
 class LocalStorage(Storage):
     def setup(self) -> None:
+        super().setup()
         if len(self.save_to) > 200:
             raise SetupError(
                 "Your save_to path is too long, this will cause issues saving files on your computer. Please use a shorter path."
             )
+        # where the 'move' strategy put each file of the item being stored, for its other Media still pointing
+        # to the original. Only kept for one item, later items have files of their own
+        self.moved: dict[str, str] = {}
+        self.moved_for: Metadata = None
 
     def get_cdn_url(self, media: Media) -> str:
         dest = media.key
@@ -23,24 +61,55 @@ class LocalStorage(Storage):
         return dest
 
     def set_key(self, media, url, metadata):
-        # clarify we want to save the file to the save_to folder
-
-        old_folder = metadata.get("folder", "")
-        metadata.set_context("folder", os.path.join(self.save_to, metadata.get("folder", "")))
-        super().set_key(media, url, metadata)
-        # don't impact other storages that might want a different 'folder' set
-        metadata.set_context("folder", old_folder)
+        # clarify we want to save the file to the save_to folder, using a separate context
+        # so other storages (which may be storing concurrently) keep their 'folder' set
+        local_context = Metadata().set_context("folder", os.path.join(self.save_to, metadata.get("folder", "")))
+        super().set_key(media, url, local_context)
 
     def upload(self, media: Media, **kwargs) -> bool:
-        # override parent so that we can use shutil.copy2 and keep metadata
+        # override parent so that we can link/copy the file and keep metadata
         dest = media.key
 
         os.makedirs(os.path.dirname(dest), exist_ok=True)
         logger.debug(f"[{self.__class__.__name__}] storing file {media.filename} with key {media.key} to {dest}")
 
-        shutil.copy2(media.filename, dest)
+        src = media.filename
+        strategy = self.link_strategy
+        if (metadata := kwargs.get("metadata")) is not self.moved_for:
+            self.moved, self.moved_for = {}, metadata
+        if not os.path.exists(src) and src in self.moved:
+            # another Media with the same file moved it already, link to where it went rather than moving it again
+            src = media.filename = self.moved[src]
+            if strategy == "move":
+                strategy = "hardlink"
+        elif strategy == "move" and (not self.is_last_storage() or self.is_shared(media, metadata)):
+            # the storages after this one, or other Media of the item, still need the original file
+            strategy = "hardlink"
+        if strategy != "copy":
+            try:
+                LINK_STRATEGIES[strategy](src, dest)
+                if strategy == "move":
+                    self.moved[src] = dest
+                    media.filename = dest
+                return True
+            except OSError as e:
+                # eg: the files are on different devices or the filesystem doesn't support it
+                logger.debug(f"Unable to {strategy} {src} to {dest}, copying it instead: {e}")
+
+        shutil.copy2(src, dest)
         return True
 
+    @staticmethod
+    def is_shared(media: Media, metadata: Metadata = None) -> bool:
+        """whether other Media of the item use the same file, eg: an enricher reusing a downloaded file"""
+        if metadata is None:
+            return False
+        return any(m is not media and m.filename == media.filename for m in metadata.get_all_media())
+
+    def is_last_storage(self) -> bool:
+        storages = self.config.get("steps", {}).get("storages", [])
+        return len(storages) > 0 and storages[-1] == self.name
+
     # must be implemented even if unused
     def uploadf(self, file: IO[bytes], key: str, **kwargs: dict) -> bool:
         pass
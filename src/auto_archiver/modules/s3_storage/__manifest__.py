@@ -8,14 +8,24 @@
     "configs": {
         "path_generator": {
             "default": "flat",
-            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory.",
-            "choices": ["flat", "url", "random"],
+            "help": "how to store the file in terms of directory structure: 'flat' sets to root; 'url' creates a directory based on the provided URL; 'random' creates a random directory; 'sharded' creates nested directories from the start of the file's hash (eg: 'ab/cd/'), to avoid too many files in a single directory.",
+            "choices": ["flat", "url", "random", "sharded"],
         },
         "filename_generator": {
             "default": "static",
             "help": "how to name stored files: 'random' creates a random string; 'static' uses a hash, with the settings of the 'hash_enricher' module (defaults to SHA256 if not enabled).",
             "choices": ["random", "static"],
         },
+        "shard_depth": {
+            "default": 2,
+            "type": "int",
+            "help": "number of nested directories created by the 'sharded' path_generator.",
+        },
+        "shard_width": {
+            "default": 2,
+            "type": "int",
+            "help": "number of hash characters in each directory name of the 'sharded' path_generator, eg: 2 creates up to 256 directories per level.",
+        },
         "bucket": {"default": None, "help": "S3 bucket name"},
         "region": {"default": None, "help": "S3 region name"},
         "key": {"default": None, "help": "S3 API key"},
@@ -25,6 +35,24 @@
             "type": "bool",
             "help": "if set, it will override `path_generator`, `filename_generator` and `folder`. It will check if the file already exists and if so it will not upload it again. Creates a new root folder path `no-dups/`",
         },
+        "skip_existing": {
+            "default": False,
+            "type": "bool",
+            "help": "if set and `filename_generator` is 'static', files already in the bucket with the same key and size (and SHA-256 checksum, when known) are not uploaded again. Checks the `dedup_index` first, otherwise sends a HEAD request.",
+        },
+        "spool_dir": {
+            "default": None,
+            "help": "folder where files are kept until they are uploaded in the background (write-behind): items are saved with their url straight away and uploads that fail are retried, including on the next run. Not used with `random_no_duplicate`, as the url is only known after uploading. Disabled if not set.",
+        },
+        "dedup_index": {
+            "default": None,
+            "help": "path to a local SQLite file indexing the files already in the bucket, so `random_no_duplicate` can find duplicates without a request to S3 for each file. It is updated on each upload, delete it if files are removed from the bucket. Disabled if not set.",
+        },
+        "warm_dedup_index": {
+            "default": False,
+            "type": "bool",
+            "help": "if set, lists all the files in the `no-dups/` folder of the bucket at startup to fill the `dedup_index`.",
+        },
         "endpoint_url": {
             "default": "https://{region}.digitaloceanspaces.com",
             "help": "S3 bucket endpoint, {region} are inserted at runtime",
@@ -33,6 +61,31 @@
             "default": "https://{bucket}.{region}.cdn.digitaloceanspaces.com/{key}",
             "help": "S3 CDN url, {bucket}, {region} and {key} are inserted at runtime",
         },
+        "max_concurrent_uploads": {
+            "default": 4,
+            "type": "int",
+            "help": "how many files can be uploaded to this storage at once, other storages upload in parallel to it. Set to 1 to upload one file at a time.",
+        },
+        "multipart_threshold": {
+            "default": 8,
+            "type": "int",
+            "help": "file size in MB from which uploads are split into multiple parts",
+        },
+        "multipart_chunksize": {
+            "default": 8,
+            "type": "int",
+            "help": "size in MB of each part of a multipart upload",
+        },
+        "max_concurrency": {
+            "default": 10,
+            "type": "int",
+            "help": "how many parts of a single file are uploaded at once, this is per file so the total is multiplied by max_concurrent_uploads",
+        },
+        "checksum_sha256": {
+            "default": False,
+            "type": "bool",
+            "help": "if true S3 verifies the SHA-256 checksum of uploaded files. Reuses the hash from 'hash_enricher' (when using SHA-256) for single part uploads instead of calculating it again.",
+        },
         "private": {"default": False, "type": "bool", "help": "if true S3 files will not be readable online"},
     },
     "description": """
@@ -44,10 +97,15 @@
     - Automatically generates unique paths for files when duplicates are found.
     - Configurable endpoint and CDN URL for different S3-compatible providers.
     - Supports both private and public file storage, with public files being readable online.
+    - Configurable multipart uploads (threshold, part size and concurrency) for large files such as long videos.
+    - Optional SHA-256 checksums, reusing the hash from `hash_enricher` when possible.
 
     ### Notes
     - Requires S3 credentials (API key and secret) and a bucket name to function.
     - The `random_no_duplicate` option ensures no duplicate uploads by leveraging hash-based folder structures.
+    - With `dedup_index` set, known files are found in a local index instead of querying S3 for each file.
+    - With `skip_existing` and static filenames, re-archived content that is already in the bucket is not uploaded again.
+    - With `spool_dir`, uploads happen in the background and are retried until they succeed, pending uploads are finished before exiting (or with `--flush-spool`).
     - Uses `boto3` for interaction with the S3 API.
     - Depends on the `HashEnricher` module for hash calculation.
     """,
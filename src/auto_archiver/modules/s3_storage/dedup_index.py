@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import threading
+from typing import Iterable, Optional, Tuple
+
+
+class DedupIndex:
+    """
+    A local SQLite index of the objects known to exist in a bucket, with their size.
+
+    Lets the S3 storage check for existing files without a request to S3 for each one. The index
+    only ever learns about objects (from listings and uploads), so objects deleted from the bucket
+    by other means stay in it: delete the index file to start over.
+    """
+
+    def __init__(self, filename: str, bucket: str):
+        if folder := os.path.dirname(filename):
+            os.makedirs(folder, exist_ok=True)
+        self.bucket = bucket
+        # shared by the concurrent uploads of a storage, sqlite3 connections are safe to share with a lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                "bucket TEXT NOT NULL, key TEXT NOT NULL, size INTEGER, PRIMARY KEY (bucket, key))"
+            )
+
+    def add(self, key: str, size: Optional[int] = None) -> None:
+        self.add_many([(key, size)])
+
+    def add_many(self, objects: Iterable[Tuple[str, Optional[int]]]) -> int:
+        """Records (key, size) pairs, returns how many were given."""
+        rows = [(self.bucket, key, size) for key, size in objects]
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT INTO objects (bucket, key, size) VALUES (?, ?, ?) "
+                "ON CONFLICT (bucket, key) DO UPDATE SET size = COALESCE(excluded.size, size)",
+                rows,
+            )
+        return len(rows)
+
+    def get_size(self, key: str) -> Optional[int]:
+        """Returns the size of a known @key, or None if unknown."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT size FROM objects WHERE bucket = ? AND key = ?", (self.bucket, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def first_in_folder(self, folder: str) -> Optional[str]:
+        """Returns the first known key (in S3 listing order) directly inside @folder, or None."""
+        prefix = folder if folder.endswith("/") else folder + "/"
+        # every key starting with 'folder/' sorts between 'folder/' and 'folder0' ('0' follows '/')
+        with self.lock:
+            row = self.db.execute(
+                "SELECT key FROM objects WHERE bucket = ? AND key >= ? AND key < ? "
+                "AND instr(substr(key, ?), '/') = 0 ORDER BY key LIMIT 1",
+                (self.bucket, prefix, prefix[:-1] + "0", len(prefix) + 1),
+            ).fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM objects WHERE bucket = ?", (self.bucket,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
@@ -1,18 +1,29 @@
-from typing import IO
+import base64
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
 
 import boto3
 import os
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from auto_archiver.utils.custom_logger import logger
 
 from auto_archiver.core import Media
 from auto_archiver.core import Storage
 from auto_archiver.utils.misc import calculate_file_hash, random_str
 
+from .dedup_index import DedupIndex
+
 NO_DUPLICATES_FOLDER = "no-dups/"
+MB = 1024 * 1024
+# concurrent uploads of files with the same content take the same one of these locks
+CONTENT_LOCKS = 64
 
 
 class S3Storage(Storage):
     def setup(self) -> None:
+        super().setup()
         self.s3 = boto3.client(
             "s3",
             region_name=self.region,
@@ -20,19 +31,68 @@ class S3Storage(Storage):
             aws_access_key_id=self.key,
             aws_secret_access_key=self.secret,
         )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.multipart_threshold * MB,
+            multipart_chunksize=self.multipart_chunksize * MB,
+            max_concurrency=self.max_concurrency,
+        )
         if self.random_no_duplicate:
             logger.warning(
                 "random_no_duplicate is set to True, this will override `path_generator`, `filename_generator` and `folder`."
             )
+        self.content_locks = [threading.Lock() for _ in range(CONTENT_LOCKS)]
+        self.index = DedupIndex(self.dedup_index, self.bucket) if self.dedup_index else None
+        if self.index is not None and self.warm_dedup_index:
+            self.fill_dedup_index()
+
+    def can_spool(self) -> bool:
+        # random_no_duplicate only picks the key once it knows if the file is already in the bucket
+        return not self.random_no_duplicate
 
     def get_cdn_url(self, media: Media) -> str:
         return self.cdn_url.format(bucket=self.bucket, region=self.region, key=media.key)
 
+    def upload(self, media: Media, **kwargs) -> bool:
+        # uploads from the path rather than an open file, so boto3 can read multipart chunks in parallel
+        with self.content_lock(media) as hd:
+            if not self.is_upload_needed(media, hd):
+                return True
+
+            logger.debug(f"[{self.__class__.__name__}] storing file {media.filename} with key {media.key}")
+            extra_args = self.get_extra_args(media, kwargs.get("extra_args", {}))
+            self.s3.upload_file(
+                media.filename, Bucket=self.bucket, Key=media.key, ExtraArgs=extra_args, Config=self.transfer_config
+            )
+            self.add_to_index(media)
+        return True
+
     def uploadf(self, file: IO[bytes], media: Media, **kwargs: dict) -> None:
-        if not self.is_upload_needed(media):
-            return True
+        with self.content_lock(media) as hd:
+            if not self.is_upload_needed(media, hd):
+                return True
+
+            extra_args = self.get_extra_args(media, kwargs.get("extra_args", {}))
+            self.s3.upload_fileobj(
+                file, Bucket=self.bucket, Key=media.key, ExtraArgs=extra_args, Config=self.transfer_config
+            )
+            self.add_to_index(media)
+        return True
+
+    @contextmanager
+    def content_lock(self, media: Media) -> Iterator[Optional[str]]:
+        """
+        With random_no_duplicate, holds a lock shared by the files with the same content as @media from the check
+        for an existing copy until the upload is done, so concurrent uploads of the same file end up in one key.
+        Yields the file's hash, or None when random_no_duplicate is off.
+        """
+        if not self.random_no_duplicate:
+            yield None
+            return
+        hd = calculate_file_hash(media.filename)
+        with self.content_locks[hash(hd) % len(self.content_locks)]:
+            yield hd
 
-        extra_args = kwargs.get("extra_args", {})
+    def get_extra_args(self, media: Media, extra_args: dict) -> dict:
         if not self.private and "ACL" not in extra_args:
             extra_args["ACL"] = "public-read"
 
@@ -44,13 +104,33 @@ class S3Storage(Storage):
                         extra_args["ContentType"] += "; charset=utf-8"
             except Exception as e:
                 logger.warning(f"Unable to get mimetype for {media.key=}, error: {e}")
-        self.s3.upload_fileobj(file, Bucket=self.bucket, Key=media.key, ExtraArgs=extra_args)
-        return True
 
-    def is_upload_needed(self, media: Media) -> bool:
+        if self.checksum_sha256 and "ChecksumSHA256" not in extra_args:
+            if checksum := self.precomputed_checksum(media):
+                extra_args["ChecksumSHA256"] = checksum
+            else:
+                extra_args.setdefault("ChecksumAlgorithm", "SHA256")
+        return extra_args
+
+    def precomputed_checksum(self, media: Media) -> Optional[str]:
+        """
+        Returns the base64 SHA-256 checksum S3 expects, if the hash_enricher already calculated it.
+        Only valid for single part uploads, multipart uploads have their checksum calculated per part by boto3.
+        """
+        algorithm, _, hd = (media.get("hash") or "").partition(":")
+        if algorithm != "SHA-256" or not hd:
+            return None
+        try:
+            if os.path.getsize(media.filename) >= self.transfer_config.multipart_threshold:
+                return None
+            return base64.b64encode(bytes.fromhex(hd)).decode()
+        except (OSError, ValueError):
+            return None
+
+    def is_upload_needed(self, media: Media, hd: Optional[str] = None) -> bool:
         if self.random_no_duplicate:
             # checks if a folder with the hash already exists, if so it skips the upload
-            hd = calculate_file_hash(media.filename)
+            hd = hd or calculate_file_hash(media.filename)
             path = os.path.join(NO_DUPLICATES_FOLDER, hd[:24])
 
             if existing_key := self.file_in_folder(path):
@@ -61,13 +141,70 @@ class S3Storage(Storage):
 
             _, ext = os.path.splitext(media.key)
             media._key = os.path.join(path, f"{random_str(24)}{ext}")
+        elif self.skip_existing and self.filename_generator == "static" and self.is_already_uploaded(media):
+            media.set("previously archived", True)
+            logger.debug(f"Skipping upload of {media.filename} because {media.key} already has the same content")
+            return False
+        return True
+
+    def is_already_uploaded(self, media: Media) -> bool:
+        """
+        Checks if the object at media.key has the same size as the file and, when both are known, the same SHA-256.
+        Looks it up in the dedup index first and otherwise with a HEAD request.
+        """
+        size = os.path.getsize(media.filename)
+        if self.index is not None and self.index.get_size(media.key) == size:
+            return True
+
+        try:
+            head = self.s3.head_object(Bucket=self.bucket, Key=media.key, ChecksumMode="ENABLED")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                logger.warning(f"Unable to check if {media.key} already exists, uploading it again: {e}")
+            return False
+        if head.get("ContentLength") != size:
+            return False
+        # multipart uploads have a checksum of the parts' checksums (ending in -<parts>), which can't be compared
+        remote_checksum = head.get("ChecksumSHA256")
+        if remote_checksum and "-" not in remote_checksum:
+            local_checksum = self.precomputed_checksum(media)
+            if local_checksum and local_checksum != remote_checksum:
+                return False
+
+        if self.index is not None:
+            self.index.add(media.key, size)
         return True
 
     def file_in_folder(self, path: str) -> str:
         # checks if path exists and is not an empty folder
         if not path.endswith("/"):
             path = path + "/"
+        if self.index is not None and (known_key := self.index.first_in_folder(path)):
+            return known_key
         resp = self.s3.list_objects(Bucket=self.bucket, Prefix=path, Delimiter="/", MaxKeys=1)
         if "Contents" in resp:
+            if self.index is not None:
+                self.index.add(resp["Contents"][0]["Key"], resp["Contents"][0].get("Size"))
             return resp["Contents"][0]["Key"]
         return False
+
+    def add_to_index(self, media: Media) -> None:
+        if self.index is None:
+            return
+        try:
+            size = os.path.getsize(media.filename)
+        except OSError:
+            size = None
+        self.index.add(media.key, size)
+
+    def fill_dedup_index(self, prefix: str = NO_DUPLICATES_FOLDER) -> int:
+        """
+        Adds every object under @prefix to the dedup index, with a paginated listing of the bucket.
+        Returns how many objects were listed.
+        """
+        logger.info(f"Filling S3 dedup index {self.dedup_index} with the objects in {self.bucket}/{prefix}")
+        total = 0
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            total += self.index.add_many((obj["Key"], obj.get("Size")) for obj in page.get("Contents", []))
+        logger.info(f"S3 dedup index now has {len(self.index)} objects, {total} listed from {self.bucket}/{prefix}")
+        return total
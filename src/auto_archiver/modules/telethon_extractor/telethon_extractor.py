@@ -22,7 +22,7 @@ from auto_archiver.utils.custom_logger import logger
 
 from auto_archiver.core import Extractor
 from auto_archiver.core import Metadata, Media
-from auto_archiver.utils import random_str
+from auto_archiver.utils import random_str, truncate
 
 
 class TelethonExtractor(Extractor):
@@ -173,7 +173,7 @@ class TelethonExtractor(Extractor):
                     )
                     return False
 
-                logger.debug(f"Got post {post=}")
+                logger.opt(lazy=True).debug("Got post post={}", lambda: truncate(repr(post), 1000))
                 if post is None:
                     return False
 
@@ -209,7 +209,9 @@ class TelethonExtractor(Extractor):
                     filename_dest = os.path.join(self.tmp_dir, f"{chat}_{group_id}", str(mp.id))
                     filename = self.client.download_media(mp.media, filename_dest)
                     if not filename:
-                        logger.debug(f"Empty media found, skipping {str(mp)=}")
+                        logger.opt(lazy=True).debug(
+                            "Empty media found, skipping mp={}", lambda: truncate(str(mp), 1000)
+                        )
                         continue
                     result.add_media(Media(filename))
 
@@ -164,12 +164,14 @@ class WaczExtractorEnricher(Enricher, Extractor):
             logger.warning(f"Unable to locate and pages.jsonl  {jsonl_fn=}")
         else:
             logger.info(f"Parsing pages.jsonl  {jsonl_fn=}")
+            texts = []
             with jsonlines.open(jsonl_fn) as reader:
                 for obj in reader:
                     if "title" in obj:
                         to_enrich.set_title(obj["title"])
                     if "text" in obj:
-                        to_enrich.set_content(obj["text"])
+                        texts.append(obj["text"])
+            to_enrich.extend_content(texts)
 
         return True
 
@@ -44,6 +44,7 @@ class WhisperEnricher(Enricher):
 
         job_results = self.check_jobs(job_results)
 
+        transcripts = []
         for i, m in enumerate(to_enrich.media):
             if m.is_video() or m.is_audio():
                 job_id = to_enrich.media[i].get("whisper_model", {}).get("job_id")
@@ -62,7 +63,8 @@ class WhisperEnricher(Enricher):
                 if job_results[job_id]:
                     for k, v in job_results[job_id].items():
                         if "_text" in k and len(v):
-                            to_enrich.set_content(f"\n[automatic video transcript]: {v}")
+                            transcripts.append(f"\n[automatic video transcript]: {v}")
+        to_enrich.extend_content(transcripts)
 
     def submit_job(self, media: Media):
         s3_url = self.s3.get_cdn_url(media)
@@ -24,7 +24,7 @@ def extract_log_data(record):
     subset["loc"] = extract_location(record)
 
     # This is where logger.contextualize() parameters can be added to the output
-    for extra_key in ["trace", "url", "worksheet", "row"]:
+    for extra_key in ["trace", "url", "worksheet", "row", "spool_depth"]:
         if extra_val := record.get("extra", {}).get(extra_key):
             subset[extra_key] = extra_val
 
@@ -49,9 +49,38 @@ def serialize(record):
     return json.dumps(extract_log_data(record), ensure_ascii=False, default=type_serializer)
 
 
+class LazySerialized:
+    """
+    Stands in for a serialized form of a log record, only serializing it when a sink formats it.
+
+    Records can be filtered out by every sink's level or filter, so serializing in the patcher
+    wastes two json.dumps per record. The result is cached, so sinks sharing a record serialize it once.
+    """
+
+    __slots__ = ("_record", "_serializer", "_value")
+
+    def __init__(self, record, serializer):
+        self._record = record
+        self._serializer = serializer
+        self._value = None
+
+    def __str__(self) -> str:
+        if self._value is None:
+            self._value = self._serializer(self._record)
+            self._record = None  # break the record -> extra -> self cycle
+        return self._value
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+    def __reduce__(self):
+        # enqueued sinks pickle records, send the plain string across
+        return (str, (str(self),))
+
+
 def patching(record):
-    record["extra"]["serialized"] = serialize(record)
-    record["extra"]["serialize_for_console"] = serialize_for_console(record)
+    record["extra"]["serialized"] = LazySerialized(record, serialize)
+    record["extra"]["serialize_for_console"] = LazySerialized(record, serialize_for_console)
 
 
 def format_for_human_readable_console():
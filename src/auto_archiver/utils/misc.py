@@ -36,6 +36,13 @@ def dump_payload(p):
     return json.dumps(p, ensure_ascii=False, indent=4, cls=DateTimeEncoder)
 
 
+def truncate(text: str, max_len: int = 200) -> str:
+    # caps potentially huge strings (eg: reprs, titles) before they reach the logs
+    if text is None or len(text) <= max_len:
+        return text
+    return f"{text[:max_len]}...(+{len(text) - max_len} chars)"
+
+
 def update_nested_dict(dictionary, update_dict):
     # takes 2 dicts and overwrites the first with the second only on the changed values
     for key, value in update_dict.items():
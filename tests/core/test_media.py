@@ -2,6 +2,10 @@
 Tests for the Media class from auto_archiver.core.media
 """
 
+import pickle
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
 from auto_archiver.core.media import Media
@@ -36,6 +40,61 @@ class TestMediaBasics:
         assert len(media.urls) == 2
 
 
+class TestMediaCompact:
+    """Test the slotted, interned-key representation."""
+
+    def test_media_has_no_instance_dict(self):
+        media = Media(filename="test.mp4")
+        assert not hasattr(media, "__dict__")
+        with pytest.raises(AttributeError):
+            media.not_a_field = 1
+
+    def test_property_keys_are_interned(self):
+        key = "".join(["some", "_key"])
+        media = Media(filename="test.mp4").set(key, 1)
+        from_dict = Media.from_dict({"filename": "test.mp4", "properties": {"".join(["some", "_key"]): 1}})
+        assert next(iter(media.properties)) is next(iter(from_dict.properties))
+
+    def test_json_schema_unchanged(self):
+        media = Media(filename="test.mp4", _key="k", urls=["u"], properties={"id": "x"})
+        assert media.to_dict() == {
+            "filename": "test.mp4",
+            "_key": "k",
+            "urls": ["u"],
+            "properties": {"id": "x"},
+            "_mimetype": None,
+        }
+        assert Media.from_json(media.to_json()) == media
+
+    def test_pickle_roundtrip(self):
+        media = Media(filename="test.mp4", _key="k").set("thumbnail", Media(filename="thumb.jpg"))
+        assert pickle.loads(pickle.dumps(media)) == media
+
+    def test_unpickle_dict_state(self):
+        # written by the Media dataclass before it was slotted, whose pickles carry a plain __dict__
+        legacy_pickle = (
+            b"\x80\x04\x95\xdb\x00\x00\x00\x00\x00\x00\x00\x8c\x18auto_archiver.core.media\x94\x8c\x05Media"
+            b"\x94\x93\x94)\x81\x94}\x94(\x8c\x08filename\x94\x8c\tvideo.mp4\x94\x8c\x04_key\x94\x8c\x11"
+            b"archive/video.mp4\x94\x8c\x04urls\x94]\x94\x8c)https://cdn.example.com/archive/video.mp4\x94a\x8c"
+            b"\nproperties\x94}\x94\x8c\x02id\x94\x8c\nscreenshot\x94s\x8c\t_mimetype\x94\x8c\tvideo/mp4\x94"
+            b"\x8c\x07_stored\x94\x89ub."
+        )
+        media = pickle.loads(legacy_pickle)
+        assert media == Media(
+            filename="video.mp4",
+            _key="archive/video.mp4",
+            urls=["https://cdn.example.com/archive/video.mp4"],
+            properties={"id": "screenshot"},
+            _mimetype="video/mp4",
+        )
+        assert media._stored is False
+
+        # fields added since are given their defaults
+        media = Media.__new__(Media)
+        media.__setstate__({"filename": "test.mp4", "_key": "k"})
+        assert (media.urls, media.properties, media._mimetype) == ([], {}, None)
+
+
 class TestMediaMimetype:
     """Test mimetype detection and handling."""
 
@@ -102,6 +161,104 @@ class TestMediaStore:
         media.store(metadata, url="https://example.com", storages=[mock_storage])
         mock_storage.store.assert_called_once()
 
+    @pytest.fixture
+    def make_storage(self):
+        """Makes fake storages recording their calls, the first storage sets a key the others reuse."""
+
+        def make_storage(name, max_concurrent_uploads, delays=None):
+            storage = Mock(spec=["store", "max_concurrent_uploads"])
+            storage.max_concurrent_uploads = max_concurrent_uploads
+            storage.active, storage.peak = 0, 0
+            lock = threading.Lock()
+
+            def store(media, url, metadata=None):
+                with lock:
+                    storage.active += 1
+                    storage.peak = max(storage.peak, storage.active)
+                if media.key is None:
+                    media._key = f"{name}/{media.filename}"
+                time.sleep((delays or {}).get(media.filename, 0.01))
+                media.add_url(f"{name}://{media.key}")
+                with lock:
+                    storage.active -= 1
+
+            storage.store.side_effect = store
+            return storage
+
+        return make_storage
+
+    def test_store_concurrently_keeps_keys_and_url_order(self, make_storage):
+        first = make_storage("first", 3, delays={"0.jpg": 0.05})
+        second = make_storage("second", 1)
+        media = [Media(filename=f"{i}.jpg") for i in range(6)]
+        media[0].set("thumbnails", [Media(filename="thumb.jpg")])
+
+        parent = Media(filename="parent.jpg")
+        parent.set("frames", media)
+        parent.store(Mock(), storages=[first, second])
+
+        for m in [parent, *media, media[0].get("thumbnails")[0]]:
+            assert m.key == f"first/{m.filename}"
+            assert m.urls == [f"first://first/{m.filename}", f"second://first/{m.filename}"]
+        assert first.peak > 1
+        assert first.peak <= 3
+        assert second.peak == 1
+
+    def test_store_concurrently_stores_shared_media_once(self, make_storage):
+        storage = make_storage("s", 4)
+        thumb = Media(filename="thumb.jpg")
+        media = Media(filename="video.mp4")
+        media.set("thumbnail", thumb).set("thumbnails", [thumb])
+        media.store(Mock(), storages=[storage])
+        assert storage.store.call_count == 2
+        assert thumb.urls == ["s://s/thumb.jpg"]
+
+    def test_store_concurrently_raises_errors(self, make_storage):
+        storage = make_storage("s", 2)
+        failing = Media(filename="failing.jpg")
+        failing.set("other", Media(filename="other.jpg"))
+        side_effect = storage.store.side_effect
+
+        def store(media, url, metadata=None):
+            if media is failing:
+                raise ValueError("upload failed")
+            side_effect(media, url, metadata=metadata)
+
+        storage.store.side_effect = store
+        with pytest.raises(ValueError, match="upload failed"):
+            failing.store(Mock(), storages=[storage])
+        # other uploads still complete
+        assert failing.get("other").urls == ["s://s/other.jpg"]
+
+    def test_store_many_gets_all_media_after_previous_storages(self, make_storage):
+        from auto_archiver.core import Storage
+
+        class BulkStorage(Storage):
+            name = "bulk"
+
+            def __init__(self):
+                self.batches = []
+
+            def store_many(self, media_list, url, metadata=None):
+                self.batches.append([(m.filename, m.key) for m in media_list])
+                for m in media_list:
+                    m.add_url(f"bulk://{m.key}")
+
+            def get_cdn_url(self, media):
+                pass
+
+            def uploadf(self, file, key, **kwargs):
+                pass
+
+        first, bulk, last = make_storage("first", 2), BulkStorage(), make_storage("last", 2)
+        media = Media(filename="video.mp4")
+        media.set("thumbnail", Media(filename="thumb.jpg"))
+        media.store(Mock(), storages=[first, bulk, last])
+
+        assert bulk.batches == [[("video.mp4", "first/video.mp4"), ("thumb.jpg", "first/thumb.jpg")]]
+        for m in media.all_inner_media(include_self=True):
+            assert m.urls == [f"first://first/{m.filename}", f"bulk://first/{m.filename}", f"last://first/{m.filename}"]
+
 
 class TestMediaInnerMedia:
     """Test nested media retrieval."""
@@ -0,0 +1,125 @@
+import os
+
+import pytest
+
+from auto_archiver.core import Media, Metadata, Storage
+from auto_archiver.core.module import ModuleFactory
+from auto_archiver.core.storage_spool import StorageSpool
+
+
+class SpoolingStorage(Storage):
+    name = "spooling_storage"
+
+    def __init__(self, fail_times: int = 0):
+        self.uploaded = []
+        self.fail_times = fail_times
+
+    def can_spool(self):
+        return True
+
+    def get_cdn_url(self, media):
+        return f"https://cdn.example.com/{media.key}"
+
+    def upload(self, media, **kwargs):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("connection reset")
+        with open(media.filename) as f:
+            self.uploaded.append((media.key, media.mimetype, media.get("hash"), f.read()))
+        return True
+
+    def uploadf(self, file, key, **kwargs):
+        pass
+
+
+@pytest.fixture
+def spooling_storage(tmp_path):
+    def _spooling_storage(fail_times=0):
+        storage = SpoolingStorage(fail_times)
+        storage.config_setup(
+            {
+                "steps": {"storages": [SpoolingStorage.name]},
+                SpoolingStorage.name: {
+                    "path_generator": "flat",
+                    "filename_generator": "random",
+                    "spool_dir": str(tmp_path / "spool"),
+                },
+            }
+        )
+        storage.module_factory = ModuleFactory()
+        return storage
+
+    return _spooling_storage
+
+
+@pytest.fixture
+def media(tmp_path):
+    filename = tmp_path / "tmp" / "image.jpg"
+    filename.parent.mkdir()
+    filename.write_text("image content")
+    return Media(filename=str(filename), _key="folder/image.jpg", _mimetype="image/jpeg").set("hash", "SHA-256:abc")
+
+
+def test_store_returns_url_before_uploading(spooling_storage, media):
+    storage = spooling_storage()
+    storage.store(media, "https://example.com", Metadata())
+    assert media.urls == ["https://cdn.example.com/folder/image.jpg"]
+
+    # the original can go away (eg: the item's tmp_dir), the spool has its own copy
+    os.remove(media.filename)
+    assert storage.flush() == 0
+    assert storage.uploaded == [("folder/image.jpg", "image/jpeg", "SHA-256:abc", "image content")]
+    assert len(storage.spool) == 0
+    assert os.listdir(storage.spool.folder) == ["spool.db"]
+
+
+def test_failed_upload_stays_queued(spooling_storage, media, tmp_path):
+    storage = spooling_storage(fail_times=1)
+    # no background workers, so only flush uploads
+    spool = StorageSpool(storage, str(tmp_path / "spool"), workers=0)
+    spool.enqueue(media)
+
+    assert spool.flush() == 1
+    attempts, next_attempt, last_error = spool.db.execute(
+        "SELECT attempts, next_attempt, last_error FROM jobs"
+    ).fetchone()
+    assert (attempts, last_error) == (1, "connection reset")
+    assert next_attempt > 0
+    assert storage.uploaded == []
+
+    # flush ignores the retry delay
+    assert spool.flush() == 0
+    assert [key for key, *_ in storage.uploaded] == ["folder/image.jpg"]
+
+
+def test_pending_uploads_survive_restarts(spooling_storage, media, tmp_path):
+    storage = spooling_storage()
+    spool = StorageSpool(storage, str(tmp_path / "spool"), workers=0)
+    spool.enqueue(media)
+    spool.db.close()
+
+    restarted = StorageSpool(storage, str(tmp_path / "spool"), workers=0)
+    assert len(restarted) == 1
+    assert restarted.flush() == 0
+    assert [key for key, *_ in storage.uploaded] == ["folder/image.jpg"]
+
+
+def test_background_workers_upload(spooling_storage, media):
+    storage = spooling_storage()
+    storage.spool.enqueue(media)
+    with storage.spool.cond:
+        assert storage.spool.cond.wait_for(lambda: storage.uploaded, timeout=5)
+    assert [key for key, *_ in storage.uploaded] == ["folder/image.jpg"]
+
+
+def test_no_spool_without_spool_dir_or_support(spooling_storage, media, mocker):
+    storage = spooling_storage()
+    storage.spool_dir = None
+    assert storage.spool is None
+    assert storage.flush() == 0
+
+    storage = spooling_storage()
+    mocker.patch.object(storage, "can_spool", return_value=False)
+    storage.store(media, "https://example.com", Metadata())
+    assert storage.spool is None
+    assert [key for key, *_ in storage.uploaded] == ["folder/image.jpg"]
@@ -1,5 +1,6 @@
 import pytest
 
+from auto_archiver.core import Metadata
 from auto_archiver.modules.api_db import AAApiDb
 
 
@@ -26,7 +27,7 @@ def test_fetch_no_cache(api_db, metadata):
 
 def test_fetch_fail_status(api_db, metadata, mocker):
     # Test response fail in fetch method
-    mock_get = mocker.patch("auto_archiver.modules.api_db.api_db.requests.get")
+    mock_get = mocker.patch.object(api_db.session, "get")
     mock_get.return_value.status_code = 400
     mock_get.return_value.json.return_value = {}
     mock_error = mocker.patch("auto_archiver.utils.custom_logger.logger.error")
@@ -36,7 +37,7 @@ def test_fetch_fail_status(api_db, metadata, mocker):
 
 def test_fetch(api_db, metadata, mocker):
     # Test successful fetch method
-    mock_get = mocker.patch("auto_archiver.modules.api_db.api_db.requests.get")
+    mock_get = mocker.patch.object(api_db.session, "get")
     mock_datetime = mocker.patch("auto_archiver.core.metadata.datetime.datetime")
     mock_datetime.now.return_value = "2021-01-01T00:00:00"
     mock_get.return_value.status_code = 200
@@ -54,7 +55,7 @@ def test_fetch(api_db, metadata, mocker):
 
 
 def test_done_success(api_db, metadata, mocker):
-    mock_post = mocker.patch("auto_archiver.modules.api_db.api_db.requests.post")
+    mock_post = mocker.patch.object(api_db.session, "post")
     mock_post.return_value.status_code = 201
     api_db.done(metadata)
     mock_post.assert_called_once()
@@ -68,5 +69,81 @@ def test_done_success(api_db, metadata, mocker):
             "tags": ["[", "]"],
             "result": '{"status": "no archiver", "metadata": {"_processed_at": "2021-01-01T00:00:00", "url": "https://example.com"}, "media": []}',
         },
-        headers={"Authorization": "Bearer test-token"},
     )
+    assert api_db.session.headers["Authorization"] == "Bearer test-token"
+
+
+def test_fetch_caches_results(api_db, metadata, mocker):
+    mock_get = mocker.patch.object(api_db.session, "get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = []
+    assert api_db.fetch(metadata) is False
+    assert api_db.fetch(metadata) is False
+    mock_get.assert_called_once()
+
+    # once archived, the url is looked up again
+    mocker.patch.object(api_db.session, "post").return_value.status_code = 201
+    api_db.done(metadata)
+    assert api_db.fetch(metadata) is False
+    assert mock_get.call_count == 2
+
+
+def test_fetch_caches_only_the_chosen_result(api_db, metadata, mocker):
+    mock_get = mocker.patch.object(api_db.session, "get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = [
+        {"result": {"status": "done", "metadata": {"url": "https://example.com"}}},
+        {"result": {"status": "done", "metadata": {"url": "https://example.com", "title": "complete"}}},
+    ]
+    assert api_db.fetch(metadata).get_title() == "complete"
+    assert api_db.cache.get(metadata.get_url()) == mock_get.return_value.json.return_value[1]["result"]
+    assert api_db.fetch(metadata).get_title() == "complete"
+    mock_get.assert_called_once()
+
+
+def test_fetch_cache_expires(api_db, metadata, mocker):
+    mock_get = mocker.patch.object(api_db.session, "get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = []
+    api_db.fetch(metadata)
+    mock_time = mocker.patch("auto_archiver.modules.api_db.api_db.time.monotonic")
+    mock_time.return_value = api_db.cache.entries[metadata.get_url()][0] + 1
+    api_db.fetch(metadata)
+    assert mock_get.call_count == 2
+
+
+def test_result_cache_evicts_least_recently_used():
+    from auto_archiver.modules.api_db.api_db import ResultCache
+
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1, ttl=60)
+    cache.put("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    cache.put("c", 3, ttl=60)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_prefetch(api_db, mocker):
+    mock_post = mocker.patch.object(api_db.session, "post")
+    mock_post.return_value.status_code = 200
+    mock_post.return_value.json.return_value = {"https://example.com/1": [{"result": {"status": "done"}}]}
+    mock_get = mocker.patch.object(api_db.session, "get")
+
+    api_db.prefetch(["https://example.com/1", "https://example.com/2", "https://example.com/1"])
+    mock_post.assert_called_once_with(
+        "https://api.example.com/url/batch-search",
+        json={"urls": ["https://example.com/1", "https://example.com/2"], "limit": 15},
+        headers={"accept": "application/json"},
+    )
+    assert api_db.fetch(Metadata().set_url("https://example.com/1")).status == "done"
+    assert api_db.fetch(Metadata().set_url("https://example.com/2")) is False
+    mock_get.assert_not_called()
+
+
+def test_prefetch_without_bulk_endpoint(api_db, mocker):
+    mock_post = mocker.patch.object(api_db.session, "post")
+    mock_post.return_value.status_code = 404
+    api_db.prefetch(["https://example.com/1"])
+    api_db.prefetch(["https://example.com/2"])
+    mock_post.assert_called_once()
+    assert not api_db.bulk_supported
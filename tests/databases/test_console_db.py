@@ -60,3 +60,13 @@ class TestConsoleDb:
             console_db.done(item, cached=True)
 
         assert "DONE" in caplog.text
+
+    def test_done_logs_bounded_summary(self, console_db, make_item, caplog):
+        """Test that done() does not dump the whole item into the logs."""
+        item = make_item("https://example.com/test", api_data={"huge": "x" * 100_000})
+
+        with caplog.at_level("INFO"):
+            console_db.done(item)
+
+        assert "https://example.com/test" in caplog.text
+        assert "x" * 1000 not in caplog.text
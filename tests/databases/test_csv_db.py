@@ -1,5 +1,9 @@
+import csv
+
+import pytest
+
 from auto_archiver.modules.csv_db import CSVDb
-from auto_archiver.core import Metadata
+from auto_archiver.core import Metadata, Media
 
 
 def test_store_item(tmp_path, setup_module):
@@ -17,6 +21,7 @@ def test_store_item(tmp_path, setup_module):
     )
 
     db.done(item)
+    db.cleanup()
 
     with open(temp_db, "r", encoding="utf-8") as f:
         assert (
@@ -26,3 +31,63 @@ def test_store_item(tmp_path, setup_module):
 
     # TODO: csv db doesn't have a fetch method - need to add it (?)
     # assert db.fetch(item) == item
+
+
+def test_store_items_in_fields(tmp_path, setup_module):
+    """Tests writing the configured fields as columns, keeping the file open between items"""
+    temp_db = tmp_path / "temp_db.csv"
+    db = setup_module(
+        CSVDb, {"csv_file": temp_db.as_posix(), "fields": ["url", "title", "status", "tags", "media_urls"]}
+    )
+    for i in range(2):
+        item = Metadata().set_url(f"http://example.com/{i}").set_title(f"Example {i}").success("my-archiver")
+        item.set("tags", ["a", "b"]).add_media(Media("file.jpg", urls=["http://cdn/1.jpg", "http://cdn/2.jpg"]))
+        db.done(item)
+    # nothing written yet
+    assert temp_db.read_text() == ""
+    db.cleanup()
+
+    with open(temp_db, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["url", "title", "status", "tags", "media_urls"],
+        [
+            "http://example.com/0",
+            "Example 0",
+            "my-archiver: success",
+            '["a", "b"]',
+            "http://cdn/1.jpg\nhttp://cdn/2.jpg",
+        ],
+        [
+            "http://example.com/1",
+            "Example 1",
+            "my-archiver: success",
+            '["a", "b"]',
+            "http://cdn/1.jpg\nhttp://cdn/2.jpg",
+        ],
+    ]
+
+
+def test_sync_interval_zero_writes_each_row(tmp_path, setup_module):
+    temp_db = tmp_path / "temp_db.csv"
+    db = setup_module(CSVDb, {"csv_file": temp_db.as_posix(), "fields": ["url"], "sync_interval": 0})
+    db.done(Metadata().set_url("http://example.com"))
+    assert temp_db.read_text().splitlines() == ["url", "http://example.com"]
+
+
+def test_parquet_output(tmp_path, setup_module):
+    pq = pytest.importorskip("pyarrow.parquet")
+    db = setup_module(
+        CSVDb,
+        {
+            "csv_file": (tmp_path / "db.csv").as_posix(),
+            "fields": ["url", "media_count"],
+            "parquet_dir": (tmp_path / "parquet").as_posix(),
+            "parquet_batch_size": 2,
+        },
+    )
+    for i in range(3):
+        db.done(Metadata().set_url(f"http://example.com/{i}"))
+    db.cleanup()
+    table = pq.read_table(tmp_path / "parquet")
+    assert table.to_pylist() == [{"url": f"http://example.com/{i}", "media_count": "0"} for i in range(3)]
@@ -173,3 +173,79 @@ def test_done_missing_media(gsheets_db, metadata, mock_gworksheet, mocker):
 def test_safe_status_update(gsheets_db, metadata, mock_gworksheet):
     gsheets_db._safe_status_update(metadata, "Test status")
     mock_gworksheet.set_cell.assert_called_once_with(1, "status", "Test status")
+
+
+def test_buffered_writes_are_coalesced(gsheets_db, mock_metadata, mock_gworksheet, mocker):
+    gsheets_db.write_flush_interval = 60
+    mock_gworksheet.get_row.return_value = []
+    mocker.patch.object(mock_metadata, "get_all_media", return_value=[])
+
+    gsheets_db.started(mock_metadata)
+    gsheets_db.done(mock_metadata)
+    mock_gworksheet.set_cell.assert_not_called()
+    mock_gworksheet.batch_set_cell.assert_not_called()
+
+    gsheets_db.flush_writes()
+    mock_gworksheet.set_cell.assert_not_called()
+    updates = mock_gworksheet.batch_set_cell.call_args[0][0]
+    # 'Archive in progress' was replaced before being sent
+    assert [u for u in updates if u[1] == "status"] == [(1, "status", "done")]
+    assert gsheets_db.write_buffers == {}
+
+
+def test_buffered_writes_flush_at_size(gsheets_db, mock_gworksheet):
+    gsheets_db.write_flush_interval, gsheets_db.write_flush_size = 60, 3
+    buffer = gsheets_db._write_buffer(mock_gworksheet)
+    buffer.set_many([(2, "status", "a"), (3, "status", "b")])
+    buffer.set_cell(2, "status", "c")
+    mock_gworksheet.batch_set_cell.assert_not_called()
+    buffer.set_cell(4, "status", "d")
+    mock_gworksheet.batch_set_cell.assert_called_once_with([(2, "status", "c"), (3, "status", "b"), (4, "status", "d")])
+
+
+def test_aborted_flushes_buffered_writes(gsheets_db, mock_metadata, mock_gworksheet):
+    gsheets_db.write_flush_interval = 60
+    gsheets_db.started(mock_metadata)
+    gsheets_db.aborted(mock_metadata)
+    mock_gworksheet.set_cell.assert_called_once_with(1, "status", "")
+
+
+def test_write_quota_token_bucket(mocker):
+    from auto_archiver.modules.gsheet_feeder_db.write_buffer import TokenBucket
+
+    now = [0.0]
+    mocker.patch("time.monotonic", side_effect=lambda: now[0])
+    sleep = mocker.patch("time.sleep")
+    bucket = TokenBucket(per_minute=60, capacity=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    # empty: waits for the next token, then the one after that
+    assert bucket.acquire() == pytest.approx(1)
+    assert bucket.acquire() == pytest.approx(2)
+    assert sleep.call_count == 2
+
+    now[0] = 10.0
+    # refilled up to its capacity
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+
+
+def test_failed_flushes_keep_the_writes(gsheets_db, mock_gworksheet, mocker):
+    mocker.patch("time.sleep")
+    mock_gworksheet.batch_set_cell.side_effect = ConnectionError("quota exceeded")
+    buffer = gsheets_db._write_buffer(mock_gworksheet)
+
+    # a write that's due to be sent doesn't raise when sending fails, it stays pending
+    buffer.set_many([(2, "status", "done"), (2, "archive", "https://example.com/archive")])
+    assert buffer.pending == {(2, "status"): "done", (2, "archive"): "https://example.com/archive"}
+
+    gsheets_db.flush_writes()
+    assert gsheets_db.write_buffers == {mock_gworksheet: buffer}
+
+    mock_gworksheet.batch_set_cell.side_effect = None
+    gsheets_db.flush_writes()
+    mock_gworksheet.batch_set_cell.assert_called_with(
+        [(2, "status", "done"), (2, "archive", "https://example.com/archive")]
+    )
+    assert gsheets_db.write_buffers == {}
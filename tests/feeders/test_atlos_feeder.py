@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from auto_archiver.modules.atlos_feeder_db_storage import AtlosFeederDbStorage as AtlosFeeder
 
@@ -24,12 +26,12 @@ def atlos_feeder(setup_module, mocker) -> AtlosFeeder:
         "api_token": "abc123",
         "atlos_url": "https://platform.atlos.org",
     }
-    mocker.patch("requests.Session")
-    atlos_feeder = setup_module("atlos_feeder_db_storage", configs)
     fake_session = mocker.MagicMock()
     # Configure the default response to have no results so that __iter__ terminates
     fake_session.get.return_value = FakeAPIResponse({"next": None, "results": []})
-    atlos_feeder.session = fake_session
+    # the same fake for the feeder's session and the one the pages are fetched with
+    mocker.patch("requests.Session", return_value=fake_session)
+    atlos_feeder = setup_module("atlos_feeder_db_storage", configs)
     return atlos_feeder
 
 
@@ -121,6 +123,31 @@ def test_atlos_feeder_multiple_pages(atlos_feeder, mock_atlos_api):
     assert items[1].get("atlos_id") == 20
 
 
+def test_atlos_feeder_prefetches_next_page(atlos_feeder, mock_atlos_api):
+    """Test the next page is requested before the current page's items are consumed."""
+    item = {
+        "metadata": {"auto_archiver": {"processed": False}},
+        "visibility": "visible",
+        "status": "complete",
+    }
+    mock_atlos_api(
+        [
+            {"next": "cursor2", "results": [{**item, "source_url": "http://example1.com", "id": 10}]},
+            {"next": None, "results": [{**item, "source_url": "http://example2.com", "id": 20}]},
+        ]
+    )
+
+    items = iter(atlos_feeder)
+    assert next(items).get("atlos_id") == 10
+    # wait for the background request, then check which page it asked for
+    for _ in range(100):
+        if atlos_feeder.session.get.call_count == 2:
+            break
+        time.sleep(0.01)
+    assert atlos_feeder.session.get.call_args[1]["params"] == {"cursor": "cursor2"}
+    assert [m.get("atlos_id") for m in items] == [20]
+
+
 def test_atlos_feeder_no_results(atlos_feeder, mock_atlos_api):
     """Test iteration stops when no results are returned."""
     mock_atlos_api([{"next": None, "results": []}])
@@ -133,3 +160,14 @@ def test_atlos_feeder_http_error(atlos_feeder, mocker):
     atlos_feeder.session.get.side_effect = [fake_response]
     with pytest.raises(Exception, match="HTTP error"):
         list(atlos_feeder)
+
+
+def test_atlos_feeder_fetches_pages_with_its_own_session(atlos_feeder, mocker):
+    """Test pages are fetched in the background with a session of their own, not the one used for uploads."""
+    pages_session = mocker.MagicMock()
+    pages_session.get.return_value = FakeAPIResponse({"next": None, "results": []})
+    mocker.patch("requests.Session", return_value=pages_session)
+    assert list(atlos_feeder) == []
+    pages_session.get.assert_called_once()
+    pages_session.close.assert_called_once()
+    atlos_feeder.session.get.assert_not_called()
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 
@@ -59,3 +61,86 @@ def test_csv_feeder_column_by_name(header_csv_file, setup_module):
     assert len(urls) == 2
     assert urls[0].get_url() == "https://example.com/1/"
     assert urls[1].get_url() == "https://example.com/2/"
+
+
+@pytest.fixture
+def big_csv_file(tmp_path):
+    filename = tmp_path / "urls.csv"
+    rows = [f"https://example.com/{i % 30}/,row {i}" for i in range(40)]
+    filename.write_text("url,data\n" + "\n".join(rows) + "\n")
+    return str(filename)
+
+
+def test_csv_feeder_resumes_from_checkpoint(big_csv_file, setup_module, tmp_path):
+    from auto_archiver.modules.csv_feeder.csv_feeder import CSVFeeder
+
+    config = {"files": [big_csv_file], "checkpoint_file": str(tmp_path / "checkpoint.json")}
+    feeder = setup_module(CSVFeeder, config)
+    iterator = iter(feeder)
+    first = [next(iterator).get_url() for _ in range(5)]
+    assert first == [f"https://example.com/{i}/" for i in range(5)]
+    # interrupted while archiving the 5th row, which is read again by the next run
+    iterator.close()
+
+    urls = [m.get_url() for m in setup_module(CSVFeeder, config)]
+    assert urls == [f"https://example.com/{i % 30}/" for i in range(4, 40)]
+    # a finished file has nothing left, until rows are appended to it
+    assert list(setup_module(CSVFeeder, config)) == []
+    with open(big_csv_file, "a") as f:
+        f.write("https://example.com/new/,row 40\n")
+    assert [m.get_url() for m in setup_module(CSVFeeder, config)] == ["https://example.com/new/"]
+
+
+def test_csv_feeder_shards_split_the_input(big_csv_file, setup_module):
+    from auto_archiver.modules.csv_feeder.csv_feeder import CSVFeeder
+
+    shards = [
+        [m.get_url() for m in setup_module(CSVFeeder, {"files": [big_csv_file], "shard": f"{i}/3"})] for i in range(3)
+    ]
+    everything = [m.get_url() for m in setup_module(CSVFeeder, {"files": [big_csv_file]})]
+    assert sorted(url for shard in shards for url in shard) == sorted(everything)
+    # the same url is always in the same shard
+    for shard in shards:
+        assert not set(shard) & set(everything).difference(shard)
+
+
+def test_csv_feeder_invalid_shard(big_csv_file, setup_module):
+    from auto_archiver.core.consts import SetupError
+    from auto_archiver.modules.csv_feeder.csv_feeder import CSVFeeder
+
+    with pytest.raises(SetupError):
+        setup_module(CSVFeeder, {"files": [big_csv_file], "shard": "3/3"})
+
+
+def test_csv_feeder_deduplicates(big_csv_file, setup_module, tmp_path):
+    from auto_archiver.modules.csv_feeder.csv_feeder import CSVFeeder
+
+    # a filter far too small for the input, so most lookups are false positives that go to disk
+    config = {"files": [big_csv_file], "deduplicate": True, "dedup_capacity": 2, "dedup_error_rate": 0.5}
+    urls = [m.get_url() for m in setup_module(CSVFeeder, config)]
+    assert urls == [f"https://example.com/{i}/" for i in range(30)]
+
+    # urls before the checkpoint still count as seen after a restart
+    config["checkpoint_file"] = str(tmp_path / "checkpoint.json")
+    iterator = iter(setup_module(CSVFeeder, config))
+    [next(iterator) for _ in range(11)]
+    iterator.close()
+    urls = [m.get_url() for m in setup_module(CSVFeeder, config)]
+    assert urls == [f"https://example.com/{i}/" for i in range(10, 30)]
+
+
+def test_url_deduplicator():
+    from auto_archiver.modules.csv_feeder.url_dedup import UrlDeduplicator
+
+    dedup = UrlDeduplicator(capacity=1, error_rate=0.5)
+    assert [dedup.seen(url) for url in ["a", "b", "c", "a", "d", "b"]] == [False, False, False, True, False, True]
+    dedup.close()
+    assert not os.path.exists(dedup.db_file)
+
+
+def test_csv_feeder_with_checkpoint_cant_be_read_ahead(big_csv_file, setup_module, tmp_path):
+    from auto_archiver.modules.csv_feeder.csv_feeder import CSVFeeder
+
+    assert setup_module(CSVFeeder, {"files": [big_csv_file]}).can_read_ahead()
+    feeder = setup_module(CSVFeeder, {"files": [big_csv_file], "checkpoint_file": str(tmp_path / "checkpoint.json")})
+    assert not feeder.can_read_ahead()
@@ -1,3 +1,5 @@
+import json
+import threading
 from typing import Type
 
 import gspread
@@ -72,6 +74,7 @@ class MockWorksheet:
 
     def __init__(self):
         self.wks = self.SheetSheet()
+        self.refreshed = []
 
     def count_rows(self):
         if not self.rows:
@@ -86,6 +89,12 @@ class MockWorksheet:
         matching = next((r for r in self.rows if r["row"] == row), {})
         return matching.get(col_name, default)
 
+    def get_col(self, col_name, first_row=1):
+        return [self.get_cell(row, col_name) for row in range(first_row, self.count_rows() + 1)]
+
+    def refresh_col(self, col_name, first_row, last_row):
+        self.refreshed.append((col_name, first_row, last_row))
+
 
 def test__process_rows(gsheet_feeder: GsheetsFeederDB):
     testworksheet = MockWorksheet()
@@ -95,6 +104,40 @@ def test__process_rows(gsheet_feeder: GsheetsFeederDB):
     assert metadata_items[0].get("url") == "http://example.com"
 
 
+def test__process_rows_rereads_status_in_windows(gsheet_feeder: GsheetsFeederDB, mocker):
+    gsheet_feeder.status_window_size = 2
+    testworksheet = MockWorksheet()
+    list(gsheet_feeder._process_rows(testworksheet))
+    # rows 2 and 3 share a window, rows 4 (no url) and 6 (has a status) need no re-read
+    assert testworksheet.refreshed == [("status", 2, 3), ("status", 5, 6)]
+
+
+def test__process_rows_skips_rows_taken_meanwhile(gsheet_feeder: GsheetsFeederDB, mocker):
+    testworksheet = MockWorksheet()
+    testworksheet.rows = [dict(r) for r in MockWorksheet.rows]
+
+    def refresh_col(col_name, first_row, last_row):
+        testworksheet.rows[1]["status"] = "Archive in progress"
+
+    testworksheet.refresh_col = refresh_col
+    metadata_items = list(gsheet_feeder._process_rows(testworksheet))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [2, 5]
+
+
+def test__process_rows_remembers_first_pending_row(gsheet_feeder: GsheetsFeederDB, tmp_path):
+    gsheet_feeder.resume_state_file = str(tmp_path / "state" / "resume.json")
+    testworksheet = MockWorksheet()
+    metadata_items = list(gsheet_feeder._process_rows(testworksheet, 3, "sheet:1"))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [3, 5]
+    assert gsheet_feeder.resume_rows == {"sheet:1": 3}
+    with open(gsheet_feeder.resume_state_file) as f:
+        assert json.load(f) == {"sheet:1": 3}
+
+    # nothing left to archive, later passes start after the last row
+    assert list(gsheet_feeder._process_rows(testworksheet, 6, "sheet:1")) == []
+    assert gsheet_feeder.resume_rows == {"sheet:1": 7}
+
+
 def test__set_metadata(gsheet_feeder: GsheetsFeederDB):
     worksheet = MockWorksheet()
     metadata = Metadata()
@@ -260,3 +303,195 @@ class TestGSheetsFeederReal:
 # Test two sheets
 # test two sheets with different columns
 # test folder implementation
+
+
+class LeasingMockWorksheet(MockWorksheet):
+    """keeps the written statuses, other workers can overwrite them before they are read back"""
+
+    def __init__(self, statuses=None, overwritten_by_others=(), stale_statuses=None):
+        super().__init__()
+        self.rows = [dict(r, status=(statuses or {}).get(r["row"], r["status"])) for r in MockWorksheet.rows]
+        self.overwritten_by_others = overwritten_by_others
+        # what a snapshot older than the sheet still says about some rows
+        self.stale_statuses = stale_statuses or {}
+
+    def get_cell(self, row, col_name, fresh=False):
+        if col_name == "status" and not fresh and row in self.stale_statuses:
+            return self.stale_statuses[row]
+        return super().get_cell(row, col_name, fresh)
+
+    def set_cell(self, row, col_name, val):
+        if row in self.overwritten_by_others:
+            val = "Archive in progress [other-worker until 2999-01-01T00:00:00+00:00]"
+        next(r for r in self.rows if r["row"] == row)[col_name] = val
+
+
+@pytest.fixture
+def leasing_feeder(gsheet_feeder):
+    gsheet_feeder.leasing, gsheet_feeder.worker_id, gsheet_feeder.lease_settle_seconds = True, "worker-1", 0
+    return gsheet_feeder
+
+
+def test__process_rows_leases_rows(leasing_feeder: GsheetsFeederDB):
+    testworksheet = LeasingMockWorksheet()
+    metadata_items = list(leasing_feeder._process_rows(testworksheet))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [2, 3, 5]
+    assert testworksheet.get_cell(2, "status").startswith("Archive in progress [worker-1 until ")
+
+
+def test__process_rows_skips_rows_leased_by_others(leasing_feeder: GsheetsFeederDB):
+    testworksheet = LeasingMockWorksheet(
+        statuses={2: "Archive in progress [other-worker until 2999-01-01T00:00:00+00:00]"},
+        overwritten_by_others=[3],
+    )
+    metadata_items = list(leasing_feeder._process_rows(testworksheet))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [5]
+
+
+def test__process_rows_rechecks_stale_status_before_leasing(leasing_feeder: GsheetsFeederDB):
+    lease = "Archive in progress [other-worker until 2999-01-01T00:00:00+00:00]"
+    testworksheet = LeasingMockWorksheet(statuses={3: lease}, stale_statuses={3: ""})
+    metadata_items = list(leasing_feeder._process_rows(testworksheet))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [2, 5]
+    assert testworksheet.get_cell(3, "status", fresh=True) == lease
+
+
+def test__process_rows_reclaims_expired_leases(leasing_feeder: GsheetsFeederDB):
+    testworksheet = LeasingMockWorksheet(
+        statuses={2: "Archive in progress [other-worker until 2020-01-01T00:00:00+00:00]", 3: "Archive in progress"}
+    )
+    metadata_items = list(leasing_feeder._process_rows(testworksheet))
+    assert [m.get_context("gsheet")["row"] for m in metadata_items] == [2, 5]
+    assert "worker-1" in testworksheet.get_cell(2, "status")
+
+
+def test__process_rows_resumes_from_rows_leased_by_others(leasing_feeder: GsheetsFeederDB):
+    lease = "Archive in progress [other-worker until 2999-01-01T00:00:00+00:00]"
+    testworksheet = LeasingMockWorksheet(statuses={2: lease})
+    assert [m.get_context("gsheet")["row"] for m in leasing_feeder._process_rows(testworksheet, 2, "sheet:1")] == [3, 5]
+    # if the other worker dies, row 2 is archived once its lease expires
+    assert leasing_feeder.resume_rows == {"sheet:1": 2}
+
+    # the same when there's nothing left for this worker, and for rows lost to another worker's claim
+    testworksheet = LeasingMockWorksheet(statuses={2: "done", 5: "done"}, overwritten_by_others=[3])
+    assert list(leasing_feeder._process_rows(testworksheet, 2, "sheet:1")) == []
+    assert leasing_feeder.resume_rows == {"sheet:1": 3}
+
+
+def leased_item(feeder: GsheetsFeederDB, testworksheet: LeasingMockWorksheet, row: int = 2) -> Metadata:
+    testworksheet.set_cell(row, "status", feeder._new_lease())
+    item = Metadata().set_url("http://example.com")
+    item.set_context("gsheet", {"row": row, "worksheet": testworksheet})
+    return item
+
+
+def test_started_keeps_the_lease(leasing_feeder: GsheetsFeederDB, mocker):
+    write_buffer = mocker.patch.object(leasing_feeder, "_write_buffer")
+    testworksheet = LeasingMockWorksheet()
+    item = leased_item(leasing_feeder, testworksheet)
+    leasing_feeder.started(item)
+    write_buffer.assert_not_called()
+    assert (testworksheet, 2) in leasing_feeder.lease_renewals
+
+    leasing_feeder.failed(item, "reason")
+    assert leasing_feeder.lease_renewals == {}
+    write_buffer.return_value.set_cell.assert_called_once_with(2, "status", "Archive failed reason")
+
+
+def test_lease_is_renewed_while_archiving(leasing_feeder: GsheetsFeederDB, mocker):
+    leasing_feeder.lease_duration = 0.1
+    testworksheet = LeasingMockWorksheet()
+    item = leased_item(leasing_feeder, testworksheet)
+    renewed = threading.Event()
+    new_lease = mocker.patch.object(leasing_feeder, "_new_lease", side_effect=lambda: renewed.set() or "renewed")
+    testworksheet.rows[0]["status"] = "Archive in progress [worker-1 until 2000-01-01T00:00:00+00:00]"
+
+    leasing_feeder.started(item)
+    assert renewed.wait(timeout=5)
+    leasing_feeder.cleanup()
+    new_lease.assert_called()
+    assert testworksheet.get_cell(2, "status", fresh=True) == "renewed"
+    assert leasing_feeder.lease_renewals == {}
+
+
+def test_lease_renewal_stops_once_the_lease_is_lost(leasing_feeder: GsheetsFeederDB, mocker):
+    leasing_feeder.lease_duration = 0.1
+    testworksheet = LeasingMockWorksheet()
+    item = leased_item(leasing_feeder, testworksheet)
+    lease = "Archive in progress [other-worker until 2999-01-01T00:00:00+00:00]"
+    testworksheet.rows[0]["status"] = lease
+
+    leasing_feeder.started(item)
+    _, renewer = leasing_feeder.lease_renewals[(testworksheet, 2)]
+    renewer.join(timeout=5)
+    assert not renewer.is_alive()
+    assert testworksheet.get_cell(2, "status", fresh=True) == lease
+    leasing_feeder.cleanup()
+
+
+@pytest.fixture
+def three_worksheets(gsheet_feeder: GsheetsFeederDB, mocker):
+    """a spreadsheet with worksheets 'a', 'b' and 'c' with 2, 1 and 3 rows to archive"""
+    worksheets = []
+    for i, (title, row_count) in enumerate([("a", 2), ("b", 1), ("c", 3)]):
+        worksheet = mocker.MagicMock(id=i)
+        worksheet.title = title
+        worksheets.append(worksheet)
+    spreadsheet = mocker.MagicMock(id="sheet")
+    spreadsheet.title = "Spreadsheet"
+    spreadsheet.worksheets.return_value = worksheets
+    mocker.patch.object(gsheet_feeder, "open_sheet", return_value=spreadsheet)
+    mocker.patch.object(gsheet_feeder, "missing_required_columns", return_value=[])
+
+    def make_worksheet(worksheet, **kwargs):
+        gw = MockWorksheet()
+        gw.rows = [
+            {"row": row, "url": f"https://{worksheet.title}.com/{row}", "status": "", "folder": ""}
+            for row in range(2, 2 + dict(a=2, b=1, c=3)[worksheet.title])
+        ]
+        return gw
+
+    mocker.patch("auto_archiver.modules.gsheet_feeder_db.gsheet_feeder_db.GWorksheet", side_effect=make_worksheet)
+    return gsheet_feeder
+
+
+@pytest.mark.parametrize("load_concurrency", [1, 3])
+@pytest.mark.parametrize(
+    "interleave, priority, expected",
+    [
+        (False, [], ["a/2", "a/3", "b/2", "c/2", "c/3", "c/4"]),
+        (False, ["c", "b"], ["c/2", "c/3", "c/4", "b/2", "a/2", "a/3"]),
+        (True, [], ["a/2", "b/2", "c/2", "a/3", "c/3", "c/4"]),
+        (True, ["c"], ["c/2", "a/2", "b/2", "c/3", "a/3", "c/4"]),
+    ],
+)
+def test_iter_worksheet_order(three_worksheets: GsheetsFeederDB, load_concurrency, interleave, priority, expected):
+    three_worksheets.worksheet_load_concurrency = load_concurrency
+    three_worksheets.interleave_worksheets = interleave
+    three_worksheets.worksheet_priority = priority
+    urls = [m.get_url() for m in three_worksheets]
+    assert [url.split("https://")[1].replace(".com", "") for url in urls] == expected
+
+
+def test_iter_loads_a_window_of_worksheets(three_worksheets: GsheetsFeederDB, mocker):
+    from auto_archiver.modules.gsheet_feeder_db import gsheet_feeder_db
+
+    three_worksheets.worksheet_load_concurrency = 2
+    service_account = mocker.patch("gspread.service_account")
+    make_worksheet, loaded, b_loaded = gsheet_feeder_db.GWorksheet.side_effect, [], threading.Event()
+
+    def load_worksheet(worksheet, **kwargs):
+        loaded.append(worksheet)
+        if worksheet.title == "b":
+            b_loaded.set()
+        return make_worksheet(worksheet, **kwargs)
+
+    gsheet_feeder_db.GWorksheet.side_effect = load_worksheet
+    items = iter(three_worksheets)
+    assert next(items).get_url() == "https://a.com/2"
+    assert b_loaded.wait(timeout=5)
+    # 'c' waits for 'a' to be archived
+    assert sorted(w.title for w in loaded) == ["a", "b"]
+    # downloaded with the loading thread's own client
+    assert all(w.client is service_account.return_value.http_client for w in loaded)
+    assert len(list(items)) == 5
@@ -40,6 +40,21 @@ class TestGWorksheet:
     def test_col_index_returns_correct_index(self, gworksheet, col, expected_index):
         assert gworksheet._col_index(col) == expected_index
 
+    def test_col_index_raises_for_missing_column(self, gworksheet):
+        with pytest.raises(ValueError, match="'upload title' is not in"):
+            gworksheet._col_index("title")
+        assert not gworksheet.col_exists("title")
+
+    def test_col_indexes_follow_header_changes(self, mock_worksheet, gworksheet):
+        gworksheet.batch_set_cell([(1, "date", "Upload Title")])
+        assert gworksheet.col_exists("title")
+        assert gworksheet._col_index("title") == 3
+        assert not gworksheet.col_exists("date")
+
+    def test_get_col(self, gworksheet):
+        assert gworksheet.get_col("status") == ["Archive Status", "archived", "pending"]
+        assert gworksheet.get_col("url", 3) == ["url2"]
+
     def test_check_col_exists_raises_for_invalid_column(self, gworksheet):
         with pytest.raises(Exception, match="Column invalid_col"):
             gworksheet._check_col_exists("invalid_col")
@@ -109,6 +124,20 @@ class TestGWorksheet:
         submitted_value = mock_worksheet.batch_update.call_args[0][0][0]["values"][0][0]
         assert len(submitted_value) == 49999
 
+    def test_refresh_col_updates_local_values(self, mock_worksheet, gworksheet):
+        # the trailing empty cell is left out of the response, like the API does
+        mock_worksheet.batch_get.return_value = [[["archived"], ["taken"]]]
+        gworksheet.refresh_col("status", 2, 4)
+        mock_worksheet.batch_get.assert_called_once_with(["B2:B4"])
+        assert gworksheet.get_cell(3, "status") == "taken"
+        assert gworksheet.count_rows() == 3
+
+    def test_writes_update_local_values(self, gworksheet):
+        gworksheet.set_cell(2, "status", "in progress")
+        gworksheet.batch_set_cell([(3, "status", "done"), (3, "date", "2024-01-01")])
+        assert gworksheet.get_cell(2, "status") == "in progress"
+        assert gworksheet.get_row(3) == ["url2", "done", "filepath2", "2024-01-01"]
+
     # Test coordinate conversion
     @pytest.mark.parametrize(
         "row,col,expected",
@@ -129,3 +158,44 @@ class TestGWorksheet:
         g = GWorksheet(mock_ws)
         assert g.headers == []
         assert g.count_rows() == 0
+
+
+class TestLazyGWorksheet:
+    @pytest.fixture
+    def mock_worksheet(self, mocker):
+        rows = {
+            1: ["Link", "Archive Status", "Archive Location", "Archive Date"],
+            2: ["url1", "archived", "filepath1", "2023-01-01"],
+            3: ["url2"],
+            4: ["url3", "", "filepath3"],
+        }
+        mock_ws = mocker.MagicMock()
+        mock_ws.row_values.side_effect = lambda row: rows[row]
+        # only the url and status columns, as the API returns them (no trailing empty cells)
+        mock_ws.batch_get.return_value = [[["url1"], ["url2"], ["url3"]], [["archived"]]]
+        return mock_ws
+
+    def test_loads_only_url_and_status_columns(self, mock_worksheet):
+        gw = GWorksheet(mock_worksheet, lazy=True)
+        mock_worksheet.get_values.assert_not_called()
+        mock_worksheet.batch_get.assert_called_once_with(["A2:A", "B2:B"])
+        assert gw.headers == ["link", "archive status", "archive location", "archive date"]
+        assert gw.count_rows() == 4
+        assert [gw.get_cell(row, "url") for row in (2, 3, 4)] == ["url1", "url2", "url3"]
+        assert [gw.get_cell(row, "status") for row in (2, 3, 4)] == ["archived", "", ""]
+        mock_worksheet.row_values.assert_called_once_with(1)
+
+    def test_loads_full_rows_when_needed(self, mock_worksheet):
+        gw = GWorksheet(mock_worksheet, lazy=True)
+        assert gw.get_cell(4, "archive") == "filepath3"
+        assert gw.get_row(4) == ["url3", "", "filepath3"]
+        assert gw.get_cell_or_default(3, "date", "default") == "default"
+        assert [c.args for c in mock_worksheet.row_values.call_args_list] == [(1,), (4,), (3,)]
+
+    def test_starts_at_first_row(self, mock_worksheet):
+        mock_worksheet.batch_get.return_value = [[["url3"]]]
+        gw = GWorksheet(mock_worksheet, lazy=True, first_row=4)
+        mock_worksheet.batch_get.assert_called_once_with(["A4:A", "B4:B"])
+        assert gw.count_rows() == 4
+        assert gw.get_cell(4, "url") == "url3"
+        assert gw.get_cell(4, "status") == ""
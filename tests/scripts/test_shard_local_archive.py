@@ -0,0 +1,55 @@
+import hashlib
+import importlib.util
+
+import pytest
+from click.testing import CliRunner
+
+
+@pytest.fixture
+def shard_local_archive():
+    spec = importlib.util.spec_from_file_location("shard_local_archive", "scripts/shard_local_archive.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """an archive with a file named by filename_generator: random and one named by filename_generator: static"""
+    folder = tmp_path / "archive" / "folder"
+    folder.mkdir(parents=True)
+    random_named = folder / "cb12aa34bb56cc78dd90ee12.txt"
+    random_named.write_text("random content")
+    static_content = b"static content"
+    static_named = folder / f"{hashlib.sha256(static_content).hexdigest()[:24]}.txt"
+    static_named.write_bytes(static_content)
+    return tmp_path / "archive"
+
+
+def shard_of(content: bytes) -> str:
+    hd = hashlib.sha256(content).hexdigest()
+    return f"{hd[:2]}/{hd[2:4]}"
+
+
+def test_files_are_sharded_by_their_content(shard_local_archive, archive):
+    result = CliRunner().invoke(shard_local_archive.main, [str(archive)])
+    assert result.exit_code == 0, result.output
+
+    folder = archive / "folder"
+    # a random name that looks like a hash isn't trusted
+    assert (folder / shard_of(b"random content") / "cb12aa34bb56cc78dd90ee12.txt").read_text() == "random content"
+    static_name = f"{hashlib.sha256(b'static content').hexdigest()[:24]}.txt"
+    assert (folder / shard_of(b"static content") / static_name).read_text() == "static content"
+
+    # already in place, nothing moves the second time
+    result = CliRunner().invoke(shard_local_archive.main, [str(archive)])
+    assert "moved 0 of 2 files" in result.output
+
+
+def test_static_names_skip_hashing(shard_local_archive, archive, mocker):
+    calculate_file_hash = mocker.patch.object(shard_local_archive, "calculate_file_hash")
+    result = CliRunner().invoke(shard_local_archive.main, [str(archive), "--static-names", "--dry-run"])
+    assert result.exit_code == 0, result.output
+    # every name looks static, so nothing is hashed and the random name is (wrongly) trusted
+    calculate_file_hash.assert_not_called()
+    assert "cb/12/cb12aa34bb56cc78dd90ee12.txt" in result.output
@@ -1,7 +1,10 @@
+import threading
+import time
 from typing import Type
 import pytest
 from auto_archiver.core import Media
 from auto_archiver.modules.s3_storage import S3Storage
+from auto_archiver.modules.s3_storage.dedup_index import DedupIndex
 
 
 class TestS3Storage:
@@ -22,6 +25,13 @@ class TestS3Storage:
         "endpoint_url": "https://{region}.example.com",
         "cdn_url": "https://cdn.example.com/{key}",
         "private": False,
+        "multipart_threshold": 16,
+        "multipart_chunksize": 32,
+        "max_concurrency": 4,
+        "checksum_sha256": False,
+        "skip_existing": False,
+        "dedup_index": None,
+        "warm_dedup_index": False,
     }
 
     @pytest.fixture(autouse=True)
@@ -55,6 +65,7 @@ class TestS3Storage:
             Bucket="test-bucket",
             Key=media.key,
             ExtraArgs={"ACL": "public-read", "ContentType": "image/png"},
+            Config=self.storage.transfer_config,
         )
 
     def test_uploadf_detects_charset_for_text_files(self, mocker):
@@ -68,6 +79,7 @@ class TestS3Storage:
             Bucket="test-bucket",
             Key=media.key,
             ExtraArgs={"ACL": "public-read", "ContentType": "text/plain; charset=utf-8"},
+            Config=self.storage.transfer_config,
         )
 
     def test_upload_decision_logic(self, mocker):
@@ -115,8 +127,230 @@ class TestS3Storage:
             Bucket="test-bucket",
             Key="original_key.txt",
             ExtraArgs={"ACL": "public-read", "ContentType": "image/png"},
+            Config=self.storage.transfer_config,
         )
 
     def test_file_in_folder_exists(self, mocker):
         mocker.patch.object(self.storage.s3, "list_objects", return_value={"Contents": [{"Key": "path/to/file.txt"}]})
         assert self.storage.file_in_folder("path/to/") == "path/to/file.txt"
+
+    def test_transfer_config(self):
+        assert self.storage.transfer_config.multipart_threshold == 16 * 1024 * 1024
+        assert self.storage.transfer_config.multipart_chunksize == 32 * 1024 * 1024
+        assert self.storage.transfer_config.max_concurrency == 4
+
+    def test_upload_uses_file_path(self, mocker, tmp_path):
+        """upload passes the path to boto3 rather than an open file, so parts can be read in parallel"""
+        filename = tmp_path / "video.mp4"
+        filename.write_bytes(b"video")
+        media = Media(str(filename))
+        media._key = "video.mp4"
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        assert self.storage.upload(media) is True
+        mock_upload.assert_called_once_with(
+            str(filename),
+            Bucket="test-bucket",
+            Key="video.mp4",
+            ExtraArgs={"ACL": "public-read", "ContentType": "video/mp4"},
+            Config=self.storage.transfer_config,
+        )
+
+    def test_upload_skipped_when_not_needed(self, mocker):
+        mocker.patch.object(self.storage, "is_upload_needed", return_value=False)
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        assert self.storage.upload(Media("test.txt")) is True
+        mock_upload.assert_not_called()
+
+    def test_checksum_reuses_sha256_hash(self, tmp_path):
+        import base64
+        import hashlib
+
+        filename = tmp_path / "test.txt"
+        filename.write_bytes(b"content")
+        self.storage.checksum_sha256 = True
+        media = Media(str(filename)).set("hash", f"SHA-256:{hashlib.sha256(b'content').hexdigest()}")
+        extra_args = self.storage.get_extra_args(media, {})
+        assert extra_args["ChecksumSHA256"] == base64.b64encode(hashlib.sha256(b"content").digest()).decode()
+        assert "ChecksumAlgorithm" not in extra_args
+
+    @pytest.mark.parametrize("hash_value", [None, "SHA3-512:abcd", "SHA-256:not-hex"])
+    def test_checksum_calculated_by_boto3_without_sha256_hash(self, tmp_path, hash_value):
+        filename = tmp_path / "test.txt"
+        filename.write_bytes(b"content")
+        self.storage.checksum_sha256 = True
+        media = Media(str(filename)).set("hash", hash_value)
+        extra_args = self.storage.get_extra_args(media, {})
+        assert extra_args["ChecksumAlgorithm"] == "SHA256"
+        assert "ChecksumSHA256" not in extra_args
+
+    def test_checksum_not_reused_for_multipart_uploads(self, mocker, tmp_path):
+        filename = tmp_path / "big.mp4"
+        filename.write_bytes(b"content")
+        self.storage.checksum_sha256 = True
+        self.storage.transfer_config.multipart_threshold = 4
+        media = Media(str(filename)).set("hash", "SHA-256:" + "ab" * 32)
+        extra_args = self.storage.get_extra_args(media, {})
+        assert extra_args["ChecksumAlgorithm"] == "SHA256"
+        assert "ChecksumSHA256" not in extra_args
+
+    @pytest.fixture
+    def dedup_index(self, tmp_path):
+        self.storage.dedup_index = str(tmp_path / "index" / "s3.db")
+        self.storage.index = DedupIndex(self.storage.dedup_index, self.storage.bucket)
+        return self.storage.index
+
+    def test_file_in_folder_uses_dedup_index(self, mocker, dedup_index):
+        dedup_index.add("no-dups/abc/known.mp4", 10)
+        mock_list = mocker.patch.object(self.storage.s3, "list_objects")
+        assert self.storage.file_in_folder("no-dups/abc") == "no-dups/abc/known.mp4"
+        mock_list.assert_not_called()
+
+    def test_file_in_folder_remembers_remote_hits(self, mocker, dedup_index):
+        mock_list = mocker.patch.object(
+            self.storage.s3, "list_objects", return_value={"Contents": [{"Key": "no-dups/abc/remote.mp4", "Size": 5}]}
+        )
+        assert self.storage.file_in_folder("no-dups/abc/") == "no-dups/abc/remote.mp4"
+        assert self.storage.file_in_folder("no-dups/abc/") == "no-dups/abc/remote.mp4"
+        mock_list.assert_called_once()
+
+    def test_file_in_folder_checks_s3_on_index_miss(self, mocker, dedup_index):
+        mocker.patch.object(self.storage.s3, "list_objects", return_value={})
+        assert self.storage.file_in_folder("no-dups/missing/") is False
+        assert len(dedup_index) == 0
+
+    def test_upload_adds_to_dedup_index(self, mocker, tmp_path, dedup_index):
+        filename = tmp_path / "video.mp4"
+        filename.write_bytes(b"video")
+        self.storage.random_no_duplicate = True
+        media = Media(str(filename))
+        media._key = "video.mp4"
+        mocker.patch.object(self.storage.s3, "list_objects", return_value={})
+        mocker.patch.object(self.storage.s3, "upload_file")
+        self.storage.upload(media)
+        assert media.key.startswith("no-dups/")
+        # the same content is now found locally
+        other = Media(str(filename))
+        other._key = "other.mp4"
+        assert self.storage.is_upload_needed(other) is False
+        assert other.key == media.key
+
+    def test_concurrent_uploads_of_the_same_file_upload_it_once(self, mocker, tmp_path):
+        filename = tmp_path / "video.mp4"
+        filename.write_bytes(b"video")
+        self.storage.random_no_duplicate = True
+        uploaded = []
+
+        def upload_file(filename, Bucket, Key, **kwargs):
+            time.sleep(0.05)
+            uploaded.append(Key)
+
+        mocker.patch.object(self.storage.s3, "upload_file", side_effect=upload_file)
+        mocker.patch.object(
+            self.storage.s3,
+            "list_objects",
+            side_effect=lambda **kwargs: {"Contents": [{"Key": uploaded[0]}]} if uploaded else {},
+        )
+        media = [Media(str(filename), _key=f"{i}.mp4") for i in range(4)]
+        threads = [threading.Thread(target=self.storage.upload, args=(m,)) for m in media]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(uploaded) == 1
+        assert {m.key for m in media} == set(uploaded)
+
+    def test_fill_dedup_index_paginates(self, mocker, dedup_index):
+        paginator = mocker.MagicMock()
+        paginator.paginate.return_value = [
+            {"Contents": [{"Key": "no-dups/a/1.jpg", "Size": 1}, {"Key": "no-dups/b/2.jpg", "Size": 2}]},
+            {"Contents": [{"Key": "no-dups/c/3.jpg", "Size": 3}]},
+            {},
+        ]
+        mocker.patch.object(self.storage.s3, "get_paginator", return_value=paginator)
+        assert self.storage.fill_dedup_index() == 3
+        paginator.paginate.assert_called_once_with(Bucket="test-bucket", Prefix="no-dups/")
+        assert len(dedup_index) == 3
+        assert self.storage.file_in_folder("no-dups/b") == "no-dups/b/2.jpg"
+
+    @pytest.fixture
+    def existing_file(self, tmp_path):
+        self.storage.skip_existing = True
+        filename = tmp_path / "video.mp4"
+        filename.write_bytes(b"video")
+        media = Media(str(filename))
+        media._key = "6ae8a75555209fd6c44157c0.mp4"
+        return media
+
+    def test_skip_existing_with_same_size(self, mocker, existing_file):
+        mock_head = mocker.patch.object(self.storage.s3, "head_object", return_value={"ContentLength": 5})
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        assert self.storage.upload(existing_file) is True
+        mock_upload.assert_not_called()
+        mock_head.assert_called_once_with(
+            Bucket="test-bucket", Key="6ae8a75555209fd6c44157c0.mp4", ChecksumMode="ENABLED"
+        )
+        assert existing_file.get("previously archived") is True
+
+    @pytest.mark.parametrize(
+        "head",
+        [
+            {"ContentLength": 4},
+            {"ContentLength": 5, "ChecksumSHA256": "c2FtZSBzaXplIG90aGVyIGNvbnRlbnQ="},
+        ],
+    )
+    def test_skip_existing_uploads_different_content(self, mocker, existing_file, head):
+        import hashlib
+
+        existing_file.set("hash", f"SHA-256:{hashlib.sha256(b'video').hexdigest()}")
+        mocker.patch.object(self.storage.s3, "head_object", return_value=head)
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        self.storage.upload(existing_file)
+        mock_upload.assert_called_once()
+
+    def test_skip_existing_uploads_missing_object(self, mocker, existing_file):
+        from botocore.exceptions import ClientError
+
+        error = ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        mocker.patch.object(self.storage.s3, "head_object", side_effect=error)
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        self.storage.upload(existing_file)
+        mock_upload.assert_called_once()
+        assert existing_file.get("previously archived") is None
+
+    def test_skip_existing_only_for_static_filenames(self, mocker, existing_file):
+        self.storage.filename_generator = "random"
+        mock_head = mocker.patch.object(self.storage.s3, "head_object")
+        mocker.patch.object(self.storage.s3, "upload_file")
+        self.storage.upload(existing_file)
+        mock_head.assert_not_called()
+
+    def test_skip_existing_uses_dedup_index(self, mocker, existing_file, dedup_index):
+        mock_head = mocker.patch.object(self.storage.s3, "head_object", return_value={"ContentLength": 5})
+        mock_upload = mocker.patch.object(self.storage.s3, "upload_file")
+        self.storage.upload(existing_file)
+        self.storage.upload(existing_file)
+        mock_head.assert_called_once()
+        mock_upload.assert_not_called()
+        assert dedup_index.get_size(existing_file.key) == 5
+
+
+class TestDedupIndex:
+    @pytest.fixture
+    def index(self, tmp_path) -> DedupIndex:
+        return DedupIndex(str(tmp_path / "index.db"), "bucket")
+
+    def test_first_in_folder_matches_s3_listing(self, index):
+        index.add_many([("no-dups/ab/z.jpg", 1), ("no-dups/ab/a.jpg", 2), ("no-dups/abc/b.jpg", 3)])
+        index.add("no-dups/ab/sub/nested.jpg")
+        assert index.first_in_folder("no-dups/ab") == "no-dups/ab/a.jpg"
+        assert index.first_in_folder("no-dups/abc/") == "no-dups/abc/b.jpg"
+        assert index.first_in_folder("no-dups/a") is None
+        assert index.first_in_folder("no-dups/ab/sub") == "no-dups/ab/sub/nested.jpg"
+
+    def test_scoped_by_bucket_and_persistent(self, index, tmp_path):
+        index.add("no-dups/ab/a.jpg", 2)
+        index.close()
+        assert DedupIndex(str(tmp_path / "index.db"), "other-bucket").first_in_folder("no-dups/ab") is None
+        reopened = DedupIndex(str(tmp_path / "index.db"), "bucket")
+        assert reopened.first_in_folder("no-dups/ab") == "no-dups/ab/a.jpg"
+        assert len(reopened) == 1
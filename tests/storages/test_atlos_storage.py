@@ -110,3 +110,68 @@ def test_upload_post_http_error(
     mocker.patch.object(atlos_storage, "_post", side_effect=Exception("HTTP error"))
     with pytest.raises(Exception, match="HTTP error"):
         atlos_storage.upload(media, metadata)
+
+
+def test_store_many_lists_artifacts_once(atlos_storage: AtlosStorage, metadata: Metadata, tmp_path, mocker) -> None:
+    """Test store_many() gets the source material once per item and sends identical files once."""
+    metadata.set("atlos_id", 404)
+    existing, new, same_as_new = (tmp_path / name for name in ("existing.txt", "new.txt", "same.txt"))
+    existing.write_bytes(b"already there")
+    new.write_bytes(b"new content")
+    same_as_new.write_bytes(b"new content")
+    media_list = [Media(filename=str(f), _key=f.name) for f in (existing, new, same_as_new)]
+
+    fake_get_response = {"result": {"artifacts": [{"file_hash_sha256": hashlib.sha256(b"already there").hexdigest()}]}}
+    get_mock = mocker.patch.object(atlos_storage, "_get", return_value=fake_get_response)
+    post_mock = mocker.patch.object(atlos_storage, "_post", return_value={"result": "uploaded"})
+    atlos_storage.store_many(media_list, "https://example.com", metadata)
+
+    get_mock.assert_called_once_with("/api/v2/source_material/404")
+    post_mock.assert_called_once()
+    assert post_mock.call_args[1]["files"]["file"][0] == "new.txt"
+    assert all(m.urls == [atlos_storage.atlos_url] for m in media_list)
+
+
+def test_artifacts_listed_once_per_item(atlos_storage: AtlosStorage, metadata: Metadata, media: Media, mocker) -> None:
+    """Test the artifact list is reused by the item's later uploads, until the item is done."""
+    metadata.set("atlos_id", 404)
+    get_mock = mocker.patch.object(atlos_storage, "_get", return_value={"result": {"artifacts": []}})
+    post_mock = mocker.patch.object(atlos_storage, "_post", return_value={"result": "uploaded"})
+
+    atlos_storage.upload(media, metadata)
+    atlos_storage.upload(media, metadata)
+    get_mock.assert_called_once()
+    # the second upload knows the file is already there
+    assert post_mock.call_count == 1
+
+    atlos_storage.done(metadata)
+    atlos_storage.upload(media, metadata)
+    assert get_mock.call_count == 2
+
+    # nor kept once the item is aborted
+    atlos_storage.aborted(metadata)
+    assert atlos_storage.artifact_hashes == {}
+
+
+def test_upload_reuses_hash_enricher_digest(
+    atlos_storage: AtlosStorage, metadata: Metadata, media: Media, mocker
+) -> None:
+    """Test a SHA-256 from the hash_enricher is used rather than hashing the file again."""
+    metadata.set("atlos_id", 101)
+    media.set("hash", "SHA-256:precomputed")
+    mocker.patch.object(
+        atlos_storage, "_get", return_value={"result": {"artifacts": [{"file_hash_sha256": "precomputed"}]}}
+    )
+    post_mock = mocker.patch.object(atlos_storage, "_post")
+    hash_mock = mocker.patch(
+        "auto_archiver.modules.atlos_feeder_db_storage.atlos_feeder_db_storage.calculate_file_hash"
+    )
+
+    assert atlos_storage.upload(media, metadata) is True
+    hash_mock.assert_not_called()
+    post_mock.assert_not_called()
+
+    media.set("hash", "SHA3-512:other")
+    hash_mock.return_value = "precomputed"
+    atlos_storage.upload(media, metadata)
+    hash_mock.assert_called_once()
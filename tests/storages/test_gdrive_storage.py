@@ -1,8 +1,15 @@
+import itertools
+import threading
 from typing import Type
+from unittest.mock import MagicMock
+
 import pytest
+from googleapiclient.errors import HttpError
 
 from auto_archiver.core import Media
+from auto_archiver.core.storage_dispatcher import store_media
 from auto_archiver.modules.gdrive_storage import GDriveStorage
+from auto_archiver.modules.gdrive_storage.folder_cache import FolderCache
 from tests.storages.test_storage_base import TestStorageBase
 
 
@@ -59,6 +66,186 @@ def test_path_parts():
     media._key = "folder1/folder2/test.jpg"
 
 
+class FakeFiles:
+    """A minimal in-memory files() resource, recording every API call made."""
+
+    def __init__(self):
+        self.calls = []
+        self.items = {}  # id -> (name, parent, is_folder)
+        self.fail_create_in = set()
+        self.ids = itertools.count()
+
+    def list(self, q, **kwargs):
+        self.calls.append("list")
+        parent, name = q.split("'")[1], q.split("'")[3]
+        folders_only = "mimeType" in q
+        found = [
+            {"id": _id, "name": n}
+            for _id, (n, p, is_folder) in self.items.items()
+            if n == name and p == parent and (is_folder or not folders_only)
+        ]
+        return mock_execute({"files": found})
+
+    def create(self, body, media_body=None, **kwargs):
+        self.calls.append("create")
+        parent = body["parents"][0]
+        if parent in self.fail_create_in:
+            raise HttpError(mock_response(404), b"File not found")
+        _id = f"id{next(self.ids)}"
+        self.items[_id] = (body["name"][0], parent, media_body is None)
+        return mock_execute({"id": _id})
+
+
+def mock_execute(result):
+    request = MagicMock()
+    request.execute.return_value = result
+    request.next_chunk.return_value = (None, result)
+    return request
+
+
+def mock_response(status):
+    response = MagicMock()
+    response.status = status
+    return response
+
+
+@pytest.fixture
+def fake_files(gdrive_storage, mocker):
+    files = FakeFiles()
+    gdrive_storage.service = mocker.MagicMock()
+    gdrive_storage.service.files.return_value = files
+    files.media_file_upload = mocker.patch("auto_archiver.modules.gdrive_storage.gdrive_storage.MediaFileUpload")
+    return files
+
+
+def test_upload_caches_folders_and_file_id(gdrive_storage, fake_files):
+    media = Media(filename="test.jpg", _key="folder1/folder2/test.jpg")
+    file_id = gdrive_storage.upload(media)
+    # 2 folder lookups, 2 folder creations and the upload
+    assert fake_files.calls == ["list", "create", "list", "create", "create"]
+    assert gdrive_storage.get_cdn_url(media) == f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+    assert len(fake_files.calls) == 5
+
+    fake_files.calls.clear()
+    other = Media(filename="other.jpg", _key="folder1/folder2/other.jpg")
+    other_id = gdrive_storage.upload(other)
+    gdrive_storage.get_cdn_url(other)
+    assert fake_files.calls == ["create"]
+    assert other_id != file_id
+
+
+def test_folder_cache_persisted(gdrive_storage, fake_files, tmp_path):
+    cache_file = str(tmp_path / "cache" / "folders.json")
+    gdrive_storage.folder_cache = FolderCache("fake_root_folder_id", cache_file)
+    gdrive_storage.upload(Media(filename="test.jpg", _key="folder1/test.jpg"))
+
+    reloaded = FolderCache("fake_root_folder_id", cache_file)
+    assert reloaded.get("folder1") == gdrive_storage.folder_cache.get("folder1") is not None
+    assert FolderCache("another_root", cache_file).get("folder1") is None
+
+
+def test_folder_cache_invalidated_when_folder_deleted(gdrive_storage, fake_files):
+    gdrive_storage.folder_cache.set("folder1", "deleted-id")
+    gdrive_storage.folder_cache.set("folder1/folder2", "deleted-sub-id")
+    fake_files.fail_create_in.add("deleted-sub-id")
+
+    media = Media(filename="test.jpg", _key="folder1/folder2/test.jpg")
+    file_id = gdrive_storage.upload(media)
+    assert file_id is not None
+    assert gdrive_storage.folder_cache.get("folder1") != "deleted-id"
+    assert fake_files.items[file_id][1] == gdrive_storage.folder_cache.get("folder1/folder2")
+
+
+def test_get_cdn_url_looks_up_files_not_uploaded_in_this_run(gdrive_storage, fake_files):
+    fake_files.items = {"f1": ("folder1", "fake_root_folder_id", True), "file1": ("test.jpg", "f1", False)}
+    media = Media(filename="test.jpg", _key="folder1/test.jpg")
+    assert gdrive_storage.get_cdn_url(media) == "https://drive.google.com/file/d/file1/view?usp=sharing"
+    gdrive_storage.get_cdn_url(media)
+    # the folder was cached by the first call
+    assert fake_files.calls == ["list", "list", "list"]
+
+
+def test_upload_chunk_size(gdrive_storage, fake_files):
+    gdrive_storage.upload_chunk_size = 8
+    gdrive_storage.upload(Media(filename="test.jpg", _key="test.jpg"))
+    fake_files.media_file_upload.assert_called_once_with("test.jpg", chunksize=8 * 1024 * 1024, resumable=True)
+
+
+@pytest.fixture
+def chunked_request(gdrive_storage, mocker):
+    request = MagicMock()
+    gdrive_storage.service = mocker.MagicMock()
+    gdrive_storage.service.files.return_value.create.return_value = request
+    mocker.patch("auto_archiver.modules.gdrive_storage.gdrive_storage.MediaFileUpload")
+    return request
+
+
+def test_upload_resumes_after_interruptions(gdrive_storage, chunked_request):
+    progress = MagicMock()
+    progress.progress.return_value = 0.5
+    chunked_request.next_chunk.side_effect = [
+        (progress, None),
+        HttpError(mock_response(503), b"Backend Error"),
+        ConnectionResetError("connection reset"),
+        (None, {"id": "file-id"}),
+    ]
+    assert gdrive_storage.upload(Media(filename="test.jpg", _key="test.jpg")) == "file-id"
+    # resumed on the same request, which keeps the upload session
+    assert chunked_request.next_chunk.call_count == 4
+
+
+def test_upload_gives_up_after_retries(gdrive_storage, chunked_request):
+    gdrive_storage.upload_retries = 2
+    chunked_request.next_chunk.side_effect = HttpError(mock_response(500), b"Backend Error")
+    assert gdrive_storage.upload(Media(filename="test.jpg", _key="test.jpg")) is None
+    assert chunked_request.next_chunk.call_count == 3
+
+
+def test_upload_does_not_retry_client_errors(gdrive_storage, chunked_request):
+    chunked_request.next_chunk.side_effect = HttpError(mock_response(403), b"Forbidden")
+    assert gdrive_storage.upload(Media(filename="test.jpg", _key="test.jpg")) is None
+    assert chunked_request.next_chunk.call_count == 1
+
+
+def test_service_per_thread(gdrive_storage, mocker):
+    build = mocker.patch(
+        "auto_archiver.modules.gdrive_storage.gdrive_storage.build", side_effect=lambda *a, **kw: object()
+    )
+    services = []
+    threads = [threading.Thread(target=lambda: services.append(gdrive_storage.service)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert gdrive_storage.service is gdrive_storage.service
+    assert len({id(s) for s in services + [gdrive_storage.service]}) == 4
+    assert build.call_count == 4
+
+
+def test_uploads_reuse_pooled_services(gdrive_storage, fake_files, mocker):
+    build = mocker.patch(
+        "auto_archiver.modules.gdrive_storage.gdrive_storage.build", return_value=gdrive_storage.shared_service
+    )
+    gdrive_storage.shared_service = None
+    # each upload in a thread of its own, as the dispatcher does
+    for i in range(3):
+        thread = threading.Thread(target=gdrive_storage.upload, args=(Media(filename=f"{i}.jpg", _key=f"{i}.jpg"),))
+        thread.start()
+        thread.join()
+    assert sorted(gdrive_storage.uploaded_ids) == ["0.jpg", "1.jpg", "2.jpg"]
+    assert build.call_count == 1
+    assert len(gdrive_storage.idle_services) == 1
+
+
+def test_concurrent_uploads_create_folders_once(gdrive_storage, fake_files):
+    gdrive_storage.config = {"steps": {"storages": ["gdrive_storage"]}}
+    media = [Media(filename=f"{i}.jpg", _key=f"folder1/folder2/{i}.jpg") for i in range(8)]
+    store_media(media, "https://example.com", None, [gdrive_storage])
+    folders = [item for item in fake_files.items.values() if item[2]]
+    assert sorted(name for name, _, _ in folders) == ["folder1", "folder2"]
+    assert all(m.urls and m.urls[0].startswith("https://drive.google.com/file/d/") for m in media)
+
+
 @pytest.mark.skip(reason="Requires real credentials")
 @pytest.mark.download
 class TestGDriveStorageConnected(TestStorageBase):
@@ -62,3 +62,99 @@ def test_upload_nonexistent_source(local_storage):
     media = Media(_key="missing.txt", filename="nonexistent.txt")
     with pytest.raises(FileNotFoundError):
         local_storage.upload(media)
+
+
+def test_set_key_keeps_item_folder(local_storage):
+    local_storage.filename_generator = "random"
+    metadata = Metadata().set_context("folder", "item-folder")
+    media = Media(filename="dummy.txt")
+    local_storage.set_key(media, "https://example.com", metadata)
+    assert media.key.startswith(local_storage.save_to)
+    assert metadata.get_context("folder") == "item-folder"
+
+
+@pytest.mark.parametrize("strategy", ["copy", "hardlink", "reflink"])
+def test_link_strategies_keep_contents(local_storage, sample_media, strategy):
+    local_storage.link_strategy = strategy
+    local_storage.store(sample_media, "https://example.com", Metadata())
+    assert Path(sample_media.key).read_text() == "test content"
+    assert Path(sample_media.filename).read_text() == "test content"
+
+
+def test_hardlink_shares_the_file(local_storage, sample_media):
+    local_storage.link_strategy = "hardlink"
+    local_storage.store(sample_media, "https://example.com", Metadata())
+    assert os.stat(sample_media.key).st_ino == os.stat(sample_media.filename).st_ino
+    # storing it again replaces the file at the same key
+    sample_media.urls = []
+    local_storage.upload(sample_media)
+    assert os.listdir(os.path.dirname(sample_media.key)) == [os.path.basename(sample_media.key)]
+
+
+def test_link_falls_back_to_copy_across_devices(local_storage, sample_media, mocker):
+    import errno
+
+    local_storage.link_strategy = "hardlink"
+    mocker.patch("os.link", side_effect=OSError(errno.EXDEV, "Invalid cross-device link"))
+    local_storage.store(sample_media, "https://example.com", Metadata())
+    assert Path(sample_media.key).read_text() == "test content"
+    assert os.stat(sample_media.key).st_ino != os.stat(sample_media.filename).st_ino
+
+
+def test_move_when_last_storage(local_storage, sample_media):
+    local_storage.link_strategy = "move"
+    local_storage.config["steps"] = {"storages": ["s3_storage", "local_storage"]}
+    original = sample_media.filename
+    local_storage.store(sample_media, "https://example.com", Metadata())
+    assert not os.path.exists(original)
+    assert sample_media.filename == sample_media.key
+    assert Path(sample_media.key).read_text() == "test content"
+
+
+def test_move_hardlinks_when_not_last_storage(local_storage, sample_media):
+    local_storage.link_strategy = "move"
+    local_storage.config["steps"] = {"storages": ["local_storage", "s3_storage"]}
+    original = sample_media.filename
+    local_storage.store(sample_media, "https://example.com", Metadata())
+    assert sample_media.filename == original
+    assert os.stat(sample_media.key).st_ino == os.stat(original).st_ino
+
+
+def test_move_links_files_shared_with_other_media(local_storage, sample_media):
+    local_storage.link_strategy = "move"
+    local_storage.filename_generator = "random"
+    local_storage.config["steps"] = {"storages": ["local_storage"]}
+    original = sample_media.filename
+    other = Media(filename=original)
+    metadata = Metadata()
+    metadata.add_media(sample_media)
+    metadata.add_media(other)
+
+    # the item's other media still needs the file, so it isn't moved
+    local_storage.store(sample_media, "https://example.com", metadata)
+    assert os.path.exists(original)
+    local_storage.store(other, "https://example.com", Metadata())
+    assert not os.path.exists(original)
+    assert Path(sample_media.key).read_text() == Path(other.key).read_text() == "test content"
+
+
+def test_move_links_files_already_moved(local_storage, sample_media):
+    local_storage.link_strategy = "move"
+    local_storage.filename_generator = "random"
+    local_storage.config["steps"] = {"storages": ["local_storage"]}
+    original = sample_media.filename
+    other = Media(filename=original)
+    metadata = Metadata()
+
+    # without the media in the item's metadata the sharing isn't known, the first store moves the file
+    local_storage.store(sample_media, "https://example.com", metadata)
+    local_storage.store(other, "https://example.com", metadata)
+    assert Path(other.key).read_text() == "test content"
+    assert os.path.exists(sample_media.key)
+    assert other.filename == sample_media.key
+
+    # the next item's files are its own, the map starts over
+    Path(original).write_text("next content")
+    local_storage.store(Media(filename=original), "https://example.com/next", Metadata())
+    assert list(local_storage.moved) == [original]
+    assert local_storage.moved[original] != sample_media.key
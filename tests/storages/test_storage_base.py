@@ -1,9 +1,12 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Type
 
 import pytest
 
 from auto_archiver.core.metadata import Metadata, Media
 from auto_archiver.core.storage import Storage
+from auto_archiver.core.consts import SetupError
 from auto_archiver.core.module import ModuleFactory
 
 
@@ -108,3 +111,86 @@ def test_storage_loads_hash_enricher(storage_base, dummy_file):
         pytest.fail(f"Storage failed to dynamically load hash_enricher: {e}")
 
     assert media.key is not None, "Expected media.key to be set, but it was None"
+
+
+@pytest.mark.parametrize(
+    "shard_depth, shard_width, expected_key",
+    [
+        (2, 2, "folder/6a/e8/6ae8a75555209fd6c44157c0.txt"),
+        (1, 3, "folder/6ae/6ae8a75555209fd6c44157c0.txt"),
+        (3, 1, "folder/6/a/e/6ae8a75555209fd6c44157c0.txt"),
+    ],
+)
+def test_sharded_path_generator(storage_base, dummy_file, shard_depth, shard_width, expected_key):
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "static"})
+    storage.shard_depth, storage.shard_width = shard_depth, shard_width
+    metadata = Metadata().set_context("folder", "folder")
+    media = Media(filename=dummy_file)
+    storage.set_key(media, "https://example.com/file/", metadata)
+    assert media.key == expected_key
+
+
+def test_sharded_path_generator_with_random_filename(storage_base, dummy_file, mocker):
+    mocker.patch("auto_archiver.core.storage.random_str", return_value="pretend-random")
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "random"})
+    media = Media(filename=dummy_file)
+    storage.set_key(media, "https://example.com/file/", Metadata())
+    assert media.key == "6a/e8/pretend-random.txt"
+
+
+def test_sharded_path_generator_too_deep(storage_base, dummy_file):
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "static"})
+    storage.shard_depth, storage.shard_width = 33, 2
+    with pytest.raises(ValueError, match="Cannot shard"):
+        storage.set_key(Media(filename=dummy_file), "https://example.com/file/", Metadata())
+
+
+def test_content_hash_calculated_once(storage_base, dummy_file, mocker):
+    calculate_hash = mocker.patch(
+        "auto_archiver.modules.hash_enricher.hash_enricher.HashEnricher.calculate_hash", return_value="ab" * 32
+    )
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "static"})
+    media = Media(filename=dummy_file)
+    storage.set_key(media, "https://example.com/file/", Metadata())
+    assert media.key == f"ab/ab/{'ab' * 12}.txt"
+    calculate_hash.assert_called_once()
+
+
+def test_content_hash_reuses_hash_enricher_digest(storage_base, dummy_file, mocker):
+    calculate_hash = mocker.patch("auto_archiver.modules.hash_enricher.hash_enricher.HashEnricher.calculate_hash")
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "static"})
+    media = Media(filename=dummy_file).set("hash", f"SHA-256:{'cd' * 32}")
+    storage.set_key(media, "https://example.com/file/", Metadata())
+    assert media.key == f"cd/cd/{'cd' * 12}.txt"
+    calculate_hash.assert_not_called()
+
+
+def test_hash_enricher_loaded_once(storage_base, mocker):
+    storage: Storage = storage_base({"path_generator": "flat", "filename_generator": "static"})
+
+    def slow_get_module(name, config):
+        time.sleep(0.05)
+        return mocker.MagicMock()
+
+    get_module = mocker.patch.object(storage.module_factory, "get_module", side_effect=slow_get_module)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        enrichers = list(pool.map(lambda _: storage.hash_enricher, range(4)))
+    get_module.assert_called_once_with("hash_enricher", storage.config)
+    assert all(he is enrichers[0] for he in enrichers)
+
+
+def test_setup_loads_hash_enricher_when_needed(storage_base, mocker):
+    for filename_generator, loaded in [("static", True), ("random", False)]:
+        storage: Storage = storage_base({"path_generator": "flat", "filename_generator": filename_generator})
+        get_module = mocker.patch.object(storage.module_factory, "get_module")
+        storage.setup()
+        assert get_module.called == loaded
+
+
+def test_setup_rejects_shards_longer_than_the_hash(storage_base):
+    storage: Storage = storage_base({"path_generator": "sharded", "filename_generator": "random"})
+    storage.shard_depth, storage.shard_width = 33, 2
+    with pytest.raises(SetupError, match="Cannot shard a 64 character hash"):
+        storage.setup()
+    storage.shard_depth = 32
+    storage.setup()
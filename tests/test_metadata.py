@@ -1,8 +1,9 @@
+import json
 import pytest
 from datetime import datetime, timezone
 from dataclasses import dataclass
 from typing import Any
-from auto_archiver.core.metadata import Metadata
+from auto_archiver.core.metadata import Metadata, Media
 
 
 @pytest.fixture
@@ -192,3 +193,72 @@ def test_choose_most_complete_from_pickles(unpickle):
     # Iterates `for r in results[1:]:`
     res = Metadata.choose_most_complete([Metadata(), m_after_enriching, m_before_enriching])
     assert res.media == m_after_enriching.media
+
+
+def test_json_matches_dataclasses_json(unpickle):
+    from dataclasses_json.core import _asdict, _ExtendedEncoder
+
+    m = unpickle("metadata_enricher_ytshort_input.pickle")
+    m.set("nested", {"list": [1, (2, 3), {"media": Media("x.jpg")}], "set": {1}, "when": datetime.now(timezone.utc)})
+    m.media[0].set("thumbnails", [Media("thumb.jpg")])
+    m.media[0]._stored = True
+
+    assert m.to_dict() == _asdict(m)
+    assert m.to_dict(encode_json=True) == _asdict(m, encode_json=True)
+    assert m.to_json() == json.dumps(_asdict(m), cls=_ExtendedEncoder)
+    assert m.to_json(indent=4, ensure_ascii=False) == json.dumps(
+        _asdict(m), cls=_ExtendedEncoder, indent=4, ensure_ascii=False
+    )
+
+
+def test_from_dict_roundtrip():
+    m = Metadata(status="success").set_url("https://example.com").set("tags", ["a"])
+    m.add_media(Media("a.jpg", _key="k", urls=["https://cdn/a.jpg"]).set("hash", "abc"), "first")
+    loaded = Metadata.from_dict(json.loads(m.to_json()))
+
+    assert loaded.status == "success"
+    assert loaded.get_url() == "https://example.com"
+    assert loaded.get("tags") == ["a"]
+    assert isinstance(loaded.media[0], Media)
+    assert loaded.media[0] == m.media[0]
+    assert Metadata.from_dict({}).status == "no archiver"
+
+
+def test_str_is_bounded():
+    m = Metadata().set_url("https://example.com/" + "a" * 10_000).set_title("title")
+    m.set("api_data", {"huge": "x" * 100_000})
+    for i in range(1000):
+        m.add_media(Media(f"{i}.jpg").set("hash", "x" * 1000))
+
+    summary = str(m)
+    assert len(summary) < 500
+    assert "title" in summary and "media=<1000 items>" in summary
+    assert len(str(m.media[0])) < 200
+    assert "x" * 1000 in repr(m.media[0])
+
+
+@pytest.mark.parametrize(
+    "existing,chunks",
+    [
+        (None, ["a", "b"]),
+        (None, ["  a  ", "\n", " b\n", ""]),
+        ("old ", ["new"]),
+        ("old ", ["  ", "new"]),
+        ("", []),
+    ],
+)
+def test_extend_content_matches_set_content(existing, chunks):
+    one_by_one, batched = Metadata(), Metadata()
+    if existing is not None:
+        one_by_one.set("content", existing)
+        batched.set("content", existing)
+    for chunk in chunks:
+        one_by_one.set_content(chunk)
+
+    assert batched.extend_content(chunks) is batched
+    assert batched.get("content") == one_by_one.get("content")
+
+
+def test_extend_content_accepts_generators():
+    m = Metadata().extend_content(f"page {i} " for i in range(3))
+    assert m.get("content") == "page 0page 1page 2"
@@ -288,3 +288,53 @@ def test_check_for_updates_new_version_available(orchestrator, mocker):
     )
     # should complete without error
     orchestrator.check_for_updates()
+
+
+class ListFeeder(list):
+    name = "list_feeder"
+    read_ahead = True
+
+    def can_read_ahead(self):
+        return self.read_ahead
+
+
+def test_read_ahead_prefetches_batches(orchestrator, mocker):
+    database = mocker.MagicMock()
+    orchestrator.databases = [database]
+    orchestrator.extractors = []
+    orchestrator.prefetch_size = 2
+    feeder = ListFeeder(Metadata().set_url(f"https://example.com/{i}?utm_source=x") for i in range(3))
+
+    assert list(orchestrator._read_ahead(feeder)) == feeder
+    assert database.prefetch.call_args_list == [
+        mocker.call(["https://example.com/0", "https://example.com/1"]),
+        mocker.call(["https://example.com/2"]),
+    ]
+
+    database.reset_mock()
+    orchestrator.prefetch_size = 0
+    assert list(orchestrator._read_ahead(feeder)) == feeder
+    database.prefetch.assert_not_called()
+
+
+def test_read_ahead_sanitizes_like_archive(orchestrator, mocker):
+    database = mocker.MagicMock()
+    extractor = mocker.MagicMock()
+    extractor.sanitize_url.side_effect = lambda url: url.replace("t.co", "example.com")
+    orchestrator.databases, orchestrator.extractors, orchestrator.prefetch_size = [database], [extractor], 2
+    feeder = ListFeeder([Metadata().set_url("https://t.co/1"), Metadata().set_url("file:///etc/passwd")])
+
+    items = list(orchestrator._read_ahead(feeder))
+    database.prefetch.assert_called_once_with(["https://example.com/1"])
+    assert items[0].get_url() == "https://example.com/1"
+    assert items[0].get("original_url") == "https://t.co/1"
+
+
+def test_read_ahead_respects_feeders_that_cant_be_read_ahead(orchestrator, mocker):
+    database = mocker.MagicMock()
+    orchestrator.databases, orchestrator.extractors, orchestrator.prefetch_size = [database], [], 2
+    feeder = ListFeeder([Metadata().set_url("https://example.com/1")])
+    feeder.read_ahead = False
+
+    assert list(orchestrator._read_ahead(feeder)) == feeder
+    database.prefetch.assert_not_called()
@@ -0,0 +1,50 @@
+import json
+import pickle
+
+import pytest
+from loguru import logger as base_logger
+
+from auto_archiver.utils.custom_logger import LazySerialized, patching, serialize
+
+
+@pytest.fixture
+def captured():
+    """Adds a sink (removed afterwards) that keeps the serialized form of every emitted record."""
+    messages = []
+    handler_id = base_logger.add(messages.append, level="INFO", format="{extra[serialized]}")
+    yield messages
+    base_logger.remove(handler_id)
+
+
+def test_lazy_serialized_only_serializes_once():
+    calls = []
+
+    def serializer(record):
+        calls.append(record)
+        return "serialized"
+
+    lazy = LazySerialized({"message": "x"}, serializer)
+    assert calls == []
+    assert f"{lazy}" == "serialized"
+    assert str(lazy) == "serialized"
+    assert len(calls) == 1
+
+
+def test_lazy_serialized_pickles_as_string():
+    lazy = LazySerialized({}, lambda _: "serialized")
+    assert pickle.loads(pickle.dumps(lazy)) == "serialized"
+
+
+def test_filtered_records_are_not_serialized(captured, mocker):
+    spy = mocker.patch("auto_archiver.utils.custom_logger.serialize", wraps=serialize)
+    log = base_logger.patch(patching)
+
+    log.debug("filtered out by the sink level")
+    assert spy.call_count == 0
+
+    with log.contextualize(url="https://example.com"):
+        log.info("emitted")
+    assert spy.call_count == 1
+    emitted = json.loads(captured[-1])
+    assert emitted["message"] == "emitted"
+    assert emitted["url"] == "https://example.com"
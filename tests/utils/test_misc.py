@@ -15,6 +15,7 @@ from auto_archiver.utils.misc import (
     random_str,
     get_timestamp,
     ydl_entry_to_filename,
+    truncate,
 )
 
 
@@ -184,3 +185,13 @@ class TestYdlEntryToFilename:
 
         ydl = self._make_mock_ydl(str(tmp_path / "video.mp4"))
         assert ydl_entry_to_filename(ydl, {}) is False
+
+
+class TestTruncate:
+    def test_short_text_unchanged(self):
+        assert truncate("short") == "short"
+        assert truncate(None) is None
+
+    def test_long_text_is_capped(self):
+        result = truncate("a" * 1000, 10)
+        assert result == "aaaaaaaaaa...(+990 chars)"